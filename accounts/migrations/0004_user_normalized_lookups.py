@@ -0,0 +1,62 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:05
+
+import phonenumbers
+from django.db import migrations, models
+
+
+# Frozen copies of accounts.models.normalize_identifier and
+# normalize_phone_number, so later changes to those cannot alter this backfill.
+def normalize_identifier(value):
+    return value.strip().lower() if value else None
+
+
+def normalize_phone_number(value):
+    if not value:
+        return None
+    try:
+        number = phonenumbers.parse(value, "NG")
+        if phonenumbers.is_valid_number_for_region(number, "NG"):
+            return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    except phonenumbers.NumberParseException:
+        pass
+    return value.strip()
+
+
+def fill_normalized_columns(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    batch = []
+    for user in User.objects.only('id', 'email', 'username', 'phone_number').iterator(chunk_size=1000):
+        user.email_normalized = normalize_identifier(user.email)
+        user.username_normalized = normalize_identifier(user.username)
+        user.phone_number_normalized = normalize_phone_number(user.phone_number)
+        batch.append(user)
+        if len(batch) == 1000:
+            User.objects.bulk_update(batch, ['email_normalized', 'username_normalized', 'phone_number_normalized'])
+            batch = []
+    User.objects.bulk_update(batch, ['email_normalized', 'username_normalized', 'phone_number_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_number_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=70, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=60, null=True),
+        ),
+        migrations.RunPython(fill_normalized_columns, migrations.RunPython.noop),
+    ]
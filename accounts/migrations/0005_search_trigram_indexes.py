@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:12
+
+from django.db import migrations
+
+# icontains compiles to UPPER("column"::text) LIKE UPPER(%s) on PostgreSQL,
+# so the trigram indexes are built on that same expression.
+TRIGRAM_INDEXES = [
+    ('user_username_trgm_idx', 'accounts_user', 'username'),
+    ('user_email_trgm_idx', 'accounts_user', 'email'),
+    ('user_full_name_trgm_idx', 'accounts_user', 'full_name'),
+    ('user_phone_number_trgm_idx', 'accounts_user', 'phone_number'),
+    ('role_name_trgm_idx', 'accounts_role', 'name'),
+    ('role_description_trgm_idx', 'accounts_role', 'description'),
+    ('permission_name_trgm_idx', 'accounts_permission', 'name'),
+    ('permission_group_name_trgm_idx', 'accounts_permission', 'group_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_normalized_lookups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
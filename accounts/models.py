@@ -23,6 +23,39 @@ class PasswordResetRequestStatus(TextChoices):
     expired = "Expired"
 
 
+def parse_coordinates(value):
+    """
+    Reads a point stored as {"latitude": .., "longitude": ..} (or lat/lng/lon keys)
+    or as a [latitude, longitude] pair. Returns (None, None) when it cannot be read.
+    """
+    latitude = longitude = None
+    if isinstance(value, dict):
+        latitude = value.get("latitude", value.get("lat"))
+        longitude = value.get("longitude", value.get("lng", value.get("lon")))
+    elif isinstance(value, (list, tuple)) and len(value) == 2:
+        latitude, longitude = value
+
+    try:
+        return float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def normalize_identifier(value):
+    """Lower-cased, trimmed form of an email or username, as stored for lookups."""
+    return value.strip().lower() if value else None
+
+
+def normalize_phone_number(value):
+    """E.164 form of a phone number, or the trimmed input when it cannot be parsed."""
+    if not value:
+        return None
+    # services.util imports this module.
+    from services.util import format_phone_number
+
+    return format_phone_number(value) or value.strip()
+
+
 class User(AbstractUser, BaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     username = models.CharField(max_length=60, unique=True)
@@ -46,6 +79,15 @@ class User(AbstractUser, BaseModel):
         max_length=300, null=True, blank=True
     ) 
     address_coord = models.JSONField(null=True, blank=True)
+    # Typed copy of address_coord, kept in sync by save().
+    address_latitude = models.FloatField(null=True, blank=True)
+    address_longitude = models.FloatField(null=True, blank=True)
+    # Normalized copies of email, username and phone_number, kept in sync by
+    # save(). Case-insensitive lookups match these exactly, so each one is a
+    # single index probe.
+    email_normalized = models.CharField(max_length=254, null=True, blank=True, db_index=True, editable=False)
+    username_normalized = models.CharField(max_length=60, null=True, blank=True, db_index=True, editable=False)
+    phone_number_normalized = models.CharField(max_length=70, null=True, blank=True, db_index=True, editable=False)
     status = models.CharField(
         max_length=50, default="active"
     )  # Adjust the field type and length as needed
@@ -58,9 +100,29 @@ class User(AbstractUser, BaseModel):
     groups = None
     user_permissions = None
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["address_latitude", "address_longitude"], name="user_address_bbox_idx"),
+            # The user list reads available_objects newest first.
+            models.Index(
+                fields=["-created_at"],
+                name="user_available_created_idx",
+                condition=Q(deleted_at__isnull=True),
+            ),
+        ]
+
+    # source field: (normalized field, normalizer)
+    NORMALIZED_FIELDS = {
+        "email": ("email_normalized", normalize_identifier),
+        "username": ("username_normalized", normalize_identifier),
+        "phone_number": ("phone_number_normalized", normalize_phone_number),
+    }
+
     def save(self, *args, **kwargs):
         """
-        Overrides the save method to split `full_name` into `first_name` and `last_name`.
+        Overrides the save method to split `full_name` into `first_name` and `last_name`,
+        to copy `address_coord` into `address_latitude` / `address_longitude`, and to
+        refresh the normalized lookup columns.
         """
         if self.full_name:
             # Split the full_name into first_name and last_name
@@ -68,6 +130,23 @@ class User(AbstractUser, BaseModel):
             self.first_name = parts[0]
             self.last_name = parts[1] if len(parts) > 1 else ""  # Default to empty if no last name
 
+        self.address_latitude, self.address_longitude = parse_coordinates(self.address_coord)
+        for field, (normalized_field, normalize) in self.NORMALIZED_FIELDS.items():
+            setattr(self, normalized_field, normalize(getattr(self, field)))
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra_fields = set()
+            if "address_coord" in update_fields:
+                extra_fields |= {"address_latitude", "address_longitude"}
+            extra_fields |= {
+                normalized_field
+                for field, (normalized_field, _) in self.NORMALIZED_FIELDS.items()
+                if field in update_fields
+            }
+            if extra_fields:
+                kwargs["update_fields"] = {*update_fields, *extra_fields}
+
         super().save(*args, **kwargs)  # Call the parent class's save method
 
     def natural_key(self):
@@ -0,0 +1,270 @@
+import heapq
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Case, F, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Permission, Role, User
+from services.log import AppLogger
+
+SEARCH_INDEX_VERSION_KEY = "search:index-version:{label}"
+
+# Searchable columns per model and how much a match in each one counts.
+SEARCH_FIELDS = {
+    User: {"username": 3, "email": 3, "full_name": 2, "phone_number": 1},
+    Role: {"name": 2, "description": 1},
+    Permission: {"name": 2, "group_name": 1},
+}
+
+
+def ngrams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SearchIndex:
+    """
+    In-memory substring index over a model's SEARCH_FIELDS, used where the
+    database has no trigram index (SQLite).
+
+    Every 1-, 2- and 3-character substring of a row's fields points at the
+    row. Queries of up to three characters are a single lookup; longer ones
+    intersect their trigrams, smallest first, and confirm the substring on
+    the few rows left. Matches rank by field weight, then by how the field
+    matched: whole value, prefix of a word, anywhere.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.version = None
+        self.checked_at = 0
+        self.reloading = False
+        self._documents = {}
+        self._postings = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, pk, values):
+        texts = tuple((value or "").strip().lower() for value in values)
+        grams = {gram for text in texts for size in (1, 2, 3) for gram in ngrams(text, size)}
+        with self._lock:
+            self.remove(pk)
+            self._documents[pk] = texts
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(pk)
+
+    def remove(self, pk):
+        with self._lock:
+            texts = self._documents.pop(pk, None)
+            if texts is None:
+                return
+            for text in texts:
+                for size in (1, 2, 3):
+                    for gram in ngrams(text, size):
+                        postings = self._postings.get(gram)
+                        if postings is not None:
+                            postings.discard(pk)
+                            if not postings:
+                                del self._postings[gram]
+
+    def search(self, query, limit, within=None):
+        """
+        Primary keys of up to ``limit`` rows containing the query, best first,
+        out of the keys in ``within`` when it is given.
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        with self._lock:
+            if len(query) <= 3:
+                candidates = self._postings.get(query, set())
+            else:
+                postings = sorted((self._postings.get(gram, set()) for gram in ngrams(query, 3)), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+                candidates = {pk for pk in candidates if any(query in text for text in self._documents[pk])}
+            if within is not None:
+                candidates = candidates & within
+
+            scored = ((self._score(self._documents[pk], query), str(pk), pk) for pk in candidates)
+            return [pk for _, _, pk in heapq.nlargest(limit, scored)]
+
+    def _score(self, texts, query):
+        score = 0
+        for text, weight in zip(texts, self.weights.values()):
+            if text == query:
+                score += weight * 3
+            elif text.startswith(query) or f" {query}" in text or f"@{query}" in text:
+                score += weight * 2
+            elif query in text:
+                score += weight
+        return score
+
+    @classmethod
+    def load(cls, model):
+        weights = SEARCH_FIELDS[model]
+        index = cls(weights)
+        rows = model.objects.values_list("pk", *weights).order_by().iterator(chunk_size=2000)
+        for pk, *values in rows:
+            index.add(pk, values)
+        return index
+
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def get_search_index(model) -> SearchIndex:
+    """
+    Process-wide SearchIndex for the model. It is built on first use, and
+    rebuilt in the background when the shared version shows that another
+    process changed rows, checked every SEARCH_INDEX_CHECK_SECONDS.
+    """
+    index = _indexes.get(model)
+    if index is None:
+        with _index_lock:
+            index = _indexes.get(model)
+            if index is None:
+                index = reload_search_index(model, get_search_index_version(model))
+        return index
+
+    now = time.monotonic()
+    if now - index.checked_at < getattr(settings, "SEARCH_INDEX_CHECK_SECONDS", 30):
+        return index
+
+    with _index_lock:
+        index.checked_at = now
+        version = get_search_index_version(model)
+        if version != index.version and not index.reloading:
+            index.reloading = True
+            threading.Thread(target=_reload_in_background, args=(model, version), daemon=True).start()
+    return index
+
+
+def reload_search_index(model, version=None):
+    index = SearchIndex.load(model)
+    index.version, index.checked_at = version, time.monotonic()
+    _indexes[model] = index
+    return index
+
+
+def _reload_in_background(model, version):
+    try:
+        reload_search_index(model, version)
+    except Exception as e:
+        AppLogger.report(e)
+        _indexes[model].reloading = False
+    finally:
+        close_old_connections()
+
+
+def get_search_index_version(model):
+    try:
+        return cache.get(SEARCH_INDEX_VERSION_KEY.format(label=model._meta.label_lower))
+    except Exception as e:
+        AppLogger.report(error=e)
+        index = _indexes.get(model)
+        return index.version if index else None
+
+
+def bump_search_index_version(model):
+    """Tells every process that rows changed; call it after bulk writes, which send no signals."""
+    version = uuid.uuid4().hex
+    try:
+        cache.set(SEARCH_INDEX_VERSION_KEY.format(label=model._meta.label_lower), version, timeout=None)
+    except Exception as e:
+        AppLogger.report(error=e)
+    return version
+
+
+def index_row(model, pk, values=None):
+    """Applies one saved (values given) or deleted row to this process's index."""
+    index = _indexes.get(model)
+    was_current = index is not None and index.version == get_search_index_version(model)
+    version = bump_search_index_version(model)
+    if index is None:
+        return
+    if values is None:
+        index.remove(pk)
+    else:
+        index.add(pk, values)
+    # Other processes rebuild; this one only does if it had missed earlier changes.
+    if was_current:
+        index.version = version
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Role)
+@receiver(post_save, sender=Permission)
+def searchable_row_saved(sender, instance, update_fields=None, **kwargs):
+    # Saves such as the last_login update touch no searchable column.
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS[sender]):
+        return
+    values = [getattr(instance, field) for field in SEARCH_FIELDS[sender]]
+    transaction.on_commit(lambda: index_row(sender, instance.pk, values))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Permission)
+def searchable_row_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: index_row(sender, pk))
+
+
+class WordSimilarity(Func):
+    """pg_trgm's word_similarity(query, column)."""
+
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+
+def search_queryset(queryset, keyword):
+    """
+    `queryset` narrowed to rows whose SEARCH_FIELDS contain `keyword`
+    (case-insensitively), best matches first.
+
+    On PostgreSQL the icontains filters are served by the pg_trgm GIN
+    indexes and rows are ranked by weighted word_similarity. Elsewhere the
+    in-process SearchIndex picks the SEARCH_MAX_RESULTS best rows, out of
+    the rows `queryset` selects once there are more matches than that. When
+    matches are cut off, the returned queryset's `search_limit` is set.
+    """
+    keyword = (keyword or "").strip()
+    if not keyword:
+        return queryset
+
+    weights = SEARCH_FIELDS[queryset.model]
+    if connections[queryset.db].vendor == "postgresql":
+        matches = Q()
+        for field in weights:
+            matches |= Q(**{f"{field}__icontains": keyword})
+        rank = sum(
+            Coalesce(WordSimilarity(Value(keyword), F(field)), 0.0) * weight for field, weight in weights.items()
+        )
+        return queryset.filter(matches).annotate(search_rank=rank).order_by("-search_rank", "pk")
+
+    index = get_search_index(queryset.model)
+    limit = getattr(settings, "SEARCH_MAX_RESULTS", 1000)
+    ids = index.search(keyword, limit + 1)
+    # Past the limit, rows the queryset filters out could crowd out the ones
+    # it keeps, so rank again among the rows it selects.
+    if len(ids) > limit and queryset.query.where:
+        ids = index.search(keyword, limit + 1, within=set(queryset.values_list("pk", flat=True).order_by()))
+    if not ids:
+        return queryset.none()
+
+    truncated = len(ids) > limit
+    ids = ids[:limit]
+    ranking = Case(*(When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)), output_field=IntegerField())
+    queryset = queryset.filter(pk__in=ids).order_by(ranking)
+    queryset.search_limit = limit if truncated else None
+    return queryset
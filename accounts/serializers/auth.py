@@ -2,7 +2,6 @@ from disposable_email_checker.validators import validate_disposable_email
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
-from django.db.models import Q
 from django.utils.translation import gettext as translate
 from email_validator import validate_email
 from password_validator import PasswordValidator
@@ -10,7 +9,7 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from accounts.models import User
+from accounts.models import User, normalize_identifier
 from accounts.services.users import UserService
 from services.cache_util import CacheUtil
 from services.log import AppLogger
@@ -133,7 +132,7 @@ class SignupSerializer(serializers.Serializer):
         except Exception as e:
             raise serializers.ValidationError("Invalid email provided", "email")
 
-        if User.objects.filter(Q(email__iexact=email)).exists():
+        if User.objects.filter(email_normalized=normalize_identifier(email)).exists():
             # raise serializers.ValidationError(translate("auth.register.email_exists"), "email")
             raise serializers.ValidationError("An account with the provided email already exists", "email")
 
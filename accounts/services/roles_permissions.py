@@ -1,11 +1,12 @@
 from typing import Any
 
-from django.db.models import Q
 from django.utils import timezone
 
 from accounts.constants.roles_permissions import PermissionGroups, RoleEnum
 from accounts.models import Permission, Role
+from accounts.search import search_queryset
 from accounts.serializers.roles_permissions import PermissionSerializer, RoleSerializer
+from core.db_router import use_read_replica
 from core.errors.app_errors import OperationError
 from crm.constants import ActivityType
 from services.util import CustomAPIRequestUtil
@@ -48,15 +49,11 @@ class PermissionService(CustomAPIRequestUtil):
         filter_keyword = filter_params.get("keyword")
         self.page_size = filter_params.get("page_size", 100)
 
-        q = Q()
-        if filter_keyword:
-            q = Q(name__icontains=filter_keyword)
-
-        queryset = Permission.objects.filter(q)
-        page = self.paginate_queryset(queryset, request=self.request)
+        queryset = search_queryset(Permission.objects.order_by("pk"), filter_keyword)
+        page, total = self.paginate_with_count(queryset)
         data = PermissionSerializer(page, many=True).data
 
-        return self.get_paginated_list_response(data, queryset.count())
+        return self.get_paginated_list_response(data, total)
 
 
 class RoleService(CustomAPIRequestUtil):
@@ -159,18 +156,13 @@ class RoleService(CustomAPIRequestUtil):
     def fetch_by_ids(cls, role_ids):
         return Role.available_objects.filter(pk__in=role_ids)
 
+    @use_read_replica
     def fetch_list(self, filter_params) -> (Any, OperationError):
         filter_keyword = filter_params.get("keyword")
         self.page_size = filter_params.get("page_size", 100)
 
-        q = Q()
-        if filter_keyword:
-            q = Q(name__icontains=filter_keyword) | Q(
-                description__icontains=filter_keyword
-            )
-
-        queryset = Role.available_objects.prefetch_related("permissions").filter(q)
-        page = self.paginate_queryset(queryset, request=self.request)
+        queryset = search_queryset(Role.objects.prefetch_related("permissions").order_by("pk"), filter_keyword)
+        page, total = self.paginate_with_count(queryset)
         data = RoleSerializer(page, many=True).data
 
-        return self.get_paginated_list_response(data, queryset.count())
+        return self.get_paginated_list_response(data, total)
@@ -8,9 +8,18 @@ from django.db.models import Q
 from django.utils import timezone
 
 from accounts.constants.roles_permissions import RoleEnum
-from accounts.models import Permission, Role, User, UserTypes
+from accounts.models import (
+    Permission,
+    Role,
+    User,
+    UserTypes,
+    normalize_identifier,
+    normalize_phone_number,
+)
+from accounts.search import search_queryset
 from accounts.serializers.users import UserListSerializer
 from accounts.services.roles_permissions import RoleService
+from core.db_router import use_read_replica
 from core.errors.app_errors import OperationError
 from crm.constants import ActivityType
 from services.log import AppLogger
@@ -239,7 +248,7 @@ class UserService(CustomAPIRequestUtil):
         def __fetch() -> Tuple[Optional[User], Optional[str]]:
             user = (
                 User.objects.prefetch_related("roles")
-                .filter(username__iexact=username)
+                .filter(username_normalized=normalize_identifier(username))
                 .first()
             )
             return user, None if user else f"User '{username}' not found"
@@ -251,7 +260,7 @@ class UserService(CustomAPIRequestUtil):
         def __fetch() -> Tuple[Optional[User], Optional[str]]:
             user = (
                 User.objects.prefetch_related("roles")
-                .filter(email__iexact=email)
+                .filter(email_normalized=normalize_identifier(email))
                 .first()
             )
             return user, None if user else f"User with email '{email}' not found"
@@ -263,7 +272,9 @@ class UserService(CustomAPIRequestUtil):
     def find_user_by_phone_number(
         cls, phone_number: str
     ) -> Tuple[Optional[User], Optional[str]]:
-        user = User.objects.filter(phone_number__iexact=phone_number).first()
+        user = User.objects.filter(
+            phone_number_normalized=normalize_phone_number(phone_number)
+        ).first()
         return (
             user,
             None if user else f"User with phone number '{phone_number}' not found",
@@ -281,11 +292,11 @@ class UserService(CustomAPIRequestUtil):
 
         query = Q()
         if username:
-            query |= Q(username__iexact=username)
+            query |= Q(username_normalized=normalize_identifier(username))
         if email:
-            query |= Q(email__iexact=email)
+            query |= Q(email_normalized=normalize_identifier(email))
         if phone_number:
-            query |= Q(phone_number__iexact=phone_number)
+            query |= Q(phone_number_normalized=normalize_phone_number(phone_number))
 
         return User.objects.filter(query).exists()
 
@@ -334,36 +345,26 @@ class UserService(CustomAPIRequestUtil):
             AppLogger.report(e)
             return None, str(e)
 
+    @use_read_replica
     def fetch_list(self, filter_params) -> (Any, OperationError):
         filter_user_type = filter_params.get("user_type")
         filter_keyword = filter_params.get("keyword")
         self.page_size = filter_params.get("page_size", 100)
 
-        q = Q()
-        if filter_keyword:
-            q &= (
-                Q(username__icontains=filter_keyword)
-                | Q(full_name__icontains=filter_keyword)
-                | Q(phone_number__icontains=filter_keyword)
-                | Q(email__icontains=filter_keyword)
-            )
-
         if not filter_user_type:
             filter_user_type = UserTypes.customer
 
-        if filter_user_type:
-            q &= Q(user_type__iexact=filter_user_type)
-
         queryset = (
-            User.available_objects.filter(q)
+            User.available_objects.filter(user_type__iexact=filter_user_type)
             .exclude(pk=self.auth_user.pk)
             .prefetch_related("roles")
             .order_by("-created_at")
         )
-        page = self.paginate_queryset(queryset, request=self.request)
+        queryset = search_queryset(queryset, filter_keyword)
+        page, total = self.paginate_with_count(queryset)
         data = UserListSerializer(page, many=True).data
 
-        return self.get_paginated_list_response(data, queryset.count())
+        return self.get_paginated_list_response(data, total)
 
     def clear_temp_cache(self, user):
         self.clear_cache(self.gen_cache_key("permission_names", user_id=user))
@@ -17,7 +17,7 @@ urlpatterns = [
     path("register/driver", RegisterDriverView.as_view(), name="driver_registration"),
     path("signup/resend-otp", RegisterOtpView.as_view(), name="register-otp"),
     path("signup/verify-otp", VerifyOtpView.as_view(), name="verify-otp"),
-    path("token/refresh", TokenRefreshView.as_view()),
+    path("token/refresh", TokenRefreshView.as_view(), name="token-refresh"),
     path("password/forgot", ForgotPasswordRequestView.as_view(), name="forgot-password"),
     path("password/change", ResetPasswordRequestView.as_view(), name="change-password"),
     path("password/in-app/change", ResetPasswordInAppRequestView.as_view(), name="change-password-in-app")
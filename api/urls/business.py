@@ -1,19 +1,43 @@
 from django.urls import include, path
 
 from business.controllers.business import (
+    AsyncCalculateFareView,
+    AsyncCreateTripView,
+    AsyncListDriverTripsAPIView,
+    AsyncListUserTripsAPIView,
     CalculateFareView,
     CreateTripView,
     CreateVehicleAPIView,
     CreateTripReviewAPIView,
+    ExportTripsAPIView,
     ListDriverTripsAPIView,
-    ListUserTripsAPIView
+    ListUserTripsAPIView,
+    PickupEtaAPIView,
+    SearchPlacesAPIView,
+    TripStatsAPIView,
+    TripTransitionAPIView
 )
 
 urlpatterns = [
     path('trips/create/', CreateTripView.as_view(), name='create-trip'),
     # path('vehicles/create/', CreateVehicleAPIView.as_view(), name='create-vehicle'),
+    path('trips/<uuid:trip_id>/accept/', TripTransitionAPIView.as_view(transition='accept'), name='accept-trip'),
+    path('trips/<uuid:trip_id>/start/', TripTransitionAPIView.as_view(transition='start'), name='start-trip'),
+    path('trips/<uuid:trip_id>/complete/', TripTransitionAPIView.as_view(transition='complete'), name='complete-trip'),
+    path('trips/<uuid:trip_id>/cancel/', TripTransitionAPIView.as_view(transition='cancel'), name='cancel-trip'),
     path('trips/review/', CreateTripReviewAPIView.as_view(), name='create-trip-review'),
     path('trips/driver/', ListDriverTripsAPIView.as_view(), name='list-driver-trips'),
     path('trips/user/', ListUserTripsAPIView.as_view(), name='list-user-trips'),
-    path('calculate-fare/', CalculateFareView.as_view(), name='calculate-fare')
+    path('trips/export/', ExportTripsAPIView.as_view(), name='export-trips'),
+    path('calculate-fare/', CalculateFareView.as_view(), name='calculate-fare'),
+    path('places/search/', SearchPlacesAPIView.as_view(), name='search-places'),
+    path('eta/pickup/', PickupEtaAPIView.as_view(), name='pickup-eta'),
+    path('stats/driver/', TripStatsAPIView.as_view(role='driver'), name='driver-stats'),
+    path('stats/customer/', TripStatsAPIView.as_view(role='customer'), name='customer-stats'),
+
+    # ASGI variants, served without blocking a worker thread on geocoding or the ORM.
+    path('async/trips/create/', AsyncCreateTripView.as_view(), name='create-trip-async'),
+    path('async/trips/driver/', AsyncListDriverTripsAPIView.as_view(), name='list-driver-trips-async'),
+    path('async/trips/user/', AsyncListUserTripsAPIView.as_view(), name='list-user-trips-async'),
+    path('async/calculate-fare/', AsyncCalculateFareView.as_view(), name='calculate-fare-async'),
 ]
@@ -0,0 +1,94 @@
+"""
+Per-request database latency with and without connection reuse.
+
+    python benchmarks/bench_db_connections.py --requests 2000
+
+Each simulated request fires Django's request_started/request_finished
+signals around one small query, which is where Django opens and closes
+connections. The "per-request" run sets CONN_MAX_AGE=0 (Django's default),
+so every request pays for connection setup; "persistent" keeps the
+connection for the configured lifetime; "pooled" (PostgreSQL with
+DB_POOL_ENABLED) borrows from the psycopg pool. Reports p50/p95/p99 in
+microseconds for whichever database the settings select.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+def simulate_requests(count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        request_finished.send(sender=None)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def configure(conn_max_age, pool_options):
+    connection.close()
+    if connection.vendor == "postgresql":
+        connection.close_pool()
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    connection.settings_dict["OPTIONS"].pop("pool", None)
+    if pool_options:
+        connection.settings_dict["OPTIONS"]["pool"] = pool_options
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args()
+
+    settings_dict = connection.settings_dict
+    pool_options = settings_dict["OPTIONS"].get("pool")
+    conn_max_age = settings_dict["CONN_MAX_AGE"] or 600
+
+    modes = [("per-request", 0, None), ("persistent", conn_max_age, None)]
+    if pool_options:
+        modes.append(("pooled", 0, pool_options))
+
+    print(f"{connection.vendor} ({settings_dict['NAME']}), {args.requests} requests per mode")
+    results = {}
+    for name, max_age, pool in modes:
+        configure(max_age, pool)
+        simulate_requests(args.warmup)
+        timings = simulate_requests(args.requests)
+        results[name] = statistics.median(timings)
+        print(
+            f"{name:>12}: p50 {results[name]:8.1f} us  p95 {percentile(timings, 0.95):8.1f} us"
+            f"  p99 {percentile(timings, 0.99):8.1f} us"
+        )
+
+    baseline = results["per-request"]
+    for name, p50 in results.items():
+        if name != "per-request":
+            print(f"{name} saves {baseline - p50:.1f} us at p50 ({baseline / p50:.1f}x faster)")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
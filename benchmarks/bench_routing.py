@@ -0,0 +1,87 @@
+"""
+Routing throughput on a synthetic road grid.
+
+    python benchmarks/bench_routing.py --size 150 --queries 500
+
+Builds a size x size grid of two-way streets around Lagos (roughly 100 m
+blocks, with faster arterial roads every tenth row/column) and reports A*
+queries/sec, cached lookups/sec and the time for a dispatch matrix.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+from services.routing import RoadGraph, RoutingService, haversine_m  # noqa: E402
+
+ORIGIN = (6.45, 3.33)
+STEP = 0.0009
+
+
+def build_grid(size):
+    nodes = [(ORIGIN[0] + row * STEP, ORIGIN[1] + col * STEP) for row in range(size) for col in range(size)]
+    edges = []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            for neighbour, arterial in ((node + 1, row % 10 == 0), (node + size, col % 10 == 0)):
+                if (neighbour == node + 1 and col == size - 1) or neighbour >= size * size:
+                    continue
+                length = haversine_m(*nodes[node], *nodes[neighbour])
+                speed = (50 if arterial else 20) / 3.6
+                edges.append((node, neighbour, length, length / speed))
+                edges.append((neighbour, node, length, length / speed))
+    return RoadGraph.from_edges(nodes, edges)
+
+
+def random_point(size, rng):
+    return (
+        ORIGIN[0] + rng.uniform(0, (size - 1) * STEP),
+        ORIGIN[1] + rng.uniform(0, (size - 1) * STEP),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=150)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--matrix", type=int, default=20, help="Origins and destinations in the matrix run.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    started = time.perf_counter()
+    graph = build_grid(args.size)
+    print(f"graph: {len(graph)} nodes, {graph.edge_count} edges, built in {time.perf_counter() - started:.2f}s")
+
+    pairs = [(random_point(args.size, rng), random_point(args.size, rng)) for _ in range(args.queries)]
+
+    service = RoutingService(graph, cache_size=args.queries)
+    started = time.perf_counter()
+    for start, end in pairs:
+        service.route(start, end)
+    elapsed = time.perf_counter() - started
+    print(f"A* (cold):     {args.queries / elapsed:10.1f} queries/sec")
+
+    started = time.perf_counter()
+    for start, end in pairs:
+        service.route(start, end)
+    elapsed = time.perf_counter() - started
+    print(f"LRU (warm):    {args.queries / elapsed:10.1f} queries/sec")
+
+    origins = [random_point(args.size, rng) for _ in range(args.matrix)]
+    destinations = [random_point(args.size, rng) for _ in range(args.matrix)]
+    started = time.perf_counter()
+    service.matrix(origins, destinations)
+    elapsed = time.perf_counter() - started
+    print(f"matrix {args.matrix}x{args.matrix}: {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Micro-benchmarks for the hot helper functions, with JSON baselines.
+
+    python benchmarks/bench_utils.py --save
+    python benchmarks/bench_utils.py --compare --threshold 0.15
+    python benchmarks/bench_utils.py --filter fare --repeat 9
+
+Every case times one realistic call (a page of trips to encrypt or encode,
+a batch of phone numbers to format, ...) the timeit way: the loop count is
+picked so one run takes at least --min-time seconds, the run is repeated
+--repeat times and the fastest run is kept, since slower ones only measure
+interference from the rest of the machine.
+
+--save writes the results to --baseline. --compare reads that file, prints
+the change per case and exits with status 1 when any case is more than
+--threshold slower. Baselines only mean something on the machine that
+recorded them, so they are not committed; record one before a change and
+compare after it.
+
+Django runs against a throwaway test database with an in-memory cache;
+generate_username looks names up there.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "bench_utils.json"
+PAGE_SIZE = 100
+
+
+def trip_page(rng, now):
+    """One page of a trip list response, as the views hand it to the encoder."""
+    page = []
+    for i in range(PAGE_SIZE):
+        requested_at = now - timedelta(minutes=rng.randrange(60 * 24 * 30))
+        page.append({
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "customer": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "driver": {
+                "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                "full_name": f"Driver {i}",
+                "rating": Decimal(f"{rng.uniform(3, 5):.2f}"),
+                "vehicle": {"make": "Toyota", "model": "Corolla", "ride_type": "regular"},
+            },
+            "start_location": "Ikeja",
+            "end_location": "Victoria Island",
+            "distance": round(rng.uniform(1, 30), 2),
+            "status": "completed",
+            "total_fare": Decimal(f"{rng.uniform(3, 80):.2f}"),
+            "fare_breakdown": {"base_fare": 2.5, "per_km_rate": 1.0, "combined_multiplier": 1.2},
+            "requested_at": requested_at,
+            "ended_at": requested_at + timedelta(minutes=rng.randrange(5, 90)),
+        })
+    return page
+
+
+def build_cases(rng):
+    """name -> zero-argument callable. Inputs are built once, outside the timed call."""
+    from django.conf import settings
+    from django.utils import timezone
+
+    from accounts.models import User
+    from business.models import Trip
+    from business.util import PricingConfig, calculate_trip_fare, get_random_pricing_multipliers
+    from services.cache_util import CacheUtil
+    from services.encryption_util import AESCipher
+    from services.util import DecimalEncoder, format_phone_number, generate_username
+
+    now = timezone.now()
+    config = PricingConfig()
+    trips = [Trip(distance=round(rng.uniform(0.5, 40), 2)) for _ in range(PAGE_SIZE)]
+    page = trip_page(rng, now)
+    # What encrypt_nested receives: the response after DecimalEncoder.
+    encoded_page = json.loads(json.dumps({"data": page, "total": 4210, "page": 3}, cls=DecimalEncoder))
+    cipher = AESCipher(settings.APP_ENC_KEY, settings.APP_ENC_VEC)
+    cache_key_args = [
+        ("user_username", f"User{i}.Name@Example.com") for i in range(PAGE_SIZE)
+    ] + [
+        ("trips", str(uuid.UUID(int=rng.getrandbits(128), version=4)), "page", "3", "size", "20") for _ in range(PAGE_SIZE)
+    ]
+    phone_numbers = [
+        rng.choice(["080{:08d}", "+234 803 {:07d}", "0901-{:07d}", "234 70{:08d}", "not-a-number-{}"]).format(
+            rng.randrange(10 ** 7)
+        )
+        for _ in range(PAGE_SIZE)
+    ]
+    # Half of the names are taken, so those calls take the retry path.
+    names = [("Ada", "Lovelace"), ("Tunde", "Bakare"), ("Chidinma", "Okafor"), ("Grace", "Hopper")]
+    for first, last in names[:2]:
+        User.objects.create_user(
+            username=f"{first}{last}".lower(), email=f"{first}.{last}@bench.example".lower(), password="Password@1234"
+        )
+
+    def fares():
+        for trip in trips:
+            calculate_trip_fare(trip, config, "moderate", "high", "peak", commit=False)
+
+    def multipliers():
+        for _ in range(PAGE_SIZE):
+            get_random_pricing_multipliers(config)
+
+    def cache_keys():
+        for args in cache_key_args:
+            CacheUtil.generate_cache_key(*args)
+
+    def phones():
+        for phone in phone_numbers:
+            format_phone_number(phone)
+
+    def usernames():
+        for first, last in names:
+            generate_username(first, last)
+
+    return {
+        f"calculate_trip_fare[{PAGE_SIZE} trips]": fares,
+        f"get_random_pricing_multipliers[{PAGE_SIZE} calls]": multipliers,
+        f"AESCipher.encrypt_nested[page of {PAGE_SIZE} trips]": lambda: cipher.encrypt_nested(encoded_page),
+        f"CacheUtil.generate_cache_key[{len(cache_key_args)} keys]": cache_keys,
+        f"generate_username[{len(names)} names, {len(names) // 2} taken]": usernames,
+        f"DecimalEncoder[page of {PAGE_SIZE} trips]": lambda: json.dumps({"data": page}, cls=DecimalEncoder),
+        f"format_phone_number[{PAGE_SIZE} numbers]": phones,
+    }
+
+
+def time_case(func, repeat, min_time):
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds_per_call": best, "loops": number, "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:60} {result['seconds_per_call'] * 1e6:12.2f} us   (no baseline)")
+            continue
+        change = result["seconds_per_call"] / before["seconds_per_call"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:60} {before['seconds_per_call'] * 1e6:12.2f} us -> "
+            f"{result['seconds_per_call'] * 1e6:12.2f} us  {change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed run.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results to --baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare the results with --baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown that counts as a regression.")
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    baseline = None
+    if args.compare:
+        if not args.baseline.exists():
+            sys.exit(f"No baseline at {args.baseline}; record one with --save first.")
+        baseline = json.loads(args.baseline.read_text())
+
+    setup_test_environment()
+    old_database = connection.creation.create_test_db(verbosity=0)
+    try:
+        cases = build_cases(random.Random(args.seed))
+        results = {}
+        for name, func in cases.items():
+            if args.filter in name:
+                results[name] = time_case(func, args.repeat, args.min_time)
+                if not args.compare:
+                    print(f"{name:60} {results[name]['seconds_per_call'] * 1e6:12.2f} us")
+    finally:
+        connection.creation.destroy_test_db(old_database, verbosity=0)
+        teardown_test_environment()
+
+    regressions = compare(results, baseline, args.threshold) if baseline else []
+
+    if args.save:
+        report = {"python": platform.python_version(), "machine": platform.platform(), "results": results}
+        if args.filter and args.baseline.exists():
+            # A filtered run refreshes only its own cases.
+            report["results"] = {**json.loads(args.baseline.read_text())["results"], **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if regressions:
+        sys.exit(f"{len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline.")
+
+
+if __name__ == "__main__":
+    main()
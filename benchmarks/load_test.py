@@ -0,0 +1,388 @@
+"""
+End-to-end load generator for the HTTP API.
+
+    python benchmarks/load_test.py --scenario new_rider --concurrency 16 --duration 30
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --scenario returning_rider
+
+Virtual users run a scenario in a loop for --duration seconds and every
+request is timed per endpoint. The report (requests, RPS, p50/p95/p99 latency
+in milliseconds and error rate per endpoint, plus totals) is printed as JSON,
+or written to --output, so runs can be compared over time.
+
+By default the WSGI application runs in-process against a throwaway test
+database, with an in-memory cache, the geocoding provider replaced by the
+gazetteer (plus --geocoder-latency-ms), email deliverability (DNS) checks
+skipped and activation OTPs captured instead of emailed. Riders and drivers for the scenarios come from business.seeding.
+
+With --url the requests go to a running server instead. Only the
+returning_rider scenario works there: it logs in as riders created by
+`manage.py seed_load --seed <--seed>` and books trips with their drivers,
+read through the same database settings. The server must run with
+APP_ENC_ENABLED=false so responses are plain JSON, and with ratelimiting off
+(RATELIMIT_ENABLE = False), since login allows five attempts a minute per IP.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Stats:
+    """Latencies (seconds) and error counts per endpoint."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.journeys = {"completed": 0, "failed": 0}
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + (not ok)
+
+    def summarize(self, latencies, errors, elapsed):
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+
+    def report(self, elapsed):
+        endpoints = {
+            endpoint: self.summarize(latencies, self.errors[endpoint], elapsed)
+            for endpoint, latencies in self.latencies.items()
+        }
+        every = [seconds for latencies in self.latencies.values() for seconds in latencies]
+        total = self.summarize(every, sum(self.errors.values()), elapsed) if every else {}
+        return {"journeys": self.journeys, "endpoints": endpoints, "total": total}
+
+
+class StepFailed(Exception):
+    pass
+
+
+class InProcessTransport:
+    """Calls the WSGI application directly, one worker thread per virtual user."""
+
+    def __init__(self, concurrency):
+        from core.wsgi import application
+
+        self.application = application
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def call(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        path, _, query = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "testserver",
+            "REMOTE_ADDR": headers.pop("X-Client-Addr", "127.0.0.1"),
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(payload),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers.items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response["status"] = int(status.split()[0])
+
+        result = self.application(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], content
+
+    async def request(self, method, path, body=None, headers=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.call, method, path, body, headers)
+
+    async def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server with aiohttp. The session is opened on
+    the first request, since aiohttp needs the running event loop for it.
+    """
+
+    def __init__(self, base_url, concurrency):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.session = None
+
+    async def request(self, method, path, body=None, headers=None):
+        if self.session is None:
+            import aiohttp
+
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        headers = {name: value for name, value in (headers or {}).items() if name != "X-Client-Addr"}
+        async with self.session.request(method, self.base_url + path, json=body, headers=headers) as response:
+            return response.status, await response.read()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+
+class VirtualUser:
+    def __init__(self, transport, stats, context, rng):
+        self.transport = transport
+        self.stats = stats
+        self.context = context
+        self.rng = rng
+        self.headers = {}
+
+    async def step(self, endpoint, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, content = await self.transport.request(method, path, body, self.headers)
+        except Exception:
+            status, content = None, b""
+        ok = status is not None and status < 400
+        self.stats.record(endpoint, time.perf_counter() - started, ok)
+        if not ok:
+            raise StepFailed(f"{endpoint}: {status} {content[:200]!r}")
+        return json.loads(content) if content else {}
+
+    async def login(self, username, password):
+        data = await self.step("login", "POST", "/api/auth/login", {
+            "username": username, "password": password,
+            "fcm_token": "load-test", "device_id": "load-test", "device_name": "load-test",
+        })
+        self.headers["Authorization"] = f"Bearer {data['access_token']}"
+
+    async def book_trips(self):
+        start, end = self.rng.sample(self.context["places"], 2)
+        await self.step("calculate-fare", "POST", "/api/business/calculate-fare/", {
+            "distance": round(self.rng.uniform(2, 25), 1),
+            "traffic_level": self.rng.choice(["low", "moderate", "high"]),
+            "demand_level": self.rng.choice(["low", "moderate", "peak"]),
+        })
+        await self.step("create-trip", "POST", "/api/business/trips/create/", {
+            "driver": str(self.rng.choice(self.context["driver_ids"])),
+            "start_location": start,
+            "end_location": end,
+        })
+        await self.step("list-trips", "GET", "/api/business/trips/user/?limit=20")
+
+
+async def new_rider(user):
+    """signup -> verify-otp -> register -> login -> calculate-fare -> create-trip -> list-trips"""
+    suffix = f"{user.rng.getrandbits(48):012x}"
+    username, email, password = f"lt{suffix}", f"lt{suffix}@loadtest.example", "Load@Test1234"
+    await user.step("signup", "POST", "/api/auth/signup", {
+        "email": email, "full_name": f"Load Test {suffix}", "password": password,
+        "device_id": "load-test", "device_name": "load-test",
+    })
+    await user.step("verify-otp", "POST", "/api/auth/signup/verify-otp", {
+        "email": email, "otp": user.context["otps"].pop(email, "000000"),
+    })
+    await user.step("register", "POST", "/api/auth/register/customer", {
+        "email": email, "username": username, "full_name": f"Load Test {suffix}", "password": password,
+        "phone_number": f"+23480{user.rng.randrange(10 ** 8):08d}", "gender": "Female", "dob": "1992-05-17",
+    })
+    await user.login(username, password)
+    await user.book_trips()
+
+
+async def returning_rider(user):
+    """login -> calculate-fare -> create-trip -> list-trips, as a seeded rider"""
+    await user.login(user.rng.choice(user.context["usernames"]), user.context["password"])
+    await user.book_trips()
+
+
+SCENARIOS = {"new_rider": new_rider, "returning_rider": returning_rider}
+
+
+async def run_virtual_user(transport, stats, context, scenario, seed, deadline):
+    user = VirtualUser(transport, stats, context, random.Random(seed))
+    while time.monotonic() < deadline:
+        # The auth endpoints are rate limited per IP; in-process every
+        # journey comes from its own address, like separate phones.
+        user.headers = {"X-Client-Addr": f"10.{user.rng.randrange(256)}.{user.rng.randrange(256)}.{user.rng.randrange(1, 255)}"}
+        try:
+            await scenario(user)
+            stats.journeys["completed"] += 1
+        except StepFailed as e:
+            stats.journeys["failed"] += 1
+            if context["verbose"]:
+                print(e, file=sys.stderr)
+
+
+async def run(transport, context, scenario, concurrency, duration, seed):
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + duration
+    try:
+        await asyncio.gather(*(
+            run_virtual_user(transport, stats, context, scenario, f"{seed}:{n}", deadline)
+            for n in range(concurrency)
+        ))
+    finally:
+        await transport.close()
+    return stats.report(time.monotonic() - started)
+
+
+def configure_in_process(args):
+    """Settings for an isolated in-process run; must happen before django.setup()."""
+    os.environ["APP_ENC_ENABLED"] = "false"
+    from django.conf import settings
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    database = settings.DATABASES["default"]
+    if database["ENGINE"].endswith("sqlite3"):
+        # A file, not the shared in-memory test database, so worker threads
+        # wait for the write lock instead of failing on it.
+        database.setdefault("TEST", {})["NAME"] = os.path.join(tempfile.mkdtemp(), "load_test.sqlite3")
+    if args.fast_password_hasher:
+        settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def stub_external_services(args, otps):
+    from email_validator import validate_email
+
+    from accounts.serializers import auth as auth_serializers
+    from accounts.services.auth import AuthService
+    from services.gazetteer import lookup_place
+    from services.location import LocationService
+
+    latency = args.geocoder_latency_ms / 1000
+
+    def fetch_coordinates(self, location_name, timeout=None):
+        if latency:
+            time.sleep(latency)
+        return lookup_place(location_name)
+
+    def send_activation_otp(cls, email, otp, full_name=None):
+        otps[email] = otp
+        return True
+
+    def validate_email_offline(email, check_deliverability=True, **kwargs):
+        # Deliverability is an MX lookup per signup.
+        return validate_email(email, check_deliverability=False, **kwargs)
+
+    LocationService.fetch_coordinates = fetch_coordinates
+    auth_serializers.validate_email = validate_email_offline
+    AuthService.send_activation_otp = classmethod(send_activation_otp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="new_rider")
+    parser.add_argument("--url", help="Base URL of a running server; in-process when omitted.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Virtual users.")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to run.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--riders", type=int, default=200, help="Seeded riders (in-process).")
+    parser.add_argument("--drivers", type=int, default=50, help="Seeded drivers (in-process).")
+    parser.add_argument("--geocoder-latency-ms", type=float, default=0, help="Delay added to each stub geocode.")
+    parser.add_argument(
+        "--fast-password-hasher",
+        action="store_true",
+        help="Hash passwords with MD5 so PBKDF2 does not dominate signup and login timings.",
+    )
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--verbose", action="store_true", help="Print failed steps to stderr.")
+    args = parser.parse_args()
+
+    if args.url and args.scenario != "returning_rider":
+        parser.error("Only the returning_rider scenario can run against --url.")
+    if not args.url:
+        configure_in_process(args)
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from django.utils import timezone
+
+    from accounts.models import User, UserTypes
+    from business.models import Driver
+    from business.seeding import SEED_PASSWORD, seed_population
+    from services.gazetteer import LAGOS_GAZETTEER
+
+    context = {"places": list(LAGOS_GAZETTEER), "otps": {}, "password": SEED_PASSWORD, "verbose": args.verbose}
+    old_database = None
+    if args.url:
+        transport = HttpTransport(args.url, args.concurrency)
+        riders = User.objects.filter(username__startswith=f"load{args.seed}_", user_type=UserTypes.customer)
+        drivers = Driver.objects.filter(user__username__startswith=f"load{args.seed}_")
+    else:
+        setup_test_environment()
+        old_database = connection.creation.create_test_db(verbosity=0)
+        stub_external_services(args, context["otps"])
+        total = args.riders + args.drivers
+        seed_population(args.seed, total, args.drivers / total, 30, timezone.now(), 1000)
+        transport = InProcessTransport(args.concurrency)
+        riders = User.objects.filter(user_type=UserTypes.customer)
+        drivers = Driver.objects.all()
+
+    context["usernames"] = list(riders.values_list("username", flat=True)[:5000])
+    context["driver_ids"] = list(drivers.values_list("id", flat=True)[:5000])
+    if not context["usernames"] or not context["driver_ids"]:
+        sys.exit(f"No seeded riders or drivers; run `manage.py seed_load --seed {args.seed}` first.")
+
+    try:
+        report = asyncio.run(run(
+            transport, context, SCENARIOS[args.scenario], args.concurrency, args.duration, args.seed
+        ))
+    finally:
+        if old_database is not None:
+            connection.creation.destroy_test_db(old_database, verbosity=0)
+            teardown_test_environment()
+
+    report = {
+        "scenario": args.scenario,
+        "target": args.url or "in-process",
+        "database": connection.vendor,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        **report,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BusinessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'business'
+
+    def ready(self):
+        # Registers the signal handlers that refresh the zone index.
+        from business import zones  # noqa: F401
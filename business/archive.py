@@ -0,0 +1,117 @@
+import base64
+import heapq
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from business.models import ArchivedTrip, ArchivedTripReview, Trip, TripReview
+
+ARCHIVABLE_STATUSES = (Trip.STATUS_COMPLETED, Trip.STATUS_CANCELED)
+
+ARCHIVED_TRIP_FIELDS = [
+    field.attname for field in ArchivedTrip._meta.concrete_fields if field.name != "archived_at"
+]
+ARCHIVED_REVIEW_FIELDS = [field.attname for field in ArchivedTripReview._meta.concrete_fields]
+
+
+def archive_cutoff(now=None):
+    days = getattr(settings, "TRIP_ARCHIVE_AFTER_DAYS", 90)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Moves up to batch_size finished trips that ended before the cutoff, with
+    their reviews, in one transaction. Returns the number of trips moved.
+    """
+    with transaction.atomic():
+        trips = list(
+            Trip.objects.filter(status__in=ARCHIVABLE_STATUSES, ended_at__lt=cutoff)
+            .order_by("ended_at")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not trips:
+            return 0
+
+        trip_ids = [trip.id for trip in trips]
+        reviews = list(TripReview.objects.filter(trip_id__in=trip_ids))
+
+        ArchivedTrip.objects.bulk_create(
+            ArchivedTrip(**{name: getattr(trip, name) for name in ARCHIVED_TRIP_FIELDS}) for trip in trips
+        )
+        ArchivedTripReview.objects.bulk_create(
+            ArchivedTripReview(**{name: getattr(review, name) for name in ARCHIVED_REVIEW_FIELDS})
+            for review in reviews
+        )
+
+        TripReview.objects.filter(trip_id__in=trip_ids).delete()
+        Trip.objects.filter(id__in=trip_ids).delete()
+        return len(trips)
+
+
+def archive_trips(batch_size=None, max_batches=None, now=None):
+    """
+    Moves finished trips older than TRIP_ARCHIVE_AFTER_DAYS into the archive
+    tables in bounded batches, so each transaction holds its locks briefly
+    and the hot table never sees one huge DELETE.
+    """
+    batch_size = batch_size or getattr(settings, "TRIP_ARCHIVE_BATCH_SIZE", 500)
+    cutoff = archive_cutoff(now)
+
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(cutoff, batch_size)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+    return moved
+
+
+def encode_cursor(trip):
+    value = f"{trip.requested_at.isoformat()}|{trip.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(requested_at, id) from an encode_cursor value; raises ValueError when malformed."""
+    try:
+        requested_at, trip_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(requested_at), trip_id
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def trip_history(limit=100, cursor=None, **filters):
+    """
+    One page of trips, newest first, for the owner given by `filters`
+    (customer=... or driver=...), and the cursor of the next page or None.
+
+    Trips are paged on (requested_at, id) across Trip and ArchivedTrip.
+    Everything in the archive was requested before the archive cutoff, so
+    while the page stays inside that hot window only Trip is queried.
+    """
+    keyset = Q()
+    if cursor:
+        requested_at, trip_id = decode_cursor(cursor)
+        keyset = Q(requested_at__lt=requested_at) | Q(requested_at=requested_at, id__lt=trip_id)
+
+    ordering = ("-requested_at", "-id")
+    page = list(
+        Trip.objects.filter(keyset, **filters).order_by(*ordering).prefetch_related("reviews")[:limit + 1]
+    )
+
+    if len(page) <= limit or page[limit].requested_at < archive_cutoff():
+        archived = ArchivedTrip.objects.filter(keyset, **filters).order_by(*ordering).prefetch_related("reviews")
+        page = list(heapq.merge(
+            page,
+            archived[:limit + 1],
+            key=lambda trip: (trip.requested_at, str(trip.id)),
+            reverse=True,
+        ))[:limit + 1]
+
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
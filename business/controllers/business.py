@@ -1,26 +1,102 @@
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.http import StreamingHttpResponse
 
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 
-from accounts.models import User
-from business.models import Vehicle, Driver, Trip, TripReview
+from accounts.models import User, UserTypes
+from business.archive import trip_history
+from business.eta import EtaService
+from business.export import EXPORT_FORMATS, stream_trips, trip_export_queryset
+from business.models import Vehicle, Driver, Trip, CustomerDailyStats, DriverDailyStats
+from business.service import TripReviewService, TripService
+from business.stats import summarize_daily_stats
 from business.serializers import (
     CalculateFareSerializer,
     CreateTripSerializer,
+    PickupEtaSerializer,
+    SearchPlacesSerializer,
+    TripExportQuerySerializer,
+    TripHistoryQuerySerializer,
     TripReviewSerializer,
     TripSerializer,
+    TripStatsQuerySerializer,
     VehicleSerializer,
+    serialize_trip_history,
 )
 from business.util import PricingConfig, calculate_trip_fare, get_random_pricing_multipliers
-from services.location import LocationService
-from services.util import CustomApiRequestProcessorBase
+from core.db_router import ReadReplicaMixin
+from services.location import AsyncLocationService, LocationService
+from services.util import AsyncCustomApiRequestProcessorBase, CustomApiRequestProcessorBase
 
 
 pricing_config = PricingConfig()
 
 
+def price_trip(trip, commit=True):
+    # In a production system, the current conditions (e.g., traffic, demand)
+    # would be determined by querying real-time logs from the backend.
+    # Since that data isn't available here, we simulate these conditions
+    # prior to calculating the fare.
+
+    random_multipliers = get_random_pricing_multipliers(pricing_config)
+
+    traffic = random_multipliers.get("traffic_multiplier", {})
+    surge = random_multipliers.get("demand_surge_pricing", {})
+    time_of_day = random_multipliers.get("time_of_day_factor", {})
+
+    # Calculate fare safely
+    return calculate_trip_fare(
+        trip,
+        pricing_config,
+        traffic_key=traffic.get("state", "default"),
+        surge_key=surge.get("state", "default"),
+        time_of_day_key=time_of_day.get("state", "default"),
+        commit=commit
+    )
+
+
+def quote_fare(validated_data):
+    # Extract validated data.
+    distance = validated_data["distance"]
+    traffic_level = validated_data.get("traffic_level", "low")
+    demand_level = validated_data.get("demand_level", "low")
+
+    # Pricing parameters.
+    base_fare = 2.5
+    per_km_rate = 1.0
+    distance_fare = distance * per_km_rate
+
+    # Define multipliers.
+    traffic_config = {
+        "low": 1.0,
+        "moderate": 1.2,
+        "high": 1.5,
+    }
+    demand_config = {
+        "low": 1.0,
+        "moderate": 1.2,
+        "peak": 1.8,
+        "extreme": 2.5,
+    }
+    traffic_multiplier = traffic_config.get(traffic_level, 1.0)
+    demand_multiplier = demand_config.get(demand_level, 1.0)
+
+    # Calculate total fare.
+    total_fare = (base_fare + distance_fare) * traffic_multiplier * demand_multiplier
+    total_fare = round(total_fare, 2)
+
+    return {
+        "base_fare": base_fare,
+        "distance_fare": distance_fare,
+        "traffic_multiplier": traffic_multiplier,
+        "demand_multiplier": demand_multiplier,
+        "total_fare": total_fare
+    }
+
+
 class CreateTripView(APIView, CustomApiRequestProcessorBase):
     serializer_class = CreateTripSerializer
 
@@ -41,33 +117,19 @@ class CreateTripView(APIView, CustomApiRequestProcessorBase):
             start_loc = validated_data['start_location']
             end_loc = validated_data['end_location']
             
-            distance = LocationService().calculate_distance(start_loc, end_loc)
+            route, error = LocationService().resolve_route(start_loc, end_loc)
+            if error:
+                return None, error
+
+            distance, start_coords, end_coords = route
             validated_data['distance'] = distance
             validated_data['customer'] = customer
-            trip = Trip.objects.create(**validated_data)
-
-            # In a production system, the current conditions (e.g., traffic, demand)
-            # would be determined by querying real-time logs from the backend.
-            # Since that data isn't available here, we simulate these conditions
-            # prior to calculating the fare.
-
-            random_multipliers = get_random_pricing_multipliers(pricing_config)
-
-            traffic = random_multipliers.get("traffic_multiplier", {})
-            surge = random_multipliers.get("demand_surge_pricing", {})
-            time_of_day = random_multipliers.get("time_of_day_factor", {})
-            weather = random_multipliers.get("weather_condition_factor", {})
-            ride = random_multipliers.get("ride_type_factor", {})
-            event = random_multipliers.get("special_event_pricing", {})
-
-            # Calculate fare safely
-            total, breakdown = calculate_trip_fare(
-                trip,
-                pricing_config,
-                traffic_key=traffic.get("state", "default"),    
-                surge_key=surge.get("state", "default"),     
-                time_of_day_key=time_of_day.get("state", "default")
-            )
+            validated_data['status'] = Trip.STATUS_REQUESTED
+            trip = Trip(**validated_data)
+            trip.set_coordinates(start_coords, end_coords)
+            trip.save()
+
+            total, breakdown = price_trip(trip)
 
             return {
                 "total": total,  # Fixed typo from 'totat' to 'total'
@@ -77,6 +139,63 @@ class CreateTripView(APIView, CustomApiRequestProcessorBase):
         return self.process_request(request, create_trip)
 
 
+class AsyncCreateTripView(AsyncCustomApiRequestProcessorBase):
+    """
+    ASGI variant of CreateTripView. Both locations are geocoded concurrently and
+    the priced trip is written with a single insert.
+    """
+    serializer_class = CreateTripSerializer
+
+    async def post(self, request, *args, **kwargs):
+        async def create_trip(validated_data, **extra_args):
+            customer = self.auth_user
+            if not customer:
+                return None, "User not found"
+
+            if not validated_data.get('driver'):
+                return None, "Driver not found"
+
+            route, error = await AsyncLocationService().resolve_route(
+                validated_data['start_location'], validated_data['end_location']
+            )
+            if error:
+                return None, error
+
+            distance, start_coords, end_coords = route
+            validated_data['distance'] = distance
+            validated_data['customer'] = customer
+            validated_data['status'] = Trip.STATUS_REQUESTED
+
+            trip = Trip(**validated_data)
+            trip.set_coordinates(start_coords, end_coords)
+            total, breakdown = price_trip(trip, commit=False)
+            await trip.asave()
+
+            return {
+                "total": total,
+                "breakdown": breakdown
+            }, None
+
+        return await self.process_request(request, create_trip)
+
+
+class TripTransitionAPIView(APIView, CustomApiRequestProcessorBase):
+    """
+    POST to move a trip through its lifecycle. The action (accept, start,
+    complete or cancel) is fixed per route; conflicting taps get a 409.
+    """
+    transition = None
+
+    def post(self, request, trip_id, *args, **kwargs):
+        def apply_transition():
+            trip, error = TripService(request).transition(trip_id, self.transition)
+            if error:
+                return None, error
+            return TripSerializer(trip).data, None
+
+        return self.process_request(request, apply_transition)
+
+
 class CreateVehicleAPIView(APIView, CustomApiRequestProcessorBase):
     serializer_class = VehicleSerializer
     def post(self, request, *args, **kwargs):
@@ -92,88 +211,217 @@ class CreateTripReviewAPIView(APIView, CustomApiRequestProcessorBase):
 
     def post(self, request, *args, **kwargs):
         def create_trip_review(validated_data):
-            trip_review_instance = TripReview.objects.create(**validated_data)
+            trip_review_instance, error = TripReviewService(request).create(validated_data)
+            if error:
+                return None, error
             serialized_trip_review = TripReviewSerializer(trip_review_instance).data
             return serialized_trip_review, None
 
         return self.process_request(request, create_trip_review)
 
 
-class ListDriverTripsAPIView(APIView, CustomApiRequestProcessorBase):
+class ListDriverTripsAPIView(ReadReplicaMixin, APIView, CustomApiRequestProcessorBase):
     """
-    GET trips for a specific driver.
-    Expects a query parameter `driver_id`. Example: /api/driver-trips/?driver_id=<uuid>
+    GET trips for the authenticated driver, newest first, including archived
+    trips. Optional query parameters `limit` and `cursor` (the `next_cursor`
+    of the previous page).
     """
     def get(self, request, *args, **kwargs):
         def get_trips():
+            serializer = TripHistoryQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return None, serializer.errors
+
             user = request.user
             try:
                 driver = Driver.objects.get(user=user)
             except ObjectDoesNotExist:
                 return None, "Driver does not exist"
-        
-            trips = Trip.objects.filter(driver__id=driver.id)
-            serializer = TripSerializer(trips, many=True)
-            return serializer.data, None
+
+            try:
+                trips, next_cursor = trip_history(**serializer.validated_data, driver=driver)
+            except ValueError as e:
+                return None, str(e)
+            return {"data": serialize_trip_history(trips), "next_cursor": next_cursor}, None
         return self.process_request(request, get_trips)
 
 
-class ListUserTripsAPIView(APIView, CustomApiRequestProcessorBase):
+class ListUserTripsAPIView(ReadReplicaMixin, APIView, CustomApiRequestProcessorBase):
     """
-    GET trips for the authenticated user (as customer).
-    Ensure that the user is authenticated.
+    GET trips for the authenticated user (as customer), newest first,
+    including archived trips. Optional query parameters `limit` and `cursor`.
     """
     def get(self, request, *args, **kwargs):
         def get_trips():
-            user = request.user
-            trips = Trip.objects.filter(customer=user)
-            serializer = TripSerializer(trips, many=True)
-            return serializer.data, None
+            serializer = TripHistoryQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return None, serializer.errors
+
+            try:
+                trips, next_cursor = trip_history(**serializer.validated_data, customer=request.user)
+            except ValueError as e:
+                return None, str(e)
+            return {"data": serialize_trip_history(trips), "next_cursor": next_cursor}, None
         return self.process_request(request, get_trips)
 
 
+class AsyncListDriverTripsAPIView(AsyncCustomApiRequestProcessorBase):
+    """
+    ASGI variant of ListDriverTripsAPIView.
+    """
+    serializer_class = TripHistoryQuerySerializer
+
+    async def get(self, request, *args, **kwargs):
+        async def get_trips(validated_data):
+            try:
+                driver = await Driver.objects.aget(user=self.auth_user)
+            except ObjectDoesNotExist:
+                return None, "Driver does not exist"
+
+            try:
+                trips, next_cursor = await sync_to_async(trip_history)(**validated_data, driver=driver)
+            except ValueError as e:
+                return None, str(e)
+            return {"data": serialize_trip_history(trips), "next_cursor": next_cursor}, None
+
+        return await self.process_request(request, get_trips)
+
+
+class AsyncListUserTripsAPIView(AsyncCustomApiRequestProcessorBase):
+    """
+    ASGI variant of ListUserTripsAPIView.
+    """
+    serializer_class = TripHistoryQuerySerializer
+
+    async def get(self, request, *args, **kwargs):
+        async def get_trips(validated_data):
+            try:
+                trips, next_cursor = await sync_to_async(trip_history)(**validated_data, customer=self.auth_user)
+            except ValueError as e:
+                return None, str(e)
+            return {"data": serialize_trip_history(trips), "next_cursor": next_cursor}, None
+
+        return await self.process_request(request, get_trips)
+
+
 class CalculateFareView(APIView, CustomApiRequestProcessorBase):
     permission_classes = [AllowAny]
     serializer_class = CalculateFareSerializer
 
     def post(self, request, *args, **kwargs):
         def calculate(validated_data, **extra_args):
-            # Extract validated data.
-            distance = validated_data["distance"]
-            traffic_level = validated_data.get("traffic_level", "low")
-            demand_level = validated_data.get("demand_level", "low")
-            
-            # Pricing parameters.
-            base_fare = 2.5
-            per_km_rate = 1.0
-            distance_fare = distance * per_km_rate
-
-            # Define multipliers.
-            traffic_config = {
-                "low": 1.0,
-                "moderate": 1.2,
-                "high": 1.5,
-            }
-            demand_config = {
-                "low": 1.0,
-                "moderate": 1.2,
-                "peak": 1.8,
-                "extreme": 2.5,
-            }
-            traffic_multiplier = traffic_config.get(traffic_level, 1.0)
-            demand_multiplier = demand_config.get(demand_level, 1.0)
-            
-            # Calculate total fare.
-            total_fare = (base_fare + distance_fare) * traffic_multiplier * demand_multiplier
-            total_fare = round(total_fare, 2)
-
-            data = {
-                "base_fare": base_fare,
-                "distance_fare": distance_fare,
-                "traffic_multiplier": traffic_multiplier,
-                "demand_multiplier": demand_multiplier,
-                "total_fare": total_fare
-            }
-            return data, None
-
-        return self.process_request(request, calculate)
\ No newline at end of file
+            return quote_fare(validated_data), None
+
+        return self.process_request(request, calculate)
+
+
+class AsyncCalculateFareView(AsyncCustomApiRequestProcessorBase):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    serializer_class = CalculateFareSerializer
+
+    async def post(self, request, *args, **kwargs):
+        async def calculate(validated_data, **extra_args):
+            return quote_fare(validated_data), None
+
+        return await self.process_request(request, calculate)
+
+
+class SearchPlacesAPIView(APIView, CustomApiRequestProcessorBase):
+    """
+    GET pickup/drop-off suggestions for a partial place name.
+    Expects query parameters `q` and optionally `limit`. Example: /api/business/places/search/?q=yab
+    """
+    def get(self, request, *args, **kwargs):
+        def search():
+            serializer = SearchPlacesSerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return None, serializer.errors
+
+            places = LocationService().search_places(
+                serializer.validated_data["q"], limit=serializer.validated_data["limit"]
+            )
+            return places or [], None
+
+        return self.process_request(request, search)
+
+
+class PickupEtaAPIView(APIView, CustomApiRequestProcessorBase):
+    """
+    POST candidate driver positions and a pickup point; returns each driver's
+    estimated minutes to the pickup, fastest first.
+    """
+    serializer_class = PickupEtaSerializer
+
+    def post(self, request, *args, **kwargs):
+        def estimate(validated_data, **extra_args):
+            drivers = validated_data["drivers"]
+            etas = EtaService().pickup_etas(
+                (validated_data["pickup_latitude"], validated_data["pickup_longitude"]),
+                [(driver["latitude"], driver["longitude"]) for driver in drivers],
+            )
+            results = [
+                {"driver": driver["driver"], "eta_minutes": round(eta, 1)}
+                for driver, eta in zip(drivers, etas)
+            ]
+            return sorted(results, key=lambda result: result["eta_minutes"]), None
+
+        return self.process_request(request, estimate)
+
+
+class TripStatsAPIView(ReadReplicaMixin, APIView, CustomApiRequestProcessorBase):
+    """
+    GET the authenticated driver's or customer's trip stats, read from the
+    daily rollups. Optional query parameters `start_date` and `end_date`
+    (YYYY-MM-DD) default to the last year.
+    """
+    role = None
+
+    def get(self, request, *args, **kwargs):
+        def get_stats():
+            serializer = TripStatsQuerySerializer(data=request.query_params)
+            if not serializer.is_valid():
+                return None, serializer.errors
+
+            if self.role == "driver":
+                driver = Driver.objects.filter(user=request.user).first()
+                if not driver:
+                    return None, "Driver does not exist"
+                queryset = DriverDailyStats.objects.filter(driver=driver)
+            else:
+                queryset = CustomerDailyStats.objects.filter(customer=request.user)
+
+            stats = summarize_daily_stats(
+                queryset, serializer.validated_data["start_date"], serializer.validated_data["end_date"]
+            )
+            return stats, None
+
+        return self.process_request(request, get_stats)
+
+
+class ExportTripsAPIView(APIView, CustomApiRequestProcessorBase):
+    """
+    GET a streamed trip-history export. Admins get every trip, drivers the
+    trips they drove and everyone else the trips they took. Query parameters:
+    `export_format` (csv or ndjson), `start_date` and `end_date` on requested_at.
+    """
+    def get(self, request, *args, **kwargs):
+        serializer = TripExportQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return self.response_with_error(serializer.errors)
+
+        filters = {}
+        if request.user.user_type != UserTypes.admin:
+            driver = Driver.objects.filter(user=request.user).first()
+            filters = {"driver": driver} if driver else {"customer": request.user}
+
+        export_format = serializer.validated_data["export_format"]
+        queryset = trip_export_queryset(
+            serializer.validated_data.get("start_date"), serializer.validated_data.get("end_date"), **filters
+        )
+        response = StreamingHttpResponse(
+            stream_trips(queryset, export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="trips.{export_format}"'
+        return response
+
@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from business.models import Trip, ZoneSpeedProfile
+from services import geohash
+from services.log import AppLogger
+from services.routing import METRES_PER_DEGREE, get_routing_service
+
+HOURS_PER_DAY = 24
+SPEED_TABLE_VERSION_KEY = "eta:speed-table-version"
+
+# Trips outside this range are GPS glitches or trips left open by mistake.
+MIN_PLAUSIBLE_SPEED_KMH = 2
+MAX_PLAUSIBLE_SPEED_KMH = 120
+
+
+def build_speed_profiles(precision=None, min_samples=None):
+    """
+    Aggregates completed trips into ZoneSpeedProfile rows (not saved). The speed
+    of a bucket is its total distance over its total driving time, so long
+    trips weigh more than short ones.
+    """
+    precision = precision or getattr(settings, "ETA_ZONE_PRECISION", 5)
+    min_samples = min_samples or getattr(settings, "ETA_MIN_SAMPLES", 5)
+
+    trips = Trip.objects.filter(
+        status=Trip.STATUS_COMPLETED,
+        started_at__isnull=False,
+        ended_at__isnull=False,
+        start_latitude__isnull=False,
+        start_longitude__isnull=False,
+    ).values_list("start_latitude", "start_longitude", "started_at", "ended_at", "distance")
+
+    totals = {}
+    for latitude, longitude, started_at, ended_at, distance in trips.iterator(chunk_size=2000):
+        hours = (ended_at - started_at).total_seconds() / 3600
+        if hours <= 0 or not MIN_PLAUSIBLE_SPEED_KMH <= distance / hours <= MAX_PLAUSIBLE_SPEED_KMH:
+            continue
+
+        zone = geohash.encode(latitude, longitude, precision)
+        hour = timezone.localtime(started_at).hour
+        for key in ((zone, hour), ("", hour)):
+            bucket = totals.setdefault(key, [0.0, 0.0, 0])
+            bucket[0] += distance
+            bucket[1] += hours
+            bucket[2] += 1
+
+    return [
+        ZoneSpeedProfile(zone=zone, hour=hour, speed_kmh=km / hours, samples=samples)
+        for (zone, hour), (km, hours, samples) in totals.items()
+        if samples >= min_samples
+    ]
+
+
+def refresh_speed_profiles():
+    """Rebuilds the speed profile table and tells every process to reload it."""
+    profiles = build_speed_profiles()
+    with transaction.atomic():
+        ZoneSpeedProfile.objects.all().delete()
+        ZoneSpeedProfile.objects.bulk_create(profiles, batch_size=500)
+
+    try:
+        cache.set(SPEED_TABLE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    except Exception as e:
+        AppLogger.report(error=e)
+
+    reset_speed_table()
+    return len(profiles)
+
+
+class SpeedTable:
+    """
+    Precomputed speed lookup. Every known zone maps to a list of 24 hourly
+    speeds with gaps already filled from the city-wide hour, then from the
+    default speed, so a lookup is one dict access and one list index.
+    """
+
+    def __init__(self, profiles, default_speed_kmh, precision):
+        self.precision = precision
+        self.city = [default_speed_kmh] * HOURS_PER_DAY
+        for profile in profiles:
+            if not profile.zone:
+                self.city[profile.hour] = profile.speed_kmh
+
+        self.zones = {}
+        for profile in profiles:
+            if profile.zone:
+                self.zones.setdefault(profile.zone, list(self.city))[profile.hour] = profile.speed_kmh
+
+    @classmethod
+    def load(cls):
+        return cls(
+            list(ZoneSpeedProfile.objects.all()),
+            default_speed_kmh=getattr(settings, "ETA_DEFAULT_SPEED_KMH", 20),
+            precision=getattr(settings, "ETA_ZONE_PRECISION", 5),
+        )
+
+    def speed(self, latitude, longitude, hour):
+        zone = geohash.encode(latitude, longitude, self.precision)
+        return self.zones.get(zone, self.city)[hour]
+
+
+_table = None
+_table_version = None
+_table_checked_at = 0
+_table_lock = threading.Lock()
+
+
+def get_speed_table() -> SpeedTable:
+    """
+    Process-wide SpeedTable. The shared version key is checked at most every
+    ETA_TABLE_CHECK_SECONDS and the table is reloaded from the database when
+    the periodic refresh has bumped it.
+    """
+    global _table, _table_version, _table_checked_at
+    now = time.monotonic()
+    if _table is not None and now - _table_checked_at < getattr(settings, "ETA_TABLE_CHECK_SECONDS", 60):
+        return _table
+
+    with _table_lock:
+        if _table is not None and now - _table_checked_at < getattr(settings, "ETA_TABLE_CHECK_SECONDS", 60):
+            return _table
+
+        try:
+            version = cache.get(SPEED_TABLE_VERSION_KEY)
+        except Exception as e:
+            AppLogger.report(error=e)
+            version = _table_version
+
+        if _table is None or version != _table_version:
+            _table = SpeedTable.load()
+            _table_version = version
+        _table_checked_at = now
+    return _table
+
+
+def reset_speed_table():
+    global _table, _table_checked_at
+    with _table_lock:
+        _table = None
+        _table_checked_at = 0
+
+
+class EtaService:
+    """
+    Estimates driving time as distance over the speed profile of the destination
+    zone at the current hour. ``eta_minutes`` uses the road router for the
+    distance; ``pickup_etas`` ranks many candidate drivers at once with the
+    straight-line distance times ETA_DETOUR_FACTOR, so it stays cheap enough
+    for dispatch.
+    """
+
+    def __init__(self, table=None, routing=None):
+        self.table = table or get_speed_table()
+        self.routing = routing or get_routing_service()
+        self.detour_factor = getattr(settings, "ETA_DETOUR_FACTOR", 1.3)
+
+    def eta_minutes(self, origin, destination, at=None):
+        route = self.routing.route(origin, destination)
+        distance_km = route.distance_km if route.on_road else route.distance_km * self.detour_factor
+        speed = self.table.speed(destination[0], destination[1], self._hour(at))
+        return distance_km / speed * 60
+
+    def pickup_etas(self, pickup, origins, at=None):
+        """
+        Minutes from each (latitude, longitude) in ``origins`` to ``pickup``,
+        in the same order.
+        """
+        pickup_lat, pickup_lon = pickup
+        speed = self.table.speed(pickup_lat, pickup_lon, self._hour(at))
+        minutes_per_degree = METRES_PER_DEGREE / 1000 * self.detour_factor / speed * 60
+        lon_scale = math.cos(math.radians(pickup_lat))
+        hypot = math.hypot
+
+        return [
+            minutes_per_degree * hypot(latitude - pickup_lat, (longitude - pickup_lon) * lon_scale)
+            for latitude, longitude in origins
+        ]
+
+    @staticmethod
+    def _hour(at):
+        return timezone.localtime(at or timezone.now()).hour
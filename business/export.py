@@ -0,0 +1,99 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from business.models import ArchivedTrip, Trip
+
+EXPORT_FIELDS = (
+    "id",
+    "requested_at",
+    "started_at",
+    "ended_at",
+    "status",
+    "customer_id",
+    "driver_id",
+    "start_location",
+    "end_location",
+    "distance",
+    "total_fare",
+)
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Rows are joined into chunks of about this many bytes before being handed
+# to the server, rather than one write per row.
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def trip_export_queryset(start_date=None, end_date=None, **filters):
+    """
+    Live and archived trips requested between two local dates, both
+    inclusive, as one UNION ALL of EXPORT_FIELDS tuples. The bounds are
+    turned into a half-open datetime range so an index on requested_at applies.
+    """
+    if start_date:
+        filters["requested_at__gte"] = day_start(start_date)
+    if end_date:
+        filters["requested_at__lt"] = day_start(end_date + timedelta(days=1))
+    live, archived = (
+        model.objects.filter(**filters).values_list(*EXPORT_FIELDS) for model in (Trip, ArchivedTrip)
+    )
+    return live.union(archived, all=True).order_by("requested_at", "id")
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Plain tuples in EXPORT_FIELDS order. iterator() stops the queryset from
+    caching rows (and uses a server-side cursor where the database has one),
+    so memory stays flat however many trips match.
+    """
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """File-like object for csv.writer that hands each row back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        )
+
+
+def iter_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), default=encoder.default) + "\n"
+
+
+def buffered(lines, size=STREAM_CHUNK_BYTES):
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def stream_trips(queryset, export_format="csv", chunk_size=2000):
+    """Generator of text chunks for the trips in `export_format` (csv or ndjson)."""
+    rows = export_rows(queryset, chunk_size=chunk_size)
+    lines = iter_ndjson(rows) if export_format == "ndjson" else iter_csv(rows)
+    return buffered(lines)
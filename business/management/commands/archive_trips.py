@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from business.archive import archive_trips
+
+
+class Command(BaseCommand):
+    help = "Move finished trips older than TRIP_ARCHIVE_AFTER_DAYS into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Trips per transaction.")
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches; the rest is left for the next run.",
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_trips(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} trips."))
@@ -0,0 +1,119 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from accounts.models import User, parse_coordinates
+from business.models import Trip
+from services.location import LocationService
+
+
+class Command(BaseCommand):
+    help = "Fill the latitude/longitude columns of existing trips and users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            help="Times to retry a name skipped while the geocoder circuit was open.",
+        )
+        parser.add_argument(
+            "--skip-users",
+            action="store_true",
+            help="Only backfill trips.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        service = LocationService()
+        self.retries = options["retries"]
+
+        updated, unresolved = self.backfill_trips(service, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} trips, {unresolved} trip locations could not be resolved."
+        ))
+
+        if not options["skip_users"]:
+            updated = self.backfill_users(service, batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Updated {updated} users."))
+
+    def backfill_trips(self, service, batch_size):
+        """
+        Walks the trips missing coordinates in primary-key order. Each batch
+        geocodes its distinct location names once, at the provider's pace (see
+        LocationService.get_coordinates_paced), then writes the batch with a
+        single bulk_update.
+        """
+        queryset = Trip.objects.filter(
+            Q(start_latitude__isnull=True, start_location__isnull=False)
+            | Q(end_latitude__isnull=True, end_location__isnull=False)
+        ).order_by("id")
+
+        updated = unresolved = 0
+        last_id = None
+        while True:
+            batch_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            names = {trip.start_location for trip in batch} | {trip.end_location for trip in batch}
+            coordinates = service.get_coordinates_paced(names, retries=self.retries)
+
+            changed = []
+            for trip in batch:
+                start = coordinates.get(trip.start_location)
+                end = coordinates.get(trip.end_location)
+                unresolved += int(bool(trip.start_location) and not start)
+                unresolved += int(bool(trip.end_location) and not end)
+                if start or end:
+                    trip.set_coordinates(start, end)
+                    changed.append(trip)
+
+            Trip.objects.bulk_update(
+                changed,
+                ["start_latitude", "start_longitude", "end_latitude", "end_longitude"],
+                batch_size=batch_size,
+            )
+            updated += len(changed)
+
+        return updated, unresolved
+
+    def backfill_users(self, service, batch_size):
+        """
+        Copies address_coord into the typed columns, geocoding the address text
+        for users that only have that.
+        """
+        queryset = User.objects.filter(address_latitude__isnull=True).filter(
+            Q(address_coord__isnull=False) | Q(address__isnull=False)
+        ).order_by("id")
+
+        updated = 0
+        last_id = None
+        while True:
+            batch_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            missing = [user.address for user in batch if parse_coordinates(user.address_coord)[0] is None]
+            coordinates = service.get_coordinates_paced(missing, retries=self.retries)
+
+            changed = []
+            for user in batch:
+                latitude, longitude = parse_coordinates(user.address_coord)
+                if latitude is None and coordinates.get(user.address):
+                    latitude, longitude = coordinates[user.address]
+                    user.address_coord = {"latitude": latitude, "longitude": longitude}
+                if latitude is not None:
+                    user.address_latitude, user.address_longitude = latitude, longitude
+                    changed.append(user)
+
+            User.objects.bulk_update(
+                changed, ["address_coord", "address_latitude", "address_longitude"], batch_size=batch_size
+            )
+            updated += len(changed)
+
+        return updated
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services.routing import RoadGraph
+
+
+class Command(BaseCommand):
+    help = "Convert an OSM XML extract into the compact road graph used for routing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("osm_file", help="Path to an .osm (XML) extract, e.g. from Geofabrik or Overpass.")
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Where to write the graph (defaults to ROUTING_GRAPH_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"] or settings.ROUTING_GRAPH_PATH
+        if not output:
+            raise CommandError("Pass --output or set ROUTING_GRAPH_PATH")
+
+        try:
+            graph = RoadGraph.from_osm(options["osm_file"])
+        except (OSError, SyntaxError) as e:
+            raise CommandError(f"Could not read {options['osm_file']}: {e}")
+
+        if not len(graph):
+            raise CommandError("No drivable ways found in the extract")
+
+        graph.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(graph)} nodes and {graph.edge_count} edges to {output}."
+        ))
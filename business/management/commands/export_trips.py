@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from business.export import EXPORT_FORMATS, stream_trips, trip_export_queryset
+
+
+class Command(BaseCommand):
+    help = "Stream trip history as CSV or NDJSON to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--start-date", type=date.fromisoformat, help="First requested_at date (YYYY-MM-DD).")
+        parser.add_argument("--end-date", type=date.fromisoformat, help="Last requested_at date (YYYY-MM-DD).")
+        parser.add_argument("--driver", help="Only trips driven by this driver id.")
+        parser.add_argument("--customer", help="Only trips taken by this user id.")
+        parser.add_argument("--output", help="File to write to; defaults to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options["driver"]:
+            filters["driver_id"] = options["driver"]
+        if options["customer"]:
+            filters["customer_id"] = options["customer"]
+
+        queryset = trip_export_queryset(options["start_date"], options["end_date"], **filters)
+        chunks = stream_trips(queryset, options["format"], chunk_size=options["chunk_size"])
+
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", newline="", encoding="utf-8") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote trips to {options['output']}."))
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from business.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily driver and customer trip rollups from trips."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only rebuild days from this date (YYYY-MM-DD) onwards.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_daily_stats(since=options["since"], batch_size=options["batch_size"])
+        for model, rows in rebuilt.items():
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} {model} rows."))
@@ -0,0 +1,66 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from business.models import ArchivedTripReview, Driver, TripReview
+
+
+class Command(BaseCommand):
+    help = "Recompute each driver's rating totals from their live and archived trip reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drivers whose totals have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        checked, drifted = self.reconcile(options["batch_size"], options["dry_run"])
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} drivers. {verb} {drifted} with drifted ratings."))
+
+    def reconcile(self, batch_size, dry_run=False):
+        """
+        Walks drivers in primary-key order. Each batch costs one grouped
+        aggregate over its drivers' live reviews, one over their archived
+        reviews and one bulk_update of the rows whose totals disagree.
+        """
+        queryset = Driver.objects.order_by("id").only("id", "rating", "rating_sum", "rating_count")
+
+        checked = drifted = 0
+        last_id = None
+        while True:
+            batch_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            totals = {}
+            for model in (TripReview, ArchivedTripReview):
+                rows = (
+                    model.objects.filter(trip__driver_id__in=[driver.id for driver in batch])
+                    .values("trip__driver_id")
+                    .annotate(total=Sum("rating"), count=Count("id"))
+                )
+                for row in rows:
+                    total, count = totals.get(row["trip__driver_id"], (0, 0))
+                    totals[row["trip__driver_id"]] = (total + row["total"], count + row["count"])
+
+            changed = []
+            for driver in batch:
+                total, count = totals.get(driver.id, (0, 0))
+                rating = (Decimal(total) / count).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) if count else Decimal(0)
+                if (driver.rating_sum, driver.rating_count, driver.rating) != (total, count, rating):
+                    driver.rating_sum, driver.rating_count, driver.rating = total, count, rating
+                    changed.append(driver)
+
+            if not dry_run:
+                Driver.objects.bulk_update(changed, ["rating_sum", "rating_count", "rating"], batch_size=batch_size)
+            checked += len(batch)
+            drifted += len(changed)
+
+        return checked, drifted
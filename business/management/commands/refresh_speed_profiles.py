@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from business.eta import refresh_speed_profiles
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-zone, per-hour speed profiles used for ETAs from completed trips."
+
+    def handle(self, *args, **options):
+        saved = refresh_speed_profiles()
+        self.stdout.write(self.style.SUCCESS(f"Saved {saved} zone speed profiles."))
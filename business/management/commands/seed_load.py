@@ -0,0 +1,102 @@
+import multiprocessing
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from accounts.models import User
+from accounts.search import bump_search_index_version
+from business.seeding import (
+    now_for_seed,
+    seed_population,
+    seed_trip_chunk,
+    set_trip_job,
+    start_trip_worker,
+    trip_chunks,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users, drivers, vehicles, trips and reviews around Lagos for load testing. "
+        "Rows are bulk inserted, one transaction per chunk, and the same --seed always "
+        "produces the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--driver-ratio", type=float, default=0.2)
+        parser.add_argument("--trips", type=int, default=100000)
+        parser.add_argument("--days", type=int, default=180, help="Spread trips over this many days.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per INSERT.")
+        parser.add_argument("--chunk-size", type=int, default=20000, help="Trips per transaction.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Processes inserting trip chunks. Defaults to the CPU count on PostgreSQL "
+                 "and 1 on SQLite, which allows a single writer.",
+        )
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Do not rebuild the daily trip stats and driver ratings afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        seed = options["seed"]
+        if User.objects.filter(username=f"load{seed}_0").exists():
+            raise CommandError(f"Seed {seed} has already been loaded; pick another --seed.")
+        if options["users"] < 1 or not 0 < options["driver_ratio"] < 1:
+            raise CommandError("Need at least one user and a --driver-ratio between 0 and 1.")
+
+        workers = options["workers"]
+        if workers is None:
+            workers = multiprocessing.cpu_count() if connection.vendor == "postgresql" else 1
+
+        now = now_for_seed()
+        started = time.monotonic()
+        customer_ids, driver_ids = seed_population(
+            seed, options["users"], options["driver_ratio"], options["days"], now, options["batch_size"]
+        )
+        bump_search_index_version(User)
+        self.stdout.write(
+            f"Created {len(customer_ids)} customers and {len(driver_ids)} drivers "
+            f"in {time.monotonic() - started:.1f}s."
+        )
+        if options["trips"] and (not customer_ids or not driver_ids):
+            raise CommandError("Too few users to seed trips; raise --users or adjust --driver-ratio.")
+
+        job = {
+            "seed": seed, "customer_ids": customer_ids, "driver_ids": driver_ids,
+            "days": options["days"], "now": now, "batch_size": options["batch_size"],
+        }
+        chunks = trip_chunks(options["trips"], options["chunk_size"])
+        trips = reviews = 0
+        if workers > 1 and len(chunks) > 1:
+            # Forked workers must open their own connections.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with context.Pool(workers, initializer=start_trip_worker, initargs=(job,)) as pool:
+                for chunk_trips, chunk_reviews in pool.starmap(seed_trip_chunk, chunks):
+                    trips += chunk_trips
+                    reviews += chunk_reviews
+        else:
+            set_trip_job(**job)
+            for chunk, size in chunks:
+                chunk_trips, chunk_reviews = seed_trip_chunk(chunk, size)
+                trips += chunk_trips
+                reviews += chunk_reviews
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Created {trips} trips and {reviews} reviews with {workers} worker(s) "
+            f"in {elapsed:.1f}s ({trips / max(elapsed, 0.001):.0f} trips/s overall)."
+        )
+
+        if not options["skip_rollups"]:
+            call_command("reconcile_driver_ratings", batch_size=options["batch_size"], stdout=self.stdout)
+            call_command("rebuild_trip_stats", batch_size=options["batch_size"], stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f"Seed {seed} loaded in {time.monotonic() - started:.1f}s."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services.gazetteer import LAGOS_GAZETTEER
+from services.location import LocationService
+
+
+class Command(BaseCommand):
+    help = "Pre-fill the reverse-geocode cache for known pickup hotspots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--point",
+            action="append",
+            default=[],
+            help="Extra hotspot as 'latitude,longitude'. Can be repeated.",
+        )
+        parser.add_argument(
+            "--skip-gazetteer",
+            action="store_true",
+            help="Only warm the points passed with --point.",
+        )
+
+    def handle(self, *args, **options):
+        points = [] if options["skip_gazetteer"] else list(LAGOS_GAZETTEER.values())
+        for value in options["point"]:
+            try:
+                latitude, longitude = (float(part) for part in value.split(","))
+            except ValueError:
+                raise CommandError(f"Invalid point '{value}', expected 'latitude,longitude'")
+            points.append((latitude, longitude))
+
+        if not points:
+            raise CommandError("No points to warm")
+
+        summary = LocationService().warm_location_names(points)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {summary['cells']} cells: {summary['cached']} already cached, "
+            f"{summary['resolved']} resolved, {summary['failed']} not found."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0010_zone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trip',
+            name='status',
+            field=models.CharField(choices=[('R', 'Requested'), ('A', 'Accepted'), ('IP', 'In Progress'), ('C', 'Completed'), ('X', 'Canceled')], default='R', max_length=2),
+        ),
+    ]
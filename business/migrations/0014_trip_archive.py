@@ -0,0 +1,62 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0013_daily_trip_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTrip',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('start_location', models.CharField(blank=True, max_length=400, null=True)),
+                ('end_location', models.CharField(blank=True, max_length=400, null=True)),
+                ('start_latitude', models.FloatField(blank=True, null=True)),
+                ('start_longitude', models.FloatField(blank=True, null=True)),
+                ('end_latitude', models.FloatField(blank=True, null=True)),
+                ('end_longitude', models.FloatField(blank=True, null=True)),
+                ('distance', models.FloatField()),
+                ('fare_breakdown', models.JSONField(blank=True, null=True)),
+                ('total_fare', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('status', models.CharField(choices=[('R', 'Requested'), ('A', 'Accepted'), ('IP', 'In Progress'), ('C', 'Completed'), ('X', 'Canceled')], max_length=2)),
+                ('requested_at', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_trips', to=settings.AUTH_USER_MODEL)),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='business.driver')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTripReview',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('rating', models.PositiveIntegerField()),
+                ('comment', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='business.archivedtrip')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtrip',
+            index=models.Index(fields=['customer', '-requested_at'], name='archived_trip_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtrip',
+            index=models.Index(fields=['driver', '-requested_at'], name='archived_trip_driver_idx'),
+        ),
+    ]
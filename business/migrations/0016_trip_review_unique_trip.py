@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_duplicate_reviews(apps, schema_editor):
+    # Keeps the first review of each trip. Run reconcile_driver_ratings
+    # afterwards to take the dropped ratings out of the drivers' totals.
+    TripReview = apps.get_model('business', 'TripReview')
+    seen = set()
+    duplicates = []
+    for review_id, trip_id in TripReview._base_manager.order_by('trip_id', 'created_at', 'id').values_list('id', 'trip_id'):
+        if trip_id in seen:
+            duplicates.append(review_id)
+        seen.add(trip_id)
+    for start in range(0, len(duplicates), 500):
+        TripReview._base_manager.filter(id__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0015_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tripreview',
+            constraint=models.UniqueConstraint(fields=('trip',), name='unique_trip_review_trip'),
+        ),
+    ]
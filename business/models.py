@@ -1,8 +1,11 @@
 import uuid
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import DecimalField, F, FloatField
+from django.db.models.functions import Cast, Upper
 
 from accounts.models import User
-from crm.models import BaseModel
+from crm.models import AppDbModel, BaseModel
 
 class Vehicle(BaseModel):
     STATUS_REGULAR = "R"
@@ -38,10 +41,40 @@ class Driver(BaseModel):
     rating = models.DecimalField(
         max_digits=3, decimal_places=2, default=0, null=True, blank=True
     )  
+    # Running totals of TripReview ratings; `rating` is kept equal to their
+    # average so reads never aggregate over reviews.
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Serves case-insensitive license lookups, see DriverService.check_exists.
+            models.Index(Upper("license_number"), name="driver_license_upper_idx"),
+        ]
+
+    @classmethod
+    def add_rating(cls, driver_id, value):
+        """
+        Folds one review into the driver's totals with a single UPDATE. Every
+        F() reads the row as it was before the update, so concurrent reviews
+        never lose each other's increments.
+
+        The average is rounded half up to hundredths in integer arithmetic, so
+        every backend stores what reconcile_driver_ratings computes.
+        """
+        total = F("rating_sum") + value
+        count = F("rating_count") + 1
+        hundredths = (200 * total + count) / (2 * count)
+        return cls.objects.filter(id=driver_id).update(
+            rating_sum=total,
+            rating_count=count,
+            rating=Cast(Cast(hundredths, FloatField()) / 100, DecimalField(max_digits=3, decimal_places=2)),
+        )
+
 class Trip(BaseModel):
     STATUS_REQUESTED = 'R'
+    STATUS_ACCEPTED = 'A'
     STATUS_IN_PROGRESS = 'IP'
     STATUS_COMPLETED = 'C'
     STATUS_CANCELED = 'X'
@@ -49,6 +82,7 @@ class Trip(BaseModel):
 
     STATUS_CHOICES = [
         (STATUS_REQUESTED, 'Requested'),
+        (STATUS_ACCEPTED, 'Accepted'),
         (STATUS_IN_PROGRESS, 'In Progress'),
         (STATUS_COMPLETED,  'Completed'),
         (STATUS_CANCELED, 'Canceled')
@@ -62,6 +96,11 @@ class Trip(BaseModel):
     end_location = models.CharField(
         max_length=400, null=True, blank=True
     ) 
+    # Resolved once at creation so spatial queries never re-geocode the text above.
+    start_latitude = models.FloatField(null=True, blank=True)
+    start_longitude = models.FloatField(null=True, blank=True)
+    end_latitude = models.FloatField(null=True, blank=True)
+    end_longitude = models.FloatField(null=True, blank=True)
     distance = models.FloatField()
     fare_breakdown = models.JSONField(null=True, blank=True)
     total_fare = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -70,9 +109,168 @@ class Trip(BaseModel):
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["start_latitude", "start_longitude"], name="trip_start_bbox_idx"),
+            models.Index(fields=["end_latitude", "end_longitude"], name="trip_end_bbox_idx"),
+            # Trip history pages, newest first (business.archive.trip_history).
+            models.Index(fields=["customer", "-requested_at", "-id"], name="trip_customer_requested_idx"),
+            models.Index(fields=["driver", "-requested_at", "-id"], name="trip_driver_requested_idx"),
+            # A driver's trips in a given state, e.g. the one in progress.
+            models.Index(fields=["driver", "status"], name="trip_driver_status_idx"),
+        ]
+
+    def set_coordinates(self, start=None, end=None):
+        """Copies (latitude, longitude) pairs onto the trip. Missing ends are left as they are."""
+        if start:
+            self.start_latitude, self.start_longitude = start
+        if end:
+            self.end_latitude, self.end_longitude = end
+
+    @classmethod
+    def within_bbox(cls, min_lat, min_lon, max_lat, max_lon, end=False):
+        """Trips whose pickup (or drop-off, when end=True) lies inside the box."""
+        prefix = "end" if end else "start"
+        return cls.objects.filter(**{
+            f"{prefix}_latitude__gte": min_lat,
+            f"{prefix}_latitude__lte": max_lat,
+            f"{prefix}_longitude__gte": min_lon,
+            f"{prefix}_longitude__lte": max_lon,
+        })
+
 class TripReview(BaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='reviews')
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE)
     rating = models.PositiveIntegerField()
     comment = models.TextField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["trip"], name="unique_trip_review_trip"),
+        ]
+
+
+class ZoneSpeedProfile(BaseModel):
+    """
+    Average driving speed of completed trips that started in a geohash zone at a
+    given hour of day. Rows with an empty zone hold the city-wide average for the
+    hour. Rebuilt by business.eta.refresh_speed_profiles.
+    """
+    zone = models.CharField(max_length=12, blank=True, default="")
+    hour = models.PositiveSmallIntegerField()
+    speed_kmh = models.FloatField()
+    samples = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["zone", "hour"], name="unique_zone_speed_profile_hour"),
+        ]
+
+
+class Zone(BaseModel):
+    KIND_SERVICE_AREA = "service_area"
+    KIND_SURGE = "surge"
+    KIND_AIRPORT = "airport"
+
+    KIND_CHOICES = [
+        (KIND_SERVICE_AREA, 'Service area'),
+        (KIND_SURGE, 'Surge'),
+        (KIND_AIRPORT, 'Airport'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=KIND_SERVICE_AREA)
+    # Outer ring as a list of [latitude, longitude] pairs; the closing point is optional.
+    polygon = models.JSONField()
+    # When zones overlap, the one with the highest priority wins.
+    priority = models.IntegerField(default=0)
+
+    def clean(self):
+        points = self.polygon if isinstance(self.polygon, list) else []
+        if len(points) < 3 or not all(
+            isinstance(point, (list, tuple)) and len(point) == 2 for point in points
+        ):
+            raise ValidationError({"polygon": "Expected at least three [latitude, longitude] pairs."})
+
+    def __str__(self):
+        return f"{self.name} ({self.kind})"
+
+
+class DailyTripStats(BaseModel):
+    """
+    Per-day totals of finished trips, kept current by business.stats as trips
+    complete or are canceled and rebuilt by the rebuild_trip_stats command.
+    A trip counts on the local date it ended.
+    """
+    date = models.DateField()
+    completed_trips = models.PositiveIntegerField(default=0)
+    canceled_trips = models.PositiveIntegerField(default=0)
+    # Fare and distance of completed trips only.
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    distance = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DriverDailyStats(DailyTripStats):
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["driver", "date"], name="unique_driver_daily_stats"),
+        ]
+
+
+class CustomerDailyStats(DailyTripStats):
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_trip_stats')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["customer", "date"], name="unique_customer_daily_stats"),
+        ]
+
+
+class ArchivedTrip(AppDbModel):
+    """
+    Completed or canceled trips moved out of Trip by business.archive once they
+    are older than TRIP_ARCHIVE_AFTER_DAYS. Rows keep their original ids and
+    timestamps, so list views can page through both tables as one history.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_trips')
+    driver = models.ForeignKey(Driver, on_delete=models.SET_NULL, null=True, blank=True)
+    start_location = models.CharField(max_length=400, null=True, blank=True)
+    end_location = models.CharField(max_length=400, null=True, blank=True)
+    start_latitude = models.FloatField(null=True, blank=True)
+    start_longitude = models.FloatField(null=True, blank=True)
+    end_latitude = models.FloatField(null=True, blank=True)
+    end_longitude = models.FloatField(null=True, blank=True)
+    distance = models.FloatField()
+    fare_breakdown = models.JSONField(null=True, blank=True)
+    total_fare = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=2, choices=Trip.STATUS_CHOICES)
+    requested_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["customer", "-requested_at"], name="archived_trip_customer_idx"),
+            models.Index(fields=["driver", "-requested_at"], name="archived_trip_driver_idx"),
+        ]
+
+
+class ArchivedTripReview(AppDbModel):
+    id = models.UUIDField(primary_key=True, editable=False)
+    trip = models.ForeignKey(ArchivedTrip, on_delete=models.CASCADE, related_name='reviews')
+    reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    rating = models.PositiveIntegerField()
+    comment = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField()
+
@@ -0,0 +1,280 @@
+import random
+import uuid
+from contextlib import contextmanager
+from itertools import accumulate
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User, UserTypes, normalize_identifier, normalize_phone_number
+from business.models import Driver, Trip, TripReview, Vehicle
+from business.util import PricingConfig, calculate_trip_fare
+from services.gazetteer import LAGOS_GAZETTEER
+from services.routing import haversine_m
+
+SEED_PASSWORD = "Password@1234"
+
+# The *_WEIGHTS lists are cumulative (Random.choices cum_weights), so they are
+# not re-summed for every row.
+#
+# Pickups and drop-offs cluster around the gazetteer places, the busy ones
+# four times as often as the rest.
+PLACES = list(LAGOS_GAZETTEER.items())
+BUSY_PLACES = ("Ikeja", "Lekki", "Victoria Island", "Yaba", "Surulere", "Ikoyi", "Lagos Island", "Ajah")
+PLACE_WEIGHTS = list(accumulate(4 if name in BUSY_PLACES else 1 for name, _ in PLACES))
+PLACE_SPREAD_DEGREES = 0.008
+
+# Relative number of trip requests per hour of the day, with the morning
+# and evening rush.
+HOUR_WEIGHTS = list(accumulate([1, 1, 1, 1, 2, 4, 8, 12, 12, 8, 6, 6, 7, 6, 6, 7, 9, 12, 12, 9, 6, 4, 3, 2]))
+
+VEHICLE_MODELS = [
+    ("Toyota", "Corolla", "Sedan", Vehicle.STATUS_REGULAR, 5),
+    ("Toyota", "Camry", "Sedan", Vehicle.STATUS_REGULAR, 5),
+    ("Honda", "Civic", "Sedan", Vehicle.STATUS_REGULAR, 5),
+    ("Hyundai", "Elantra", "Sedan", Vehicle.STATUS_REGULAR, 5),
+    ("Kia", "Rio", "Hatchback", Vehicle.STATUS_REGULAR, 5),
+    ("Honda", "Accord", "Sedan", Vehicle.STATUS_COMFORT, 5),
+    ("Toyota", "Highlander", "SUV", Vehicle.STATUS_COMFORT, 7),
+    ("Lexus", "RX 350", "SUV", Vehicle.STATUS_SUPER, 5),
+    ("Mercedes-Benz", "GLE", "SUV", Vehicle.STATUS_SUPER, 7),
+    ("Porsche", "911", "Coupe", Vehicle.STATUS_EXOTIC, 4),
+]
+VEHICLE_WEIGHTS = list(accumulate([20, 15, 12, 10, 10, 8, 6, 3, 2, 1]))
+
+CANCEL_RATE = 0.1
+REVIEW_RATE = 0.6
+RATINGS = [5, 4, 3, 2, 1]
+RATING_WEIGHTS = list(accumulate([55, 25, 10, 5, 5]))
+SURGE_KEYS = ["low", "moderate", "high", "extreme"]
+SURGE_WEIGHTS = list(accumulate([70, 20, 8, 2]))
+AVERAGE_SPEED_KMH = 22
+DETOUR_FACTOR = 1.3
+
+
+def seeded_random(seed, *parts):
+    """A Random for one named slice of the data, so output does not depend on worker count or order."""
+    return random.Random(":".join(str(part) for part in (seed, *parts)))
+
+
+def seeded_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def random_point(rng):
+    name, (latitude, longitude) = rng.choices(PLACES, cum_weights=PLACE_WEIGHTS)[0]
+    return name, (
+        round(latitude + rng.gauss(0, PLACE_SPREAD_DEGREES), 6),
+        round(longitude + rng.gauss(0, PLACE_SPREAD_DEGREES), 6),
+    )
+
+
+def skewed_choice(rng, values):
+    """Picks from values with the first ones far more likely, like frequent riders."""
+    return values[int(len(values) * rng.random() ** 2)]
+
+
+@contextmanager
+def raw_timestamps(*models):
+    """
+    Lets bulk_create keep the created_at / requested_at values given to it
+    instead of stamping the current time.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def build_population(seed, user_count, driver_ratio, days, now):
+    """
+    Users, plus one Vehicle and Driver for every driver user. Drivers make
+    up `driver_ratio` of the users. Every user shares one password hash.
+    """
+    rng = seeded_random(seed, "population")
+    password = make_password(SEED_PASSWORD)
+    users, vehicles, drivers = [], [], []
+
+    for i in range(user_count):
+        is_driver = rng.random() < driver_ratio
+        username = f"load{seed}_{i}"
+        email = f"{username}@loadtest.example"
+        phone_number = f"080{rng.randrange(10 ** 8):08d}"
+        _, home = random_point(rng)
+        joined = now - timedelta(days=days + rng.randrange(365), seconds=rng.randrange(86400))
+        user = User(
+            id=seeded_uuid(rng),
+            username=username,
+            email=email,
+            password=password,
+            full_name=f"Load {'Driver' if is_driver else 'Rider'} {i}",
+            first_name="Load",
+            last_name=f"{'Driver' if is_driver else 'Rider'} {i}",
+            phone_number=phone_number,
+            user_type=UserTypes.driver if is_driver else UserTypes.customer,
+            country="Nigeria",
+            is_verified=True,
+            registration_complete=True,
+            address_coord={"latitude": home[0], "longitude": home[1]},
+            address_latitude=home[0],
+            address_longitude=home[1],
+            email_normalized=normalize_identifier(email),
+            username_normalized=normalize_identifier(username),
+            phone_number_normalized=normalize_phone_number(phone_number),
+            date_joined=joined,
+            created_at=joined,
+            updated_at=joined,
+        )
+        users.append(user)
+        if not is_driver:
+            continue
+
+        make, model, grade, ride_type, capacity = rng.choices(VEHICLE_MODELS, cum_weights=VEHICLE_WEIGHTS)[0]
+        vehicle = Vehicle(
+            id=seeded_uuid(rng), make=make, model=model, year=rng.randint(2010, 2024), grade=grade,
+            ride_type=ride_type, capacity=capacity, created_at=joined, updated_at=joined,
+        )
+        vehicles.append(vehicle)
+        drivers.append(Driver(
+            id=seeded_uuid(rng), user_id=user.id, vehicle_id=vehicle.id,
+            license_number=f"LAG-{rng.randrange(10 ** 8):08d}", created_at=joined, updated_at=joined,
+        ))
+
+    return users, vehicles, drivers
+
+
+def time_of_day_key(hour):
+    if 7 <= hour < 10 or 17 <= hour < 20:
+        return "peak"
+    if hour >= 23 or hour < 5:
+        return "late_night"
+    return "off_peak"
+
+
+def build_trip_chunk(seed, chunk, size, customer_ids, driver_ids, days, now):
+    """
+    `size` trips and their reviews for one chunk. The chunk number seeds the
+    generator, so any worker builds the same rows for it.
+    """
+    rng = seeded_random(seed, "trips", chunk)
+    config = PricingConfig()
+    trips, reviews = [], []
+
+    for _ in range(size):
+        day = timezone.localtime(now - timedelta(days=rng.randrange(days)))
+        hour = rng.choices(range(24), cum_weights=HOUR_WEIGHTS)[0]
+        requested_at = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+        if requested_at > now:
+            requested_at -= timedelta(days=1)
+
+        start_name, start = random_point(rng)
+        end_name, end = random_point(rng)
+        distance = round(max(0.5, haversine_m(*start, *end) * DETOUR_FACTOR / 1000), 2)
+
+        trip = Trip(
+            id=seeded_uuid(rng),
+            customer_id=skewed_choice(rng, customer_ids),
+            driver_id=skewed_choice(rng, driver_ids),
+            start_location=start_name,
+            end_location=end_name,
+            start_latitude=start[0],
+            start_longitude=start[1],
+            end_latitude=end[0],
+            end_longitude=end[1],
+            distance=distance,
+            requested_at=requested_at,
+            created_at=requested_at,
+        )
+        time_key = time_of_day_key(hour)
+        traffic_key = rng.choice(["moderate", "heavy"]) if time_key == "peak" else "low"
+        surge_key = rng.choices(SURGE_KEYS, cum_weights=SURGE_WEIGHTS)[0]
+        calculate_trip_fare(trip, config, traffic_key, surge_key, time_key, commit=False)
+
+        if now - requested_at < timedelta(hours=1):
+            trip.status = rng.choice([Trip.STATUS_REQUESTED, Trip.STATUS_ACCEPTED, Trip.STATUS_IN_PROGRESS])
+            if trip.status == Trip.STATUS_REQUESTED:
+                trip.driver_id = None
+            elif trip.status == Trip.STATUS_IN_PROGRESS:
+                trip.started_at = requested_at + timedelta(minutes=rng.randint(2, 10))
+        elif rng.random() < CANCEL_RATE:
+            trip.status = Trip.STATUS_CANCELED
+            trip.ended_at = requested_at + timedelta(minutes=rng.randint(1, 15))
+            if rng.random() < 0.5:
+                trip.driver_id = None
+        else:
+            trip.status = Trip.STATUS_COMPLETED
+            trip.started_at = requested_at + timedelta(minutes=rng.randint(2, 15))
+            minutes = distance / AVERAGE_SPEED_KMH * 60 * rng.uniform(0.8, 1.6)
+            trip.ended_at = trip.started_at + timedelta(minutes=minutes)
+        trip.updated_at = trip.ended_at or trip.started_at or requested_at
+        trips.append(trip)
+
+        if trip.status == Trip.STATUS_COMPLETED and rng.random() < REVIEW_RATE:
+            reviewed_at = trip.ended_at + timedelta(minutes=rng.randint(1, 120))
+            reviews.append(TripReview(
+                id=seeded_uuid(rng),
+                trip_id=trip.id,
+                reviewer_id=trip.customer_id,
+                rating=rng.choices(RATINGS, cum_weights=RATING_WEIGHTS)[0],
+                created_at=reviewed_at,
+                updated_at=reviewed_at,
+            ))
+
+    return trips, reviews
+
+
+def seed_population(seed, user_count, driver_ratio, days, now, batch_size):
+    users, vehicles, drivers = build_population(seed, user_count, driver_ratio, days, now)
+    with raw_timestamps(User, Vehicle, Driver), transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        Vehicle.objects.bulk_create(vehicles, batch_size=batch_size)
+        Driver.objects.bulk_create(drivers, batch_size=batch_size)
+
+    customer_ids = [user.id for user in users if user.user_type == UserTypes.customer]
+    return customer_ids, [driver.id for driver in drivers]
+
+
+_trip_job = {}
+
+
+def set_trip_job(**job):
+    """Shares the population with pool workers once, instead of with every chunk."""
+    _trip_job.clear()
+    _trip_job.update(job)
+
+
+def seed_trip_chunk(chunk, size):
+    """Builds and inserts one chunk in its own transaction. Returns (trips, reviews) inserted."""
+    job = _trip_job
+    trips, reviews = build_trip_chunk(
+        job["seed"], chunk, size, job["customer_ids"], job["driver_ids"], job["days"], job["now"]
+    )
+    with raw_timestamps(Trip, TripReview), transaction.atomic():
+        Trip.objects.bulk_create(trips, batch_size=job["batch_size"])
+        TripReview.objects.bulk_create(reviews, batch_size=job["batch_size"])
+    return len(trips), len(reviews)
+
+
+def start_trip_worker(job):
+    set_trip_job(**job)
+
+
+def trip_chunks(trip_count, chunk_size):
+    return [(chunk, min(chunk_size, trip_count - start)) for chunk, start in enumerate(range(0, trip_count, chunk_size))]
+
+
+def now_for_seed():
+    # Whole hours keep two runs a few minutes apart on the same timestamps.
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
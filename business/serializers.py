@@ -1,5 +1,9 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from business.models import Vehicle, Driver, Trip, TripReview
+
+from business.models import ArchivedTrip, Vehicle, Driver, Trip, TripReview
 
 class VehicleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,13 +29,18 @@ class DriverSerializer(serializers.ModelSerializer):
         ]
 
 class TripReviewSerializer(serializers.ModelSerializer):
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+
     class Meta:
         model = TripReview
         fields = [
             'id',
             'trip',
-            'reviewer'
+            'reviewer',
+            'rating',
+            'comment',
         ]
+        read_only_fields = ['reviewer']
 
 class CreateTripSerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,6 +53,7 @@ class CreateTripSerializer(serializers.ModelSerializer):
             'status',
             'requested_at',
         ]
+        read_only_fields = ['status', 'requested_at']
 
 class TripSerializer(serializers.ModelSerializer):
     class Meta:
@@ -64,6 +74,25 @@ class TripSerializer(serializers.ModelSerializer):
             'reviews'
         ]
 
+class ArchivedTripSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTrip
+        fields = TripSerializer.Meta.fields
+
+
+def serialize_trip_history(trips):
+    """Serializes a page that may mix live and archived trips, keeping its order."""
+    return [
+        (ArchivedTripSerializer if isinstance(trip, ArchivedTrip) else TripSerializer)(trip).data
+        for trip in trips
+    ]
+
+
+class TripHistoryQuerySerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False, max_length=200)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=500, default=100)
+
+
 class CalculateFareSerializer(serializers.Serializer):
     distance = serializers.FloatField(required=True, min_value=0)
     traffic_level = serializers.ChoiceField(
@@ -74,3 +103,50 @@ class CalculateFareSerializer(serializers.Serializer):
         choices=[("low", "low"), ("moderate", "moderate"), ("peak", "peak"), ("extreme", "extreme")],
         default="low"
     )
+
+
+class SearchPlacesSerializer(serializers.Serializer):
+    q = serializers.CharField(required=True, max_length=200)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=20, default=10)
+
+
+class DriverPositionSerializer(serializers.Serializer):
+    driver = serializers.CharField(required=True, max_length=64)
+    latitude = serializers.FloatField(required=True, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=True, min_value=-180, max_value=180)
+
+
+class PickupEtaSerializer(serializers.Serializer):
+    pickup_latitude = serializers.FloatField(required=True, min_value=-90, max_value=90)
+    pickup_longitude = serializers.FloatField(required=True, min_value=-180, max_value=180)
+    drivers = DriverPositionSerializer(many=True, required=True, allow_empty=False, max_length=500)
+
+
+class TripStatsQuerySerializer(serializers.Serializer):
+    """Date range for the stats endpoints: the last year up to today by default."""
+    MAX_DAYS = 366
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get("end_date") or timezone.localdate()
+        start = attrs.get("start_date") or end - timedelta(days=self.MAX_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError("start_date must not be after end_date")
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"The date range cannot exceed {self.MAX_DAYS} days")
+        return {"start_date": start, "end_date": end}
+
+
+class TripExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=["csv", "ndjson"], required=False, default="csv")
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start, end = attrs.get("start_date"), attrs.get("end_date")
+        if start and end and start > end:
+            raise serializers.ValidationError("start_date must not be after end_date")
+        return attrs
+
@@ -1,8 +1,11 @@
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Upper
 from django.utils import timezone
 
-from business.models import Driver
+from business.models import Driver, Trip, TripReview
+from business.stats import record_trip_outcome
 from core.errors.app_errors import OperationError
 from crm.constants import ActivityType
 from services.util import CustomAPIRequestUtil
@@ -77,7 +80,14 @@ class DriverService(CustomAPIRequestUtil):
         if not license_number:
             return False
 
-        return Driver.objects.filter(license_number__iexact=license_number).exists()
+        # The same comparison PostgreSQL uses for license_number__iexact, written
+        # out so driver_license_upper_idx serves it on SQLite too, where iexact
+        # becomes a LIKE that no index can answer.
+        return (
+            Driver.objects.alias(license_key=Upper("license_number"))
+            .filter(license_key=Upper(Value(license_number)))
+            .exists()
+        )
 
     def fetch_driver_by_user(self, user) -> (Driver, OperationError):
         def do_fetch():
@@ -109,3 +119,108 @@ class DriverService(CustomAPIRequestUtil):
     def clear_temp_cache(self, driver):
         self.clear_cache(self.generate_cache_key("driver", "id", driver.id))
         self.clear_cache(self.generate_cache_key("driver_id", driver.id))
+
+
+class TripService(CustomAPIRequestUtil):
+    """
+    Trip lifecycle: requested -> accepted -> in progress -> completed, with
+    cancellation allowed before the trip starts.
+
+    Every transition is one conditional UPDATE filtered on the expected status
+    (and on who may act), so two drivers tapping "accept" at the same time
+    cannot both win and no row lock is held. When nothing is updated the trip
+    is read back only to explain why: 404, 403 or 409.
+    """
+
+    # action: (allowed current statuses, new status, timestamp field to stamp)
+    TRANSITIONS = {
+        "accept": ([Trip.STATUS_REQUESTED], Trip.STATUS_ACCEPTED, None),
+        "start": ([Trip.STATUS_ACCEPTED], Trip.STATUS_IN_PROGRESS, "started_at"),
+        "complete": ([Trip.STATUS_IN_PROGRESS], Trip.STATUS_COMPLETED, "ended_at"),
+        "cancel": ([Trip.STATUS_REQUESTED, Trip.STATUS_ACCEPTED], Trip.STATUS_CANCELED, "ended_at"),
+    }
+
+    def __init__(self, request):
+        super().__init__(request)
+
+    def transition(self, trip_id, action) -> (Trip, OperationError):
+        if action not in self.TRANSITIONS:
+            return None, self.make_400(f"Unknown trip action '{action}'")
+
+        from_statuses, to_status, timestamp_field = self.TRANSITIONS[action]
+        driver = Driver.objects.filter(user=self.auth_user).first()
+        now = timezone.now()
+
+        updates = {"status": to_status, "updated_at": now, "updated_by": self.auth_user}
+        if timestamp_field:
+            updates[timestamp_field] = now
+        if action == "accept":
+            updates["driver"] = driver
+
+        actor = self.actor_filter(action, driver)
+        if actor is None:
+            return None, self.make_403("Only drivers can accept trips")
+
+        # The status change and the rollup update commit or fail together.
+        with transaction.atomic(savepoint=False):
+            updated = Trip.objects.filter(actor, id=trip_id, status__in=from_statuses).update(**updates)
+            if not updated:
+                return None, self.explain_conflict(trip_id, action, driver)
+
+            trip = Trip.objects.get(id=trip_id)
+            # The conditional update lets exactly one request finish a trip, so
+            # the rollups count it once.
+            record_trip_outcome(trip)
+
+        self.report_activity(ActivityType.update, trip, f"Trip {trip.id} {action}")
+        return trip, None
+
+    def actor_filter(self, action, driver):
+        """Who may apply the action, as a filter on the trip row."""
+        if action == "accept":
+            if driver is None:
+                return None
+            return Q(driver__isnull=True) | Q(driver=driver)
+
+        if action == "cancel":
+            return Q(customer=self.auth_user) | Q(driver=driver) if driver else Q(customer=self.auth_user)
+
+        return Q(driver=driver) if driver else Q(pk__in=[])
+
+    def explain_conflict(self, trip_id, action, driver) -> OperationError:
+        trip = Trip.objects.filter(id=trip_id).select_related("driver").first()
+        if not trip:
+            return self.make_404(f"Trip with id '{trip_id}' not found")
+
+        from_statuses = self.TRANSITIONS[action][0]
+        if trip.status not in from_statuses:
+            return self.make_409(f"Cannot {action} a trip that is {trip.get_status_display().lower()}")
+
+        return self.make_403(f"You are not allowed to {action} this trip")
+
+
+class TripReviewService(CustomAPIRequestUtil):
+    def __init__(self, request):
+        super().__init__(request)
+
+    def create(self, payload) -> (TripReview, OperationError):
+        """
+        Saves the review and adds its rating to the driver's totals in the same
+        transaction, so Driver.rating never drifts from the reviews. Only the
+        trip's customer may review it, once, after it has completed.
+        """
+        trip = payload["trip"]
+        if trip.customer_id != self.auth_user.id:
+            return None, self.make_403("You can only review your own trips")
+        if trip.status != Trip.STATUS_COMPLETED:
+            return None, self.make_409(f"Cannot review a trip that is {trip.get_status_display().lower()}")
+
+        try:
+            with transaction.atomic():
+                review = TripReview.objects.create(**payload, reviewer=self.auth_user)
+                if trip.driver_id:
+                    Driver.add_rating(trip.driver_id, review.rating)
+        except IntegrityError:
+            return None, self.make_409("This trip has already been reviewed")
+
+        return review, None
@@ -0,0 +1,148 @@
+import heapq
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from business.models import ArchivedTrip, CustomerDailyStats, DriverDailyStats, Trip
+
+FINISHED_STATUSES = (Trip.STATUS_COMPLETED, Trip.STATUS_CANCELED)
+STATS_FIELDS = ("completed_trips", "canceled_trips", "revenue", "distance")
+
+
+def trip_increments(trip):
+    completed = trip.status == Trip.STATUS_COMPLETED
+    return {
+        "completed_trips": int(completed),
+        "canceled_trips": int(not completed),
+        "revenue": (trip.total_fare or 0) if completed else 0,
+        "distance": (trip.distance or 0) if completed else 0,
+    }
+
+
+def increment_daily_stats(model, key, increments):
+    """
+    Adds to a daily row with one UPDATE, creating the row the first time. A
+    concurrent first insert for the same key loses on the unique constraint
+    and retries the UPDATE.
+    """
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **increments)
+    except IntegrityError:
+        model.objects.filter(**key).update(**updates)
+
+
+def record_trip_outcome(trip):
+    """
+    Counts a trip that has just completed or been canceled in its customer's
+    and driver's rollups. Call it once per trip, in the transaction that
+    finished it.
+    """
+    if trip.status not in FINISHED_STATUSES or not trip.ended_at:
+        return
+
+    day = timezone.localdate(trip.ended_at)
+    increments = trip_increments(trip)
+    increment_daily_stats(CustomerDailyStats, {"date": day, "customer_id": trip.customer_id}, increments)
+    if trip.driver_id:
+        increment_daily_stats(DriverDailyStats, {"date": day, "driver_id": trip.driver_id}, increments)
+
+
+def merge_daily_rows(querysets, owner, batch_size):
+    """Sums rows for the same (owner, day) across aggregates sorted by both."""
+    key = itemgetter(owner, "day")
+    rows = heapq.merge(*(queryset.iterator(chunk_size=batch_size) for queryset in querysets), key=key)
+    for (owner_id, day), group in groupby(rows, key=key):
+        group = list(group)
+        yield owner_id, day, {field: sum(row[field] for row in group) for field in STATS_FIELDS}
+
+
+def rebuild_daily_stats(since=None, batch_size=1000):
+    """
+    Recomputes the rollups from Trip and ArchivedTrip, for every day or for
+    `since` onwards. Each table gets one grouped aggregate per source, read in
+    (owner, day) order and merged as they stream, and is rebuilt inside a
+    transaction so readers never see a half-built range.
+    """
+    sources = []
+    for model in (Trip, ArchivedTrip):
+        trips = model.objects.filter(status__in=FINISHED_STATUSES, ended_at__isnull=False)
+        if since:
+            trips = trips.filter(ended_at__date__gte=since)
+        sources.append(trips)
+
+    completed = Q(status=Trip.STATUS_COMPLETED)
+    aggregates = {
+        "completed_trips": Count("id", filter=completed),
+        "canceled_trips": Count("id", filter=Q(status=Trip.STATUS_CANCELED)),
+        "revenue": Sum("total_fare", filter=completed, default=0),
+        "distance": Sum("distance", filter=completed, default=0),
+    }
+
+    rebuilt = {}
+    with transaction.atomic():
+        for model, owner in ((CustomerDailyStats, "customer_id"), (DriverDailyStats, "driver_id")):
+            existing = model.objects.all()
+            if since:
+                existing = existing.filter(date__gte=since)
+            existing.delete()
+
+            rows = merge_daily_rows(
+                (
+                    trips.exclude(**{f"{owner}__isnull": True})
+                    .annotate(day=TruncDate("ended_at"))
+                    .values(owner, "day")
+                    .annotate(**aggregates)
+                    .order_by(owner, "day")
+                    for trips in sources
+                ),
+                owner,
+                batch_size,
+            )
+            created = model.objects.bulk_create(
+                (model(date=day, **{owner: owner_id}, **totals) for owner_id, day, totals in rows),
+                batch_size=batch_size,
+            )
+            rebuilt[model.__name__] = len(created)
+
+    return rebuilt
+
+
+def summarize_daily_stats(queryset, start, end):
+    """
+    Totals and a per-day series for one owner's rows between two dates. A year
+    of stats is at most 366 rows, whatever the number of trips behind them.
+    """
+    rows = queryset.filter(date__gte=start, date__lte=end).order_by("date").values("date", *STATS_FIELDS)
+
+    days = []
+    completed = canceled = 0
+    revenue, distance = Decimal(0), 0.0
+    for row in rows:
+        completed += row["completed_trips"]
+        canceled += row["canceled_trips"]
+        revenue += row["revenue"]
+        distance += row["distance"]
+        days.append({**row, "trips": row["completed_trips"] + row["canceled_trips"]})
+
+    trips = completed + canceled
+    return {
+        "start_date": start,
+        "end_date": end,
+        "trips": trips,
+        "completed_trips": completed,
+        "canceled_trips": canceled,
+        "completion_rate": round(completed / trips, 4) if trips else None,
+        "cancel_rate": round(canceled / trips, 4) if trips else None,
+        "revenue": revenue,
+        "average_distance": round(distance / completed, 2) if completed else None,
+        "days": days,
+    }
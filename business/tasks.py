@@ -0,0 +1,21 @@
+from celery import app
+
+from services.log import AppLogger
+
+
+@app.shared_task
+def refresh_speed_profiles_queue():
+    from business.eta import refresh_speed_profiles
+
+    saved = refresh_speed_profiles()
+    AppLogger.print(f"Refreshed {saved} zone speed profiles")
+    return saved
+
+
+@app.shared_task
+def archive_trips_queue():
+    from business.archive import archive_trips
+
+    moved = archive_trips()
+    AppLogger.print(f"Archived {moved} trips")
+    return moved
@@ -60,7 +60,8 @@ def calculate_trip_fare(
     config: PricingConfig,
     traffic_key: str = "low",
     surge_key: str = "low",
-    time_of_day_key: str = "off_peak"
+    time_of_day_key: str = "off_peak",
+    commit: bool = True
 ) -> (Decimal, dict):
     """
     Calculate the total fare for a Trip instance using the PricingConfig object.
@@ -72,6 +73,8 @@ def calculate_trip_fare(
         traffic_key (str): Key for traffic multiplier (e.g., "low", "moderate", "heavy").
         surge_key (str): Key for surge multiplier (e.g., "low", "moderate", "high", "extreme").
         time_of_day_key (str): Key for time of day factor (e.g., "off_peak", "peak", "late_night").
+        commit (bool): Save the trip after setting the fare. Pass False when the caller
+            persists the trip itself (e.g. a single async insert).
 
     Returns:
         A tuple containing:
@@ -116,7 +119,8 @@ def calculate_trip_fare(
     # Update the Trip instance
     trip.fare_breakdown = fare_breakdown
     trip.total_fare = total_fare
-    trip.save()
+    if commit:
+        trip.save()
 
     return total_fare, fare_breakdown
 
@@ -0,0 +1,262 @@
+import math
+import threading
+import time
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from business.models import Zone
+from services.log import AppLogger
+
+ZONE_INDEX_VERSION_KEY = "zones:index-version"
+
+
+class IndexedZone:
+    """A Zone reduced to what lookups need: its edges and bounding box."""
+
+    __slots__ = ("id", "name", "kind", "priority", "bbox", "area", "edges", "edge_array")
+
+    def __init__(self, id, name, kind, priority, polygon):
+        points = [(float(lat), float(lon)) for lat, lon in polygon]
+        if len(points) > 3 and points[0] == points[-1]:
+            points = points[:-1]
+
+        self.id = id
+        self.name = name
+        self.kind = kind
+        self.priority = priority
+
+        lats = [lat for lat, _ in points]
+        lons = [lon for _, lon in points]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+
+        # Each edge is (lat1, lon1, lat2, d_lon/d_lat); horizontal edges never
+        # cross the ray and are dropped.
+        self.edges = []
+        area = 0.0
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:] + points[:1]):
+            area += lon1 * lat2 - lon2 * lat1
+            if lat1 != lat2:
+                self.edges.append((lat1, lon1, lat2, (lon2 - lon1) / (lat2 - lat1)))
+        self.area = abs(area) / 2
+        self.edge_array = np.array(self.edges, dtype=float).reshape(-1, 4)
+
+    def __repr__(self):
+        return f"<IndexedZone {self.name} ({self.kind})>"
+
+    def contains(self, lat, lon):
+        """Ray casting in pure Python; cheaper than NumPy for a single point."""
+        inside = False
+        for lat1, lon1, lat2, slope in self.edges:
+            if (lat1 > lat) != (lat2 > lat) and lon < lon1 + slope * (lat - lat1):
+                inside = not inside
+        return inside
+
+    def contains_many(self, lats, lons):
+        """Ray casting over arrays of points, broadcast as a points x edges matrix."""
+        lat1, lon1, lat2, slope = self.edge_array.T
+        lats, lons = lats[:, None], lons[:, None]
+        crossings = ((lat1 > lats) != (lat2 > lats)) & (lons < lon1 + slope * (lats - lat1))
+        return np.count_nonzero(crossings, axis=1) % 2 == 1
+
+
+class STRTree:
+    """
+    Static R-tree over bounding boxes, bulk-loaded with Sort-Tile-Recursive
+    packing. Nodes are (min_lat, min_lon, max_lat, max_lon, children, item)
+    tuples; leaves carry the item index and no children.
+    """
+
+    def __init__(self, boxes, node_capacity=8):
+        self.node_capacity = node_capacity
+        level = [(*box, None, index) for index, box in enumerate(boxes)]
+        while len(level) > node_capacity:
+            level = self._pack(level)
+        self.root = level
+
+    def _pack(self, entries):
+        capacity = self.node_capacity
+        node_count = math.ceil(len(entries) / capacity)
+        slab_size = math.ceil(math.sqrt(node_count)) * capacity
+
+        entries = sorted(entries, key=lambda entry: entry[1] + entry[3])
+        parents = []
+        for slab_start in range(0, len(entries), slab_size):
+            slab = sorted(entries[slab_start:slab_start + slab_size], key=lambda entry: entry[0] + entry[2])
+            for start in range(0, len(slab), capacity):
+                children = slab[start:start + capacity]
+                parents.append((
+                    min(child[0] for child in children),
+                    min(child[1] for child in children),
+                    max(child[2] for child in children),
+                    max(child[3] for child in children),
+                    children,
+                    None,
+                ))
+        return parents
+
+    def query(self, lat, lon):
+        """Indexes of the boxes that contain the point."""
+        found = []
+        stack = list(self.root)
+        while stack:
+            min_lat, min_lon, max_lat, max_lon, children, item = stack.pop()
+            if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                continue
+            if children is None:
+                found.append(item)
+            else:
+                stack.extend(children)
+        return found
+
+
+class ZoneIndex:
+    """
+    Point-in-zone lookups over the active zones. When zones overlap, the one
+    with the highest priority wins, then the smallest.
+    """
+
+    def __init__(self, zones):
+        self.zones = sorted(zones, key=lambda zone: (-zone.priority, zone.area))
+        self.tree = STRTree([zone.bbox for zone in self.zones])
+        self.bboxes = np.array([zone.bbox for zone in self.zones], dtype=float).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.zones)
+
+    @classmethod
+    def load(cls):
+        zones = []
+        for zone in Zone.active_available_objects.all():
+            try:
+                zones.append(IndexedZone(zone.id, zone.name, zone.kind, zone.priority, zone.polygon))
+            except (TypeError, ValueError) as e:
+                AppLogger.warning(f"Skipping zone {zone.id} with an invalid polygon: {e}")
+        return cls(zones)
+
+    def zone_for(self, lat, lon, kind=None):
+        """The winning zone containing the point, or None."""
+        for position in sorted(self.tree.query(lat, lon)):
+            zone = self.zones[position]
+            if (kind is None or zone.kind == kind) and zone.contains(lat, lon):
+                return zone
+        return None
+
+    def zones_for(self, points, kind=None):
+        """
+        Batch form of zone_for for a sequence of (latitude, longitude) points.
+        Zones are tried in priority order, and each one only tests the points
+        that are still unassigned and inside its bounding box.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        lats, lons = points[:, 0], points[:, 1]
+        assigned = np.full(len(points), -1)
+
+        # Sorting by latitude once turns each bounding box test into a slice.
+        order = np.argsort(lats, kind="stable")
+        sorted_lats = lats[order]
+
+        for position, zone in enumerate(self.zones):
+            if kind is not None and zone.kind != kind:
+                continue
+            min_lat, min_lon, max_lat, max_lon = self.bboxes[position]
+            start = np.searchsorted(sorted_lats, min_lat, side="left")
+            end = np.searchsorted(sorted_lats, max_lat, side="right")
+            candidates = order[start:end]
+            candidates = candidates[
+                (assigned[candidates] < 0) & (lons[candidates] >= min_lon) & (lons[candidates] <= max_lon)
+            ]
+            if not len(candidates):
+                continue
+            inside = zone.contains_many(lats[candidates], lons[candidates])
+            assigned[candidates[inside]] = position
+
+        return [self.zones[position] if position >= 0 else None for position in assigned]
+
+
+_index = None
+_index_version = None
+_index_checked_at = 0
+_reloading = False
+_index_lock = threading.Lock()
+
+
+def get_zone_index() -> ZoneIndex:
+    """
+    Process-wide ZoneIndex. The first call builds it; afterwards the shared
+    version key is checked every ZONE_INDEX_CHECK_SECONDS and a changed version
+    rebuilds the index on a background thread while the old one keeps serving.
+    """
+    global _index, _index_checked_at, _reloading
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                reload_zone_index(get_zone_index_version())
+        return _index
+
+    now = time.monotonic()
+    if now - _index_checked_at < getattr(settings, "ZONE_INDEX_CHECK_SECONDS", 30):
+        return _index
+
+    with _index_lock:
+        _index_checked_at = now
+        version = get_zone_index_version()
+        if version != _index_version and not _reloading:
+            _reloading = True
+            threading.Thread(target=_reload_in_background, args=(version,), daemon=True).start()
+    return _index
+
+
+def reload_zone_index(version=None):
+    global _index, _index_version, _index_checked_at
+    index = ZoneIndex.load()
+    _index, _index_version, _index_checked_at = index, version, time.monotonic()
+    return index
+
+
+def _reload_in_background(version):
+    global _reloading
+    try:
+        reload_zone_index(version)
+    except Exception as e:
+        AppLogger.report(e)
+    finally:
+        _reloading = False
+        close_old_connections()
+
+
+def get_zone_index_version():
+    try:
+        return cache.get(ZONE_INDEX_VERSION_KEY)
+    except Exception as e:
+        AppLogger.report(error=e)
+        return _index_version
+
+
+def bump_zone_index_version():
+    global _index_checked_at
+    try:
+        cache.set(ZONE_INDEX_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    except Exception as e:
+        AppLogger.report(error=e)
+    # Make this process pick up the change on its next lookup.
+    _index_checked_at = 0
+
+
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Zone)
+def zone_changed(sender, **kwargs):
+    transaction.on_commit(bump_zone_index_version)
+
+
+def zone_for(lat, lon, kind=None):
+    return get_zone_index().zone_for(lat, lon, kind=kind)
+
+
+def zones_for(points, kind=None):
+    return get_zone_index().zones_for(points, kind=kind)
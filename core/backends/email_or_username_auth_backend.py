@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from email_validator import validate_email
 
-from accounts.models import User
+from accounts.models import User, normalize_identifier
 from services.log import AppLogger
 
 
@@ -22,9 +22,9 @@ class EmailOrUsernameModelBackend(ModelBackend):
 
         try:
             email_info = validate_email(username, check_deliverability=False)
-            fields = {"email__iexact": email_info.normalized}
+            fields = {"email_normalized": normalize_identifier(email_info.normalized)}
         except Exception:
-            fields = {"username__iexact": username}
+            fields = {"username_normalized": normalize_identifier(username)}
 
         try:
             user = get_user_model().objects.get(**fields)
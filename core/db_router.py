@@ -0,0 +1,174 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from services.log import AppLogger
+
+PRIMARY_PIN_KEY = "db:primary-pin:{user_id}"
+
+
+class RoutingState:
+    """What the router needs to know about the current request or task."""
+
+    __slots__ = ("replica_depth", "replica", "wrote")
+
+    def __init__(self):
+        self.replica_depth = 0
+        self.replica = None
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def is_pinned_to_primary(user):
+    """True while the user's own recent write may not have reached the replicas yet."""
+    if not user or not user.is_authenticated:
+        return False
+    try:
+        return bool(cache.get(PRIMARY_PIN_KEY.format(user_id=user.pk)))
+    except Exception as e:
+        AppLogger.report(error=e)
+        return True
+
+
+def pin_to_primary(user):
+    seconds = getattr(settings, "DB_REPLICA_STICKY_SECONDS", 10)
+    try:
+        cache.set(PRIMARY_PIN_KEY.format(user_id=user.pk), 1, timeout=seconds)
+    except Exception as e:
+        AppLogger.report(error=e)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a replica only inside replica_reads() (or a view using
+    ReadReplicaMixin), and only until something writes: after a write, the
+    rest of the request reads from the primary. Everything else, including
+    reads inside a transaction, stays on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = get_replicas()
+        if not state or not state.replica_depth or state.wrote or not replicas:
+            return None
+        if connections["default"].in_atomic_block:
+            return None
+        if state.replica is None:
+            # One replica per request, so its reads see a single point in time.
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
+
+
+class replica_reads:
+    """
+    Context manager that lets reads go to a read replica.
+    Does nothing for a user who wrote within DB_REPLICA_STICKY_SECONDS, so
+    they always see their own changes.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self.token = None
+        self.state = None
+
+    def __enter__(self):
+        if not get_replicas() or is_pinned_to_primary(self.user):
+            return self
+        self.state = _state.get()
+        if self.state is None:
+            self.state = RoutingState()
+            self.token = _state.set(self.state)
+        self.state.replica_depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.state is not None:
+            self.state.replica_depth -= 1
+        if self.token is not None:
+            _state.reset(self.token)
+        self.state = self.token = None
+        return False
+
+
+def use_read_replica(func):
+    """
+    Runs a service method with replica reads. The user whose recent writes
+    must stay visible is taken from the service's auth_user.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        user = getattr(args[0], "auth_user", None) if args else None
+        with replica_reads(user):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReadReplicaMixin:
+    """
+    For DRF views: GET/HEAD/OPTIONS requests read from a replica once the
+    user is authenticated. Put it before APIView in the bases.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self.replica_reads = replica_reads(request.user).__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        reads = getattr(self, "replica_reads", None)
+        if reads is not None:
+            reads.__exit__(None, None, None)
+            self.replica_reads = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Tracks writes per request. When an authenticated user's request wrote to
+    the primary, their reads skip the replicas for DB_REPLICA_STICKY_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        user = getattr(request, "user", None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user)
+        return response
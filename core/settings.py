@@ -68,6 +68,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,13 +99,86 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# SQLite by default, in WAL mode with synchronous=NORMAL so reads do not block
+# on the writer and commits skip a full fsync. Transactions take the write lock
+# when they begin (transaction_mode=IMMEDIATE): a deferred transaction that
+# reads and then writes cannot wait for a concurrent writer and fails at once
+# with "database is locked", while an immediate one waits for the lock.
+#
+# DB_ENGINE=postgresql selects the production profile: every worker process
+# keeps its own psycopg pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections,
+# so size DB_POOL_MAX_SIZE to the threads per worker and keep
+# workers x DB_POOL_MAX_SIZE under the server's max_connections. With
+# DB_POOL_ENABLED=false, connections are kept open for DB_CONN_MAX_AGE seconds
+# instead. Either way a broken connection is detected before it is reused.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite").lower()
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 600))
+DB_POOL_ENABLED = (os.getenv("DB_POOL_ENABLED") or "True").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", os.getenv("WEB_THREADS", 4)))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DB_OPTIONS = {}
+    if DB_POOL_ENABLED:
+        from psycopg_pool import ConnectionPool
+
+        DB_OPTIONS["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+            "check": ConnectionPool.check_connection,
+        }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "ride_hailing"),
+            'USER': os.getenv("DB_USER", "postgres"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            # Pooled connections go back to the pool after each request;
+            # Django refuses to also keep them open itself.
+            'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': DB_OPTIONS,
+        }
     }
-}
+
+    # Read replicas: a comma-separated list of hosts streaming from the primary.
+    # Each gets its own pool and is mirrored to the primary in tests.
+    for index, host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), 1):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            'HOST': host.strip(),
+            'OPTIONS': dict(DB_OPTIONS),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Views and services that opt in (core.db_router.ReadReplicaMixin and
+# use_read_replica) read from DATABASE_REPLICAS. A user who wrote in the last
+# DB_REPLICA_STICKY_SECONDS reads from the primary so replica lag never hides
+# their own changes.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica_")]
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 10))
 
 
 # Password validation
@@ -189,6 +263,92 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_DEFAULT_QUEUE = "ride-app"
+CELERY_BEAT_SCHEDULE = {
+    "refresh-speed-profiles": {
+        "task": "business.tasks.refresh_speed_profiles_queue",
+        "schedule": 60 * 60,
+    },
+    "archive-trips": {
+        "task": "business.tasks.archive_trips_queue",
+        "schedule": 24 * 60 * 60,
+    },
+}
+
+# Audit events are buffered in-process and written with bulk_create every
+# ACTIVITY_LOG_BATCH_SIZE events or ACTIVITY_LOG_FLUSH_INTERVAL_MS milliseconds.
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", 100))
+ACTIVITY_LOG_FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL_MS", 2000))
+ACTIVITY_LOG_USE_CELERY = (os.getenv("ACTIVITY_LOG_USE_CELERY") or "False").lower() == "true"
+
+# Geocoding provider (Nominatim). Lookups share one bounded thread pool and a
+# token bucket of GEOCODER_RATE_LIMIT requests/second with GEOCODER_RATE_BURST burst.
+GEOCODER_MAX_WORKERS = int(os.getenv("GEOCODER_MAX_WORKERS", 8))
+GEOCODER_TIMEOUT = float(os.getenv("GEOCODER_TIMEOUT", 5))
+GEOCODER_RATE_LIMIT = float(os.getenv("GEOCODER_RATE_LIMIT", 1))
+GEOCODER_RATE_BURST = int(os.getenv("GEOCODER_RATE_BURST", 2))
+
+# The token bucket lives in Redis so every worker shares it. Callers wait at most
+# GEOCODER_RATE_LIMIT_WAIT seconds for a token, transient errors are retried
+# GEOCODER_RETRIES times, and GEOCODER_BREAKER_THRESHOLD consecutive failures open
+# the circuit for GEOCODER_BREAKER_RESET_SECONDS. While the provider is skipped,
+# names resolve from the cache or the gazetteer; a trip whose ends cannot be
+# resolved at all is rejected.
+GEOCODER_RATE_LIMIT_WAIT = float(os.getenv("GEOCODER_RATE_LIMIT_WAIT", 1))
+GEOCODER_RETRIES = int(os.getenv("GEOCODER_RETRIES", 1))
+GEOCODER_BREAKER_THRESHOLD = int(os.getenv("GEOCODER_BREAKER_THRESHOLD", 5))
+GEOCODER_BREAKER_RESET_SECONDS = float(os.getenv("GEOCODER_BREAKER_RESET_SECONDS", 30))
+GEOCODE_CACHE_TIMEOUT = int(os.getenv("GEOCODE_CACHE_TIMEOUT", 60 * 60 * 24 * 30))
+
+# Autocomplete serves the gazetteer plus the canonical addresses the provider
+# returns, keeping the PLACE_INDEX_MAX_PLACES most recently used of the latter.
+PLACE_INDEX_MAX_PLACES = int(os.getenv("PLACE_INDEX_MAX_PLACES", 10000))
+
+# Reverse-geocoded addresses are cached per geohash cell. Precision 7 is roughly
+# 150 m x 150 m; lower it to widen the cells and raise the hit rate.
+REVERSE_GEOCODE_PRECISION = int(os.getenv("REVERSE_GEOCODE_PRECISION", 7))
+REVERSE_GEOCODE_CACHE_TIMEOUT = int(os.getenv("REVERSE_GEOCODE_CACHE_TIMEOUT", 60 * 60 * 24 * 90))
+
+# Offline road graph used for driving distance and ETA, built with the
+# build_road_graph command. Without it, distances are straight-line times
+# ROUTING_DETOUR_FACTOR at ROUTING_FALLBACK_SPEED_KMH.
+ROUTING_GRAPH_PATH = os.getenv("ROUTING_GRAPH_PATH")
+ROUTING_CACHE_SIZE = int(os.getenv("ROUTING_CACHE_SIZE", 10000))
+ROUTING_MAX_SNAP_METERS = float(os.getenv("ROUTING_MAX_SNAP_METERS", 500))
+ROUTING_DETOUR_FACTOR = float(os.getenv("ROUTING_DETOUR_FACTOR", 1.0))
+ROUTING_FALLBACK_SPEED_KMH = float(os.getenv("ROUTING_FALLBACK_SPEED_KMH", 25))
+
+# Pickup ETAs use average speeds per geohash zone (ETA_ZONE_PRECISION, ~5 km
+# at 5) and hour of day, learned from completed trips. Buckets with fewer than
+# ETA_MIN_SAMPLES trips fall back to the city-wide hour, then ETA_DEFAULT_SPEED_KMH.
+ETA_ZONE_PRECISION = int(os.getenv("ETA_ZONE_PRECISION", 5))
+ETA_MIN_SAMPLES = int(os.getenv("ETA_MIN_SAMPLES", 5))
+ETA_DEFAULT_SPEED_KMH = float(os.getenv("ETA_DEFAULT_SPEED_KMH", 20))
+ETA_DETOUR_FACTOR = float(os.getenv("ETA_DETOUR_FACTOR", 1.3))
+ETA_TABLE_CHECK_SECONDS = int(os.getenv("ETA_TABLE_CHECK_SECONDS", 60))
+
+# Zone lookups are served from an in-process index. Saving or deleting a Zone
+# bumps a shared version; other processes notice within ZONE_INDEX_CHECK_SECONDS
+# and rebuild in the background.
+ZONE_INDEX_CHECK_SECONDS = int(os.getenv("ZONE_INDEX_CHECK_SECONDS", 30))
+
+# Completed and canceled trips that ended more than TRIP_ARCHIVE_AFTER_DAYS ago
+# are moved to the archive tables, TRIP_ARCHIVE_BATCH_SIZE trips per transaction.
+TRIP_ARCHIVE_AFTER_DAYS = int(os.getenv("TRIP_ARCHIVE_AFTER_DAYS", 90))
+TRIP_ARCHIVE_BATCH_SIZE = int(os.getenv("TRIP_ARCHIVE_BATCH_SIZE", 500))
+
+# Paginated lists count exactly while the table has at most
+# PAGINATION_EXACT_COUNT_LIMIT rows. Above that, unfiltered lists report the
+# planner's row estimate and filtered lists reuse a count cached per filter
+# for PAGINATION_COUNT_CACHE_SECONDS.
+PAGINATION_EXACT_COUNT_LIMIT = int(os.getenv("PAGINATION_EXACT_COUNT_LIMIT", 10000))
+PAGINATION_COUNT_CACHE_SECONDS = int(os.getenv("PAGINATION_COUNT_CACHE_SECONDS", 60))
+
+# User, role and permission search. PostgreSQL uses the pg_trgm indexes; other
+# databases use an in-process index that returns the SEARCH_MAX_RESULTS best
+# matches (list responses report `search_limit` when more matched) and is
+# rebuilt within SEARCH_INDEX_CHECK_SECONDS of a change made by another process.
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 1000))
+SEARCH_INDEX_CHECK_SECONDS = int(os.getenv("SEARCH_INDEX_CHECK_SECONDS", 30))
 
 APP_ENC_KEY = os.getenv("APP_ENC_KEY")
 APP_ENC_VEC = os.getenv("APP_ENC_VEC")
@@ -94,7 +94,9 @@ class Activity(AppDbModel):
     )
     activity_type = models.CharField(max_length=255, null=True)
     note = models.TextField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Buffered events are written after the fact, so the time they happened is
+    # passed in explicitly; auto_now_add would stamp the flush instead.
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return "{} by {} - {}".format(self.activity_type, self.user, self.note)
@@ -0,0 +1,162 @@
+import atexit
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from crm.models import Activity
+from services.log import AppLogger
+
+
+class ActivityLogBuffer:
+    """
+    In-process queue for audit events.
+
+    Events are appended on the request thread (a list append under a lock) and
+    persisted off-thread with a single ``bulk_create`` every ``batch_size``
+    events or ``flush_interval_ms`` milliseconds, whichever comes first.
+    Pending events are drained when the worker exits.
+    """
+
+    def __init__(self, batch_size=None, flush_interval_ms=None, use_celery=None):
+        self.batch_size = batch_size or getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", 100)
+        self.flush_interval_ms = flush_interval_ms or getattr(
+            settings, "ACTIVITY_LOG_FLUSH_INTERVAL_MS", 2000
+        )
+        if use_celery is None:
+            use_celery = getattr(settings, "ACTIVITY_LOG_USE_CELERY", False)
+        self.use_celery = use_celery
+
+        self._events: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def enqueue(self, user, activity_type, note=None):
+        user_id = getattr(user, "pk", None)
+        if not user_id:
+            # Activity.user is required; anonymous actions are not audited.
+            return
+
+        event = {
+            "user_id": str(user_id),
+            "activity_type": getattr(activity_type, "value", activity_type),
+            "note": note,
+            # ISO string so the event survives the JSON round trip through Celery.
+            "created_at": timezone.now().isoformat(),
+        }
+
+        with self._lock:
+            self._events.append(event)
+            pending = len(self._events)
+
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def flush(self) -> int:
+        """Persist everything currently buffered. Returns the number of events handed off."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+
+            if not events:
+                return 0
+
+            if self.use_celery:
+                from crm.tasks import persist_activity_log_queue
+
+                try:
+                    persist_activity_log_queue.delay(events)
+                    return len(events)
+                except Exception as e:
+                    # Broker unavailable, fall back to writing in-process.
+                    AppLogger.report(e)
+
+            return self.persist(events)
+
+    @classmethod
+    def persist(cls, events: List[dict]) -> int:
+        from accounts.models import User
+
+        # Users can be hard-deleted between enqueue and flush; drop their events
+        # rather than failing the whole batch on the foreign key.
+        user_ids = {event["user_id"] for event in events}
+        existing_ids = {
+            str(pk) for pk in User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+        }
+
+        activities = [
+            Activity(
+                user_id=event["user_id"],
+                activity_type=event["activity_type"],
+                note=event["note"],
+                created_at=parse_datetime(event["created_at"]) if event.get("created_at") else timezone.now(),
+            )
+            for event in events
+            if event["user_id"] in existing_ids
+        ]
+
+        try:
+            Activity.objects.bulk_create(activities, batch_size=500)
+        except Exception as e:
+            AppLogger.report(e)
+            return 0
+
+        return len(activities)
+
+    def stop(self):
+        """Stop the background flusher and drain whatever is still buffered."""
+        self._stopped.set()
+        self._wakeup.set()
+        worker = self._worker
+        if worker and worker.is_alive() and worker is not threading.current_thread():
+            worker.join(timeout=self.flush_interval_ms / 1000.0 + 5)
+        self.flush()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopped.clear()
+            self._worker = threading.Thread(
+                target=self._run, name="activity-log-flusher", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        interval = self.flush_interval_ms / 1000.0
+        last_flush = time.monotonic()
+
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=interval)
+            self._wakeup.clear()
+
+            due = time.monotonic() - last_flush >= interval
+            if not due and self.pending() < self.batch_size:
+                continue
+
+            try:
+                self.flush()
+            except Exception as e:
+                AppLogger.report(e)
+            finally:
+                close_old_connections()
+                last_flush = time.monotonic()
+
+
+activity_log = ActivityLogBuffer()
+atexit.register(activity_log.stop)
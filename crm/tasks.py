@@ -0,0 +1,15 @@
+from celery import app
+
+from services.log import AppLogger
+
+
+@app.shared_task
+def persist_activity_log_queue(events):
+    if not events:
+        return 0
+
+    from crm.services.activity import ActivityLogBuffer
+
+    saved = ActivityLogBuffer.persist(events)
+    AppLogger.print(f"Persisted {saved} of {len(events)} activity events")
+    return saved
@@ -0,0 +1,94 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import TextChoices
+
+from services.log import AppLogger
+
+ESTIMATE_CACHE_KEY = "count:estimate:{db}:{table}"
+FILTERED_COUNT_CACHE_KEY = "count:filtered:{digest}"
+
+
+class CountStrategy(TextChoices):
+    exact = "exact"
+    estimate = "estimate"
+    cached = "cached"
+
+
+def table_row_estimate(model, using="default"):
+    """
+    Approximate number of rows in the model's table, without reading it:
+    the planner statistics on PostgreSQL, the highest rowid on SQLite.
+    None when the database offers neither (or has not analyzed the table).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+
+    # reltuples is -1 until the table is first analyzed.
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def cached_table_row_estimate(model, using="default"):
+    timeout = getattr(settings, "PAGINATION_COUNT_CACHE_SECONDS", 60)
+    key = ESTIMATE_CACHE_KEY.format(db=using, table=model._meta.db_table)
+    estimate = cache.get(key)
+    if estimate is None:
+        estimate = table_row_estimate(model, using)
+        if estimate is not None:
+            cache.set(key, estimate, timeout=timeout)
+    return estimate
+
+
+def filtered_count_key(queryset):
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    digest = hashlib.sha1(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    return FILTERED_COUNT_CACHE_KEY.format(digest=digest)
+
+
+def count_queryset(queryset):
+    """
+    Row count for a paginated list and the strategy that produced it:
+
+    - exact: the table holds at most PAGINATION_EXACT_COUNT_LIMIT rows, so
+      COUNT(*) is cheap.
+    - estimate: a large table listed without filters; the planner's row
+      estimate stands in for the count.
+    - cached: a filtered list over a large table; COUNT(*) runs once per
+      distinct filter and is reused for PAGINATION_COUNT_CACHE_SECONDS.
+
+    Falls back to an exact count when the estimate or cache is unavailable.
+    """
+    try:
+        estimate = cached_table_row_estimate(queryset.model, queryset.db)
+    except Exception as e:
+        AppLogger.report(error=e)
+        estimate = None
+
+    if estimate is None or estimate <= getattr(settings, "PAGINATION_EXACT_COUNT_LIMIT", 10000):
+        return queryset.count(), CountStrategy.exact
+
+    if not queryset.query.where:
+        return estimate, CountStrategy.estimate
+
+    try:
+        key = filtered_count_key(queryset)
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, timeout=getattr(settings, "PAGINATION_COUNT_CACHE_SECONDS", 60))
+        return total, CountStrategy.cached
+    except Exception as e:
+        AppLogger.report(error=e)
+        return queryset.count(), CountStrategy.exact
@@ -0,0 +1,58 @@
+import re
+
+# Approximate centroids (latitude, longitude) of places riders commonly ask for.
+# Used when the geocoding provider is throttled or unavailable, and as seed data
+# for the local place index.
+LAGOS_GAZETTEER = {
+    "Abule Ijesha": (6.5150, 3.3770),
+    "Abule Oja": (6.5180, 3.3830),
+    "Abule Okuta": (6.5440, 3.3900),
+    "Ajah": (6.4698, 3.5852),
+    "Akoka": (6.5270, 3.3890),
+    "Apapa": (6.4489, 3.3590),
+    "Bariga": (6.5392, 3.3889),
+    "Fadeyi": (6.5300, 3.3680),
+    "Festac Town": (6.4664, 3.2832),
+    "Gbagada": (6.5540, 3.3880),
+    "Idi Araba": (6.5190, 3.3520),
+    "Idi Oro": (6.5250, 3.3590),
+    "Igbobi": (6.5335, 3.3717),
+    "Ikeja": (6.6018, 3.3515),
+    "Ikorodu": (6.6194, 3.5105),
+    "Ikoyi": (6.4541, 3.4344),
+    "Ilupeju": (6.5530, 3.3570),
+    "Iwaya": (6.5080, 3.3860),
+    "Lagos Island": (6.4541, 3.3947),
+    "Lekki": (6.4474, 3.4723),
+    "Maryland": (6.5700, 3.3670),
+    "Murtala Muhammed International Airport": (6.5774, 3.3212),
+    "Mushin": (6.5273, 3.3414),
+    "Ojota": (6.5870, 3.3790),
+    "Onike": (6.5110, 3.3800),
+    "Onipan": (6.5390, 3.3620),
+    "Oshodi": (6.5550, 3.3439),
+    "Shomolu": (6.5400, 3.3790),
+    "Surulere": (6.4969, 3.3481),
+    "University of Lagos": (6.5158, 3.3898),
+    "Victoria Island": (6.4281, 3.4219),
+    "Yaba": (6.5095, 3.3711),
+}
+
+_SUFFIXES = re.compile(r",\s*(lagos( state)?|nigeria)\s*$")
+
+
+def normalize_place_name(name):
+    name = re.sub(r"\s+", " ", str(name or "").strip().lower())
+    previous = None
+    while previous != name:
+        previous = name
+        name = _SUFFIXES.sub("", name).strip(" ,")
+    return name
+
+
+_INDEX = {normalize_place_name(name): coords for name, coords in LAGOS_GAZETTEER.items()}
+
+
+def lookup_place(name):
+    """Returns (latitude, longitude) for a known place, or None."""
+    return _INDEX.get(normalize_place_name(name))
@@ -0,0 +1,370 @@
+import asyncio
+import threading
+import time
+from enum import Enum
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+
+from services.log import AppLogger
+
+
+def get_geocoder_setting(name, default):
+    if not settings.configured:
+        return default
+    return getattr(settings, name, default)
+
+
+class GeocoderThrottled(Exception):
+    """No request token became available within the allowed wait."""
+
+
+class GeocoderCircuitOpen(Exception):
+    """The provider is failing and calls are short-circuited."""
+
+
+class RateLimiter:
+    """
+    Thread-safe in-process token bucket. ``rate`` tokens are added per second
+    up to ``burst``; ``acquire`` blocks until a token is available or the
+    timeout runs out.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Takes a token if one is available. Returns seconds to wait otherwise (0 on success)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+
+            return (1 - self._tokens) / self.rate if self.rate > 0 else 1
+
+    def acquire(self, timeout=None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_for = self.try_acquire()
+            if not wait_for:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+
+class RedisTokenBucket(RateLimiter):
+    """
+    Token bucket whose state lives in Redis, so every worker shares one budget
+    against the provider. Falls back to the in-process bucket when the cache
+    backend is not Redis or Redis cannot be reached.
+    """
+
+    SCRIPT = """
+    local key = KEYS[1]
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'updated_at', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    retry_redis_after = 30
+
+    def __init__(self, name, rate, burst=1):
+        super().__init__(rate, burst)
+        self.key = cache.make_key(f"ratelimit:{name}")
+        self._script = None
+        self._redis_down_until = 0
+
+    def _get_script(self):
+        if self._script is None:
+            client = cache._cache.get_client(self.key, write=True)
+            self._script = client.register_script(self.SCRIPT)
+        return self._script
+
+    def try_acquire(self):
+        if not hasattr(cache, "_cache") or not hasattr(cache._cache, "get_client"):
+            return super().try_acquire()
+
+        if time.monotonic() < self._redis_down_until:
+            return super().try_acquire()
+
+        try:
+            return float(self._get_script()(keys=[self.key], args=[self.rate, self.burst]))
+        except Exception as e:
+            AppLogger.warning(f"Shared rate limiter unavailable, using local bucket: {e}")
+            self._redis_down_until = time.monotonic() + self.retry_redis_after
+            return super().try_acquire()
+
+
+class CircuitState(Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_timeout`` seconds have passed, a single probe call is let through
+    (half-open). A successful probe closes the circuit and a failed one opens
+    it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.closed:
+                return True
+
+            if self.state == CircuitState.open:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._transition(CircuitState.half_open)
+
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            if self.state != CircuitState.closed:
+                self._transition(CircuitState.closed)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == CircuitState.half_open or (
+                self.state == CircuitState.closed and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._transition(CircuitState.open)
+
+    def _transition(self, state):
+        AppLogger.warning(f"Circuit '{self.name}': {self.state.value} -> {state.value}")
+        self.state = state
+
+
+class GeocoderMetrics:
+    """In-process counters for the geocoding path."""
+
+    FIELDS = [
+        "requests",
+        "provider_calls",
+        "provider_successes",
+        "provider_failures",
+        "retries",
+        "throttled",
+        "short_circuited",
+        "cache_hits",
+        "reverse_cache_hits",
+        "gazetteer_hits",
+        "unresolved",
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {field: 0 for field in self.FIELDS}
+            self._provider_latency_ms = 0.0
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            self._counters[field] += amount
+
+    def observe_latency(self, seconds):
+        with self._lock:
+            self._provider_latency_ms += seconds * 1000
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            calls = data["provider_calls"]
+            data["avg_provider_latency_ms"] = (
+                round(self._provider_latency_ms / calls, 2) if calls else 0
+            )
+        return data
+
+
+class ProviderGuard:
+    """
+    Wraps calls to an external provider with a shared rate limit, retries on
+    transient errors and a circuit breaker. Raises GeocoderThrottled or
+    GeocoderCircuitOpen instead of calling the provider when it should not be
+    called; callers fall back to local data in that case.
+    """
+
+    def __init__(self, name, rate_limiter, breaker, metrics, max_wait=1.0, retries=1,
+                 retry_backoff=0.2):
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.metrics = metrics
+        self.max_wait = max_wait
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+    def paced(self):
+        """
+        A guard sharing this one's rate limit, circuit and metrics that waits
+        for a token for as long as it takes, for batch jobs that should go at
+        the provider's pace rather than be throttled.
+        """
+        return ProviderGuard(
+            self.name, self.rate_limiter, self.breaker, self.metrics,
+            max_wait=None, retries=self.retries, retry_backoff=self.retry_backoff,
+        )
+
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._check_breaker()
+            self._take_token(self.rate_limiter.acquire(timeout=self.max_wait))
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(e, attempt, time.monotonic() - started):
+                    raise
+                attempt += 1
+                time.sleep(self.retry_backoff * attempt)
+                continue
+
+            self._record_success(time.monotonic() - started)
+            return result
+
+    async def acall(self, func, *args, **kwargs):
+        """Same as call, for coroutine providers. The token wait runs off the event loop."""
+        attempt = 0
+        while True:
+            self._check_breaker()
+            acquired = await sync_to_async(self.rate_limiter.acquire, thread_sensitive=False)(
+                timeout=self.max_wait
+            )
+            self._take_token(acquired)
+            started = time.monotonic()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(e, attempt, time.monotonic() - started):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self.retry_backoff * attempt)
+                continue
+
+            self._record_success(time.monotonic() - started)
+            return result
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self.metrics.incr("short_circuited")
+            raise GeocoderCircuitOpen(self.name)
+
+    def _take_token(self, acquired):
+        if not acquired:
+            # Nothing was sent, so a half-open probe slot is handed back untouched.
+            self.breaker.release_probe()
+            self.metrics.incr("throttled")
+            raise GeocoderThrottled(self.name)
+
+        self.metrics.incr("provider_calls")
+
+    def _record_success(self, elapsed):
+        self.metrics.observe_latency(elapsed)
+        self.metrics.incr("provider_successes")
+        self.breaker.record_success()
+
+    def _should_retry(self, error, attempt, elapsed):
+        self.metrics.observe_latency(elapsed)
+        self.metrics.incr("provider_failures")
+        self.breaker.record_failure()
+
+        if not isinstance(error, (GeocoderTimedOut, GeocoderUnavailable)) or attempt >= self.retries:
+            return False
+
+        self.metrics.incr("retries")
+        return True
+
+
+geocoder_metrics = GeocoderMetrics()
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_geocoding_guard() -> ProviderGuard:
+    """Process-wide guard in front of the geocoding provider."""
+    global _guard
+    if _guard is None:
+        with _guard_lock:
+            if _guard is None:
+                _guard = ProviderGuard(
+                    "geocoder",
+                    rate_limiter=RedisTokenBucket(
+                        "geocoder",
+                        rate=get_geocoder_setting("GEOCODER_RATE_LIMIT", 1.0),
+                        burst=get_geocoder_setting("GEOCODER_RATE_BURST", 2),
+                    ),
+                    breaker=CircuitBreaker(
+                        "geocoder",
+                        failure_threshold=get_geocoder_setting("GEOCODER_BREAKER_THRESHOLD", 5),
+                        reset_timeout=get_geocoder_setting("GEOCODER_BREAKER_RESET_SECONDS", 30),
+                    ),
+                    metrics=geocoder_metrics,
+                    max_wait=get_geocoder_setting("GEOCODER_RATE_LIMIT_WAIT", 1.0),
+                    retries=get_geocoder_setting("GEOCODER_RETRIES", 1),
+                )
+    return _guard
@@ -0,0 +1,75 @@
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE_MAP = {char: index for index, char in enumerate(_BASE32)}
+
+
+def encode(latitude, longitude, precision=7):
+    """
+    Encodes a coordinate as a geohash of ``precision`` characters.
+    Precision 7 is a cell of roughly 150 m x 150 m, precision 5 about 5 km.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def decode_bounds(geohash):
+    """Returns ((min_lat, min_lon), (max_lat, max_lon)) of the cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash.lower():
+        value = _DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return (lat_range[0], lon_range[0]), (lat_range[1], lon_range[1])
+
+
+def decode(geohash):
+    """Returns the (latitude, longitude) centre of the cell."""
+    (min_lat, min_lon), (max_lat, max_lon) = decode_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+
+def snap(latitude, longitude, precision=7):
+    """Returns (geohash, cell centre) for a coordinate."""
+    geohash = encode(latitude, longitude, precision)
+    return geohash, decode(geohash)
@@ -1,46 +1,375 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from geopy.adapters import AioHTTPAdapter
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+
+from core.errors.app_errors import OperationError
+from services import geohash
+from services.cache_util import CacheUtil
+from services.gazetteer import lookup_place
+from services.geocoding_guard import (
+    CircuitState,
+    GeocoderCircuitOpen,
+    GeocoderThrottled,
+    geocoder_metrics,
+    get_geocoder_setting,
+    get_geocoding_guard,
+)
+from services.log import AppLogger
+from services.place_index import get_place_index
+from services.routing import get_routing_service
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_geocoding_executor() -> ThreadPoolExecutor:
+    """Bounded pool shared by every LocationService in the process."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_geocoder_setting("GEOCODER_MAX_WORKERS", 8),
+                    thread_name_prefix="geocoder",
+                )
+    return _executor
+
+
+def geocode_cache_key(location_name):
+    return CacheUtil.generate_cache_key("geocode", location_name)
+
+
+def read_cached_coordinates(location_name):
+    try:
+        coords = cache.get(geocode_cache_key(location_name))
+    except Exception as e:
+        AppLogger.report(error=e)
+        return None
+
+    if coords:
+        geocoder_metrics.incr("cache_hits")
+        return tuple(coords)
+    return None
+
+
+def cache_coordinates(location_name, coords):
+    try:
+        CacheUtil.set_cache_value(
+            geocode_cache_key(location_name),
+            tuple(coords),
+            timeout=get_geocoder_setting("GEOCODE_CACHE_TIMEOUT", 60 * 60 * 24 * 30),
+        )
+    except Exception as e:
+        AppLogger.report(error=e)
+
+
+def resolve_locally(location_name):
+    """Last step of the fallback chain: the bundled gazetteer."""
+    coords = lookup_place(location_name)
+    if coords:
+        geocoder_metrics.incr("gazetteer_hits")
+    else:
+        geocoder_metrics.incr("unresolved")
+    return coords
+
+
+def get_reverse_geocode_precision():
+    return get_geocoder_setting("REVERSE_GEOCODE_PRECISION", 7)
+
+
+def reverse_geocode_cache_key(cell):
+    return CacheUtil.generate_cache_key("reverse-geocode", cell)
+
+
+def read_cached_address(cell):
+    try:
+        address = cache.get(reverse_geocode_cache_key(cell))
+    except Exception as e:
+        AppLogger.report(error=e)
+        return None
+
+    if address:
+        geocoder_metrics.incr("reverse_cache_hits")
+    return address
+
+
+def cache_address(cell, address):
+    try:
+        CacheUtil.set_cache_value(
+            reverse_geocode_cache_key(cell),
+            address,
+            timeout=get_geocoder_setting("REVERSE_GEOCODE_CACHE_TIMEOUT", 60 * 60 * 24 * 90),
+        )
+    except Exception as e:
+        AppLogger.report(error=e)
+
+
+def route_between(loc1, loc2, coords1, coords2):
+    """
+    ((distance_km, start_coords, end_coords), None) for two resolved ends,
+    routed over the road graph (straight-line when no graph is loaded), or
+    (None, OperationError) naming the locations that could not be resolved.
+    """
+    unresolved = [name for name, coords in ((loc1, coords1), (loc2, coords2)) if not coords]
+    if unresolved:
+        return None, OperationError(message=f"Location could not be resolved: {', '.join(unresolved)}")
+    return (get_routing_service().route(coords1, coords2).distance_km, coords1, coords2), None
+
 
 class LocationService:
-    def __init__(self, user_agent="location_service"):
+    def __init__(self, user_agent="location_service", timeout=None):
         self.geolocator = Nominatim(user_agent=user_agent)
+        self.timeout = timeout or get_geocoder_setting("GEOCODER_TIMEOUT", 5)
+
+    def get_coordinates(self, location_name, timeout=None, guard=None):
+        """
+        Returns the latitude and longitude of a given location name.
+
+        Looks in the cache first, then asks the provider through the shared rate
+        limiter and circuit breaker, and finally falls back to the gazetteer.
+        Returns None when nothing matches.
+        """
+        geocoder_metrics.incr("requests")
+        coords = read_cached_coordinates(location_name)
+        if not coords:
+            coords = self.fetch_coordinates(location_name, timeout=timeout, guard=guard)
+            if coords:
+                cache_coordinates(location_name, coords)
+            else:
+                coords = resolve_locally(location_name)
+
+        if coords:
+            get_place_index().record_hit(location_name)
+        return coords
+
+    def fetch_coordinates(self, location_name, timeout=None, guard=None):
+        """
+        Asks the provider only, indexing the canonical address it returns.
+        Returns None when it is throttled, unavailable or has no match.
+        """
+        try:
+            location = (guard or get_geocoding_guard()).call(
+                self.geolocator.geocode, location_name, timeout=timeout or self.timeout
+            )
+        except (GeocoderThrottled, GeocoderCircuitOpen):
+            return None
+        except Exception as e:
+            AppLogger.report(error=e)
+            return None
 
-    def get_coordinates(self, location_name):
-        """Returns the latitude and longitude of a given location name."""
-        location = self.geolocator.geocode(location_name)
         if location:
+            get_place_index().insert(location.address, location.latitude, location.longitude)
             return location.latitude, location.longitude
         else:
             return None
 
+    def get_coordinates_many(self, names, timeout=None) -> dict:
+        """
+        Resolves several location names concurrently on the shared geocoding pool.
+
+        Duplicate names are looked up once, and every lookup still goes through
+        the shared rate limiter. Lookups that have not finished when ``timeout``
+        seconds elapse are cancelled and answered from the gazetteer instead.
+        Returns a dict mapping each name to (latitude, longitude) or None.
+        """
+        timeout = timeout or self.timeout
+        unique_names = list(dict.fromkeys(name for name in names if name))
+        if not unique_names:
+            return {}
+
+        def resolve(name):
+            try:
+                return self.get_coordinates(name, timeout=timeout)
+            except Exception as e:
+                AppLogger.report(e)
+                return None
+
+        executor = get_geocoding_executor()
+        futures = {name: executor.submit(resolve, name) for name in unique_names}
+        done, not_done = wait(futures.values(), timeout=timeout)
+
+        for future in not_done:
+            future.cancel()
+
+        return {
+            name: future.result() if future in done else resolve_locally(name)
+            for name, future in futures.items()
+        }
+
+    def get_coordinates_paced(self, names, retries=3) -> dict:
+        """
+        Resolves location names one at a time, for batch jobs. Provider calls
+        wait for a rate-limiter token for as long as it takes, where the
+        request path gives up after GEOCODER_RATE_LIMIT_WAIT, so a large batch
+        goes out at the shared rate instead of being throttled. A name that
+        comes back unresolved while the circuit is open is retried once the
+        circuit lets a probe through, up to ``retries`` times.
+        Returns a dict mapping each name to (latitude, longitude) or None.
+        """
+        guard = get_geocoding_guard().paced()
+        coordinates = {}
+        for name in dict.fromkeys(name for name in names if name):
+            coords = self.get_coordinates(name, guard=guard)
+            for _ in range(retries):
+                if coords or guard.breaker.state == CircuitState.closed:
+                    break
+                time.sleep(guard.breaker.reset_timeout)
+                coords = self.get_coordinates(name, guard=guard)
+            coordinates[name] = coords
+        return coordinates
+
     def get_location_name(self, latitude, longitude):
-        """Returns the location name from given latitude and longitude."""
-        location = self.geolocator.reverse((latitude, longitude), language='en', exactly_one=True)
+        """
+        Returns the location name from given latitude and longitude.
+
+        The point is snapped to a geohash cell (REVERSE_GEOCODE_PRECISION
+        characters, about 150 m at 7) and the address is cached per cell, so
+        nearby lookups are answered without calling the provider.
+        """
+        cell, centre = geohash.snap(float(latitude), float(longitude), get_reverse_geocode_precision())
+        address = read_cached_address(cell)
+        if address:
+            return address
+
+        address = self.fetch_location_name(*centre)
+        if address:
+            cache_address(cell, address)
+        return address
+
+    def fetch_location_name(self, latitude, longitude, timeout=None):
+        """Reverse-geocodes with the provider only. Returns None when it is throttled, unavailable or has no match."""
+        try:
+            location = get_geocoding_guard().call(
+                self.geolocator.reverse,
+                (latitude, longitude),
+                language='en',
+                exactly_one=True,
+                timeout=timeout or self.timeout,
+            )
+        except (GeocoderThrottled, GeocoderCircuitOpen):
+            return None
+        except Exception as e:
+            AppLogger.report(error=e)
+            return None
+
         if location:
             return location.address
         else:
             return None
 
-    def calculate_distance(self, loc1, loc2, by_name=True):
+    def warm_location_names(self, points, max_throttled=10) -> dict:
+        """
+        Pre-fills the reverse-geocode cache for a list of (latitude, longitude)
+        points, e.g. known pickup hotspots. Points are grouped into cells of
+        REVERSE_GEOCODE_PRECISION, the precision lookups read, and only cells
+        that are not cached yet are sent to the provider.
+
+        Lookups run one after another: they all draw from the same shared
+        provider budget, so running them in parallel would only queue on the
+        rate limiter. Stops early when the circuit opens.
+        """
+        precision = get_reverse_geocode_precision()
+        cells = {}
+        for latitude, longitude in points:
+            cell, centre = geohash.snap(float(latitude), float(longitude), precision)
+            cells.setdefault(cell, centre)
+
+        cached = cache.get_many([reverse_geocode_cache_key(cell) for cell in cells])
+        missing = [cell for cell in cells if reverse_geocode_cache_key(cell) not in cached]
+        summary = {"cells": len(cells), "cached": len(cells) - len(missing), "resolved": 0, "failed": 0}
+
+        guard = get_geocoding_guard()
+        throttled = 0
+        for cell in missing:
+            while True:
+                try:
+                    location = guard.call(
+                        self.geolocator.reverse,
+                        cells[cell],
+                        language='en',
+                        exactly_one=True,
+                        timeout=self.timeout,
+                    )
+                except GeocoderThrottled:
+                    throttled += 1
+                    if throttled > max_throttled:
+                        return summary
+                    continue
+                except GeocoderCircuitOpen:
+                    return summary
+                except Exception as e:
+                    AppLogger.report(error=e)
+                    location = None
+                break
+
+            if location:
+                cache_address(cell, location.address)
+                summary["resolved"] += 1
+            else:
+                summary["failed"] += 1
+
+        return summary
+
+    def calculate_distance(self, loc1, loc2, by_name=True, concurrent=True):
         """
         Determines the distance between two locations.
-        - If by_name is True, loc1 and loc2 should be location names.
+        - If by_name is True, loc1 and loc2 should be location names. With
+          concurrent=True (default) both names are geocoded in parallel, so the
+          latency is that of the slower lookup rather than the sum of both.
         - Otherwise, loc1 and loc2 should be tuples of (latitude, longitude).
+
+        Returns None when either location cannot be resolved.
         """
-        if by_name:
-            coords1 = self.get_coordinates(loc1)
-            coords2 = self.get_coordinates(loc2)
+        if by_name and concurrent:
+            route, error = self.resolve_route(loc1, loc2)
+            return None if error else route[0]
+        elif by_name:
+            coords1, coords2 = self.get_coordinates(loc1), self.get_coordinates(loc2)
         else:
             coords1, coords2 = loc1, loc2
 
         if coords1 and coords2:
-            return geodesic(coords1, coords2).kilometers
+            return get_routing_service().route(coords1, coords2).distance_km
         else:
             return None
 
+    def resolve_route(self, loc1, loc2):
+        """
+        Geocodes both ends of a trip concurrently and returns
+        ((distance_km, start_coords, end_coords), None), or (None, OperationError)
+        when the provider, cache and gazetteer cannot resolve an end.
+        """
+        coordinates = self.get_coordinates_many([loc1, loc2])
+        return route_between(loc1, loc2, coordinates.get(loc1), coordinates.get(loc2))
+
     def search_places(self, query, limit=10):
-        """Searches for places matching the query and returns their details."""
-        results = self.geolocator.geocode(query, exactly_one=False)
+        """
+        Searches for places matching the query and returns their details.
+
+        Answers from the local place index when it has matches. Otherwise asks
+        the provider for at most ``limit`` results and adds them to the index so
+        the next keystrokes are served locally.
+        """
+        places = get_place_index().search(query, limit=limit)
+        if places:
+            return places
+
+        try:
+            results = get_geocoding_guard().call(
+                self.geolocator.geocode, query, exactly_one=False, limit=limit, timeout=self.timeout
+            )
+        except (GeocoderThrottled, GeocoderCircuitOpen):
+            return None
+        except Exception as e:
+            AppLogger.report(error=e)
+            return None
+
         if results:
             places = []
             for result in results[:limit]:
@@ -49,12 +378,94 @@ class LocationService:
                     'latitude': result.latitude,
                     'longitude': result.longitude
                 }
+                get_place_index().insert(result.address, result.latitude, result.longitude)
                 places.append(place)
             return places
         else:
             return None
 
 
+class AsyncLocationService:
+    """
+    Non-blocking counterpart of LocationService for async views.
+
+    Uses geopy's aiohttp adapter so geocoder round-trips do not hold a worker
+    thread, and resolves both ends of a trip concurrently.
+    """
+
+    def __init__(self, user_agent="location_service"):
+        self.user_agent = user_agent
+
+    def get_geolocator(self):
+        return Nominatim(user_agent=self.user_agent, adapter_factory=AioHTTPAdapter)
+
+    async def get_coordinates(self, location_name, geolocator=None):
+        """
+        Returns the latitude and longitude of a given location name, with the
+        same cache, provider guard and gazetteer chain as LocationService.
+        """
+        if geolocator is None:
+            async with self.get_geolocator() as geolocator:
+                return await self.get_coordinates(location_name, geolocator)
+
+        geocoder_metrics.incr("requests")
+        coords = await sync_to_async(read_cached_coordinates)(location_name)
+        if not coords:
+            coords = await self.resolve_uncached(location_name, geolocator)
+
+        if coords:
+            get_place_index().record_hit(location_name)
+        return coords
+
+    async def resolve_uncached(self, location_name, geolocator):
+        """Asks the provider, then the gazetteer. Returns None when neither matches."""
+        try:
+            location = await get_geocoding_guard().acall(
+                geolocator.geocode,
+                location_name,
+                timeout=get_geocoder_setting("GEOCODER_TIMEOUT", 5),
+            )
+        except (GeocoderThrottled, GeocoderCircuitOpen):
+            location = None
+        except Exception as e:
+            AppLogger.report(error=e)
+            location = None
+
+        if location:
+            coords = location.latitude, location.longitude
+            await sync_to_async(cache_coordinates)(location_name, coords)
+            get_place_index().insert(location.address, *coords)
+            return coords
+
+        return resolve_locally(location_name)
+
+    async def calculate_distance(self, loc1, loc2, by_name=True):
+        """
+        Async version of LocationService.calculate_distance. When by_name is True
+        both names are geocoded at the same time with asyncio.gather.
+        """
+        if by_name:
+            route, error = await self.resolve_route(loc1, loc2)
+            return None if error else route[0]
+        else:
+            coords1, coords2 = loc1, loc2
+
+        if coords1 and coords2:
+            return get_routing_service().route(coords1, coords2).distance_km
+        else:
+            return None
+
+
+    async def resolve_route(self, loc1, loc2):
+        """Async version of LocationService.resolve_route."""
+        async with self.get_geolocator() as geolocator:
+            coords1, coords2 = await asyncio.gather(
+                self.get_coordinates(loc1, geolocator),
+                self.get_coordinates(loc2, geolocator),
+            )
+        return route_between(loc1, loc2, coords1, coords2)
+
+
 # Example Usage
 if __name__ == "__main__":
     service = LocationService()
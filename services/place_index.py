@@ -0,0 +1,167 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from services.gazetteer import LAGOS_GAZETTEER, normalize_place_name
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlaceIndex:
+    """
+    In-memory autocomplete index over place names.
+
+    Every word of a name is indexed by all of its prefixes, so a query matches
+    places where each query word starts one of the place's words. When that
+    finds fewer than ``limit`` places, names are also matched by trigram
+    similarity to tolerate typos. Results are ranked by match quality and then
+    by popularity, which grows each time a place is picked or resolved.
+
+    Places added with ``pinned=True`` (the gazetteer) stay for the life of the
+    index. Once more than ``max_places`` others are indexed, the one picked or
+    resolved least recently is evicted.
+    """
+
+    def __init__(self, min_similarity=0.3, max_prefix_length=20, max_places=None):
+        self.min_similarity = min_similarity
+        self.max_prefix_length = max_prefix_length
+        self.max_places = max_places
+        self._places = {}
+        self._prefixes = {}
+        self._trigrams = {}
+        self._recent = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._places)
+
+    def insert(self, name, latitude, longitude, popularity=0, pinned=False):
+        """Adds a place, or bumps its popularity when it is already indexed."""
+        key = normalize_place_name(name)
+        if not key:
+            return
+
+        with self._lock:
+            place = self._places.get(key)
+            if place:
+                place["popularity"] += popularity
+                self._touch(key)
+                return
+
+            self._places[key] = {
+                "name": name,
+                "latitude": latitude,
+                "longitude": longitude,
+                "popularity": popularity,
+            }
+            for word in key.split():
+                for length in range(1, min(len(word), self.max_prefix_length) + 1):
+                    self._prefixes.setdefault(word[:length], set()).add(key)
+            for gram in trigrams(key):
+                self._trigrams.setdefault(gram, set()).add(key)
+
+            if not pinned:
+                self._recent[key] = None
+                while self.max_places is not None and len(self._recent) > self.max_places:
+                    self._remove(self._recent.popitem(last=False)[0])
+
+    def record_hit(self, name, amount=1):
+        key = normalize_place_name(name)
+        with self._lock:
+            place = self._places.get(key)
+            if place:
+                place["popularity"] += amount
+                self._touch(key)
+
+    def _touch(self, key):
+        if key in self._recent:
+            self._recent.move_to_end(key)
+
+    def _remove(self, key):
+        del self._places[key]
+        for word in key.split():
+            for length in range(1, min(len(word), self.max_prefix_length) + 1):
+                self._discard(self._prefixes, word[:length], key)
+        for gram in trigrams(key):
+            self._discard(self._trigrams, gram, key)
+
+    @staticmethod
+    def _discard(postings, token, key):
+        keys = postings.get(token)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del postings[token]
+
+    def search(self, query, limit=10):
+        """Returns up to ``limit`` places as dicts with name, latitude and longitude."""
+        query = normalize_place_name(query)
+        if not query or limit <= 0:
+            return []
+
+        with self._lock:
+            matches = self._prefix_matches(query)
+            ranked = sorted(
+                matches,
+                key=lambda key: (not key.startswith(query), -self._places[key]["popularity"], len(key)),
+            )
+
+            if len(ranked) < limit:
+                seen = set(ranked)
+                ranked += [key for key in self._fuzzy_matches(query) if key not in seen]
+
+            return [
+                {
+                    "name": self._places[key]["name"],
+                    "latitude": self._places[key]["latitude"],
+                    "longitude": self._places[key]["longitude"],
+                }
+                for key in ranked[:limit]
+            ]
+
+    def _prefix_matches(self, query):
+        matches = None
+        for word in query.split():
+            keys = self._prefixes.get(word[:self.max_prefix_length], set())
+            if len(word) > self.max_prefix_length:
+                keys = {key for key in keys if word in key}
+            matches = set(keys) if matches is None else matches & keys
+            if not matches:
+                return set()
+        return matches
+
+    def _fuzzy_matches(self, query):
+        query_grams = trigrams(query)
+        overlap = {}
+        for gram in query_grams:
+            for key in self._trigrams.get(gram, ()):
+                overlap[key] = overlap.get(key, 0) + 1
+
+        scored = []
+        for key, shared in overlap.items():
+            similarity = shared / (len(query_grams) + len(trigrams(key)) - shared)
+            if similarity >= self.min_similarity:
+                scored.append((-similarity, -self._places[key]["popularity"], key))
+
+        return [key for _, _, key in sorted(scored)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_place_index() -> PlaceIndex:
+    """Process-wide index, seeded with the gazetteer on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = PlaceIndex(max_places=getattr(settings, "PLACE_INDEX_MAX_PLACES", 10000))
+                for name, (latitude, longitude) in LAGOS_GAZETTEER.items():
+                    index.insert(name, latitude, longitude, pinned=True)
+                _index = index
+    return _index
@@ -0,0 +1,396 @@
+import gzip
+import heapq
+import json
+import math
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from geopy.distance import geodesic
+
+from services.log import AppLogger
+
+EARTH_RADIUS_M = 6371008.8
+
+Route = namedtuple("Route", ["distance_km", "duration_min", "on_road"])
+
+# Free-flow speeds (km/h) used when an OSM way has no usable maxspeed tag.
+DEFAULT_SPEEDS_KMH = {
+    "motorway": 90,
+    "motorway_link": 50,
+    "trunk": 70,
+    "trunk_link": 40,
+    "primary": 50,
+    "primary_link": 35,
+    "secondary": 40,
+    "secondary_link": 30,
+    "tertiary": 30,
+    "tertiary_link": 25,
+    "unclassified": 25,
+    "residential": 20,
+    "living_street": 10,
+    "service": 15,
+}
+
+
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class RoadGraph:
+    """
+    Directed road graph in compressed sparse row form.
+
+    The outgoing edges of node ``n`` are ``offsets[n]`` to ``offsets[n + 1]`` in
+    ``targets``, ``lengths`` (metres) and ``times`` (seconds). Node coordinates
+    are kept in ``lats`` / ``lons`` and bucketed on a coarse grid to snap
+    arbitrary points to the nearest node.
+    """
+
+    GRID_DEGREES = 0.005
+
+    def __init__(self, lats, lons, offsets, targets, lengths, times):
+        self.lats = array("d", lats)
+        self.lons = array("d", lons)
+        self.offsets = array("l", offsets)
+        self.targets = array("l", targets)
+        self.lengths = array("d", lengths)
+        self.times = array("d", times)
+
+        speeds = [length / time for length, time in zip(self.lengths, self.times) if time > 0]
+        self.max_speed_ms = max(speeds) if speeds else 1.0
+
+        self._grid = {}
+        for node, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            self._grid.setdefault(self._cell(lat, lon), []).append(node)
+
+    def __len__(self):
+        return len(self.lats)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    @classmethod
+    def from_edges(cls, nodes, edges):
+        """
+        Builds the graph from a list of (lat, lon) nodes and (source, target,
+        length_m, time_s) edges.
+        """
+        outgoing = [[] for _ in nodes]
+        for source, target, length, time in edges:
+            outgoing[source].append((target, length, time))
+
+        offsets, targets, lengths, times = [0], [], [], []
+        for node_edges in outgoing:
+            for target, length, time in node_edges:
+                targets.append(target)
+                lengths.append(length)
+                times.append(time)
+            offsets.append(len(targets))
+
+        return cls(
+            [lat for lat, _ in nodes], [lon for _, lon in nodes], offsets, targets, lengths, times
+        )
+
+    @classmethod
+    def from_osm(cls, path, speeds=None):
+        """
+        Reads an OSM XML extract and keeps the drivable ways. Edge times come
+        from maxspeed when it is tagged and from ``speeds`` (highway -> km/h)
+        otherwise.
+        """
+        speeds = speeds or DEFAULT_SPEEDS_KMH
+        coordinates = {}
+        ways = []
+
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                coordinates[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway in speeds:
+                    refs = [nd.get("ref") for nd in element.iter("nd")]
+                    ways.append((refs, tags, speeds[highway]))
+                element.clear()
+
+        node_ids = {}
+        nodes = []
+        edges = []
+
+        def node_index(ref):
+            if ref not in node_ids:
+                node_ids[ref] = len(nodes)
+                nodes.append(coordinates[ref])
+            return node_ids[ref]
+
+        for refs, tags, default_speed in ways:
+            refs = [ref for ref in refs if ref in coordinates]
+            speed_ms = parse_maxspeed(tags.get("maxspeed"), default_speed) / 3.6
+            oneway = tags.get("oneway")
+            if tags.get("junction") == "roundabout" and oneway is None:
+                oneway = "yes"
+            if oneway == "-1":
+                refs = list(reversed(refs))
+
+            for first, second in zip(refs, refs[1:]):
+                source, target = node_index(first), node_index(second)
+                length = haversine_m(*nodes[source], *nodes[target])
+                edges.append((source, target, length, length / speed_ms))
+                if oneway not in ("yes", "true", "1", "-1"):
+                    edges.append((target, source, length, length / speed_ms))
+
+        return cls.from_edges(nodes, edges)
+
+    def save(self, path):
+        payload = {
+            "version": 1,
+            "lats": list(self.lats),
+            "lons": list(self.lons),
+            "offsets": list(self.offsets),
+            "targets": list(self.targets),
+            "lengths": [round(value, 2) for value in self.lengths],
+            "times": [round(value, 2) for value in self.times],
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(payload, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            payload = json.load(file)
+        return cls(
+            payload["lats"],
+            payload["lons"],
+            payload["offsets"],
+            payload["targets"],
+            payload["lengths"],
+            payload["times"],
+        )
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.GRID_DEGREES)), int(math.floor(lon / self.GRID_DEGREES))
+
+    def nearest_node(self, lat, lon, max_distance_m=500):
+        """Closest node within ``max_distance_m`` metres, or None."""
+        row, col = self._cell(lat, lon)
+        cell_m = self.GRID_DEGREES * 111000 * max(math.cos(math.radians(lat)), 0.1)
+        rings = int(max_distance_m / cell_m) + 1
+
+        # Equirectangular distance is accurate to well under a metre at these ranges.
+        lon_scale = math.cos(math.radians(lat))
+        lats, lons = self.lats, self.lons
+        best, best_distance = None, max_distance_m
+        for ring in range(rings + 1):
+            for d_row in range(-ring, ring + 1):
+                for d_col in range(-ring, ring + 1):
+                    if max(abs(d_row), abs(d_col)) != ring:
+                        continue
+                    for node in self._grid.get((row + d_row, col + d_col), ()):
+                        distance = METRES_PER_DEGREE * math.hypot(
+                            lats[node] - lat, (lons[node] - lon) * lon_scale
+                        )
+                        if distance <= best_distance:
+                            best, best_distance = node, distance
+            # Anything in a further ring is at least ``ring`` cells away.
+            if best is not None and ring * cell_m >= best_distance:
+                break
+        return best
+
+    def shortest_path(self, source, target):
+        """
+        Fastest path from ``source`` to ``target`` with A*, using straight-line
+        distance at the graph's top speed as the (admissible) heuristic.
+        Returns (length_m, time_s) or None when ``target`` is unreachable.
+        """
+        if source == target:
+            return 0.0, 0.0
+
+        lats, lons = self.lats, self.lons
+        offsets, targets, lengths, times = self.offsets, self.targets, self.lengths, self.times
+        target_lat, target_lon = lats[target], lons[target]
+        lon_scale = math.cos(math.radians(target_lat))
+        # Planar distance, shrunk slightly so it never overestimates the great-circle one.
+        seconds_per_degree = METRES_PER_DEGREE * 0.995 / self.max_speed_ms
+        hypot = math.hypot
+
+        best_time = {source: 0.0}
+        best_length = {source: 0.0}
+        settled = set()
+        heap = [(0.0, 0.0, source)]
+
+        while heap:
+            _, time, node = heapq.heappop(heap)
+            if node == target:
+                return best_length[node], time
+            if node in settled:
+                continue
+            settled.add(node)
+
+            length = best_length[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[edge]
+                new_time = time + times[edge]
+                if new_time < best_time.get(neighbour, math.inf):
+                    best_time[neighbour] = new_time
+                    best_length[neighbour] = length + lengths[edge]
+                    estimate = seconds_per_degree * hypot(
+                        lats[neighbour] - target_lat, (lons[neighbour] - target_lon) * lon_scale
+                    )
+                    heapq.heappush(heap, (new_time + estimate, new_time, neighbour))
+
+        return None
+
+    def one_to_many(self, source, targets):
+        """
+        Dijkstra from ``source`` that stops once every node in ``targets`` is
+        settled. Returns {target: (length_m, time_s)} for the reachable ones.
+        """
+        remaining = set(targets)
+        found = {}
+        best_time = {source: 0.0}
+        best_length = {source: 0.0}
+        settled = set()
+        heap = [(0.0, source)]
+
+        offsets, edge_targets, lengths, times = self.offsets, self.targets, self.lengths, self.times
+        while heap and remaining:
+            time, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node in remaining:
+                remaining.discard(node)
+                found[node] = (best_length[node], time)
+
+            length = best_length[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = edge_targets[edge]
+                new_time = time + times[edge]
+                if new_time < best_time.get(neighbour, math.inf):
+                    best_time[neighbour] = new_time
+                    best_length[neighbour] = length + lengths[edge]
+                    heapq.heappush(heap, (new_time, neighbour))
+
+        return found
+
+
+def parse_maxspeed(value, default):
+    if not value:
+        return default
+    try:
+        speed = float(value.split()[0])
+    except (ValueError, IndexError):
+        return default
+    if "mph" in value:
+        speed *= 1.609
+    return speed if speed > 0 else default
+
+
+class RoutingService:
+    """
+    Driving distance and ETA between coordinates.
+
+    Points are snapped to the nearest graph node and routed with A*; results
+    are kept in an LRU cache keyed by the snapped node pair, so nearby pickups
+    share cached routes. Without a graph (or when a point is off the network)
+    the straight-line distance times ROUTING_DETOUR_FACTOR is returned at
+    ROUTING_FALLBACK_SPEED_KMH, with ``on_road`` set to False.
+    """
+
+    def __init__(self, graph=None, cache_size=None):
+        self.graph = graph
+        self.max_snap_m = getattr(settings, "ROUTING_MAX_SNAP_METERS", 500)
+        self.detour_factor = getattr(settings, "ROUTING_DETOUR_FACTOR", 1.0)
+        self.fallback_speed_kmh = getattr(settings, "ROUTING_FALLBACK_SPEED_KMH", 25)
+        self._route_nodes = lru_cache(
+            maxsize=cache_size or getattr(settings, "ROUTING_CACHE_SIZE", 10000)
+        )(self._route_between_nodes)
+
+    def snap(self, point):
+        if self.graph is None or not point:
+            return None
+        return self.graph.nearest_node(point[0], point[1], max_distance_m=self.max_snap_m)
+
+    def route(self, start, end) -> Route:
+        """Route between two (latitude, longitude) points."""
+        source, target = self.snap(start), self.snap(end)
+        if source is not None and target is not None:
+            result = self._route_nodes(source, target)
+            if result:
+                return Route(result[0] / 1000, result[1] / 60, True)
+
+        return self.estimate(start, end)
+
+    def matrix(self, origins, destinations):
+        """
+        Many-to-many routes for dispatch: ``result[i][j]`` is the Route from
+        ``origins[i]`` to ``destinations[j]``. Runs one bounded Dijkstra per
+        distinct origin node instead of a search per pair.
+        """
+        origin_nodes = [self.snap(point) for point in origins]
+        destination_nodes = [self.snap(point) for point in destinations]
+        reachable_targets = {node for node in destination_nodes if node is not None}
+
+        searches = {}
+        for node in set(origin_nodes):
+            if node is not None and reachable_targets:
+                searches[node] = self.graph.one_to_many(node, reachable_targets)
+
+        result = []
+        for origin, origin_node in zip(origins, origin_nodes):
+            row = []
+            for destination, destination_node in zip(destinations, destination_nodes):
+                found = searches.get(origin_node, {}).get(destination_node)
+                if found is not None:
+                    row.append(Route(found[0] / 1000, found[1] / 60, True))
+                else:
+                    row.append(self.estimate(origin, destination))
+            result.append(row)
+        return result
+
+    def estimate(self, start, end) -> Route:
+        distance_km = geodesic(start, end).kilometers * self.detour_factor
+        return Route(distance_km, distance_km / self.fallback_speed_kmh * 60, False)
+
+    def cache_info(self):
+        return self._route_nodes.cache_info()
+
+    def _route_between_nodes(self, source, target):
+        return self.graph.shortest_path(source, target)
+
+
+_routing_service = None
+_routing_lock = threading.Lock()
+
+
+def get_routing_service() -> RoutingService:
+    """
+    Process-wide RoutingService. The graph is read once from ROUTING_GRAPH_PATH;
+    when the setting is empty or the file cannot be read, routes are estimated.
+    """
+    global _routing_service
+    if _routing_service is None:
+        with _routing_lock:
+            if _routing_service is None:
+                graph = None
+                path = getattr(settings, "ROUTING_GRAPH_PATH", None)
+                if path:
+                    try:
+                        graph = RoadGraph.load(path)
+                    except (OSError, ValueError, KeyError) as e:
+                        AppLogger.warning(f"Road graph could not be loaded from {path}: {e}")
+                _routing_service = RoutingService(graph)
+    return _routing_service
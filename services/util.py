@@ -14,6 +14,7 @@ from uuid import UUID, uuid4
 
 import phonenumbers
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import AnonymousUser
@@ -26,16 +27,21 @@ from django.utils.crypto import get_random_string
 from django.utils.html import strip_tags
 from django.utils.text import slugify
 from django.utils.timezone import is_aware, make_aware
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.exceptions import APIException
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from accounts.models import UserTypes
 from core.decorators import CustomApiPermissionRequired
 from core.errors.app_errors import OperationError
 from services.cache_util import CacheUtil
+from services.counting import CountStrategy, count_queryset
 from services.encryption_util import AESCipher
 from services.log import AppLogger
 
@@ -176,9 +182,7 @@ class DecimalEncoder(json.JSONEncoder):
             return str(o)
         if isinstance(o, decimal.Decimal):
             return str(o)
-        if isinstance(o, datetime):
-            return o.isoformat()
-        if isinstance(o, date):
+        if isinstance(o, (datetime.datetime, date)):
             return o.isoformat()
         elif hasattr(o, "__dict__"):
             return o.__dict__.get("name", "")
@@ -209,6 +213,8 @@ def render_template_to_text(message, data=dict):
 
 class CustomAPIRequestUtil(DefaultPagination, CacheUtil):
     serializer_class = None
+    count_strategy = CountStrategy.exact
+    search_limit = None
 
     def __init__(self, request=None):
         self.request = request
@@ -231,9 +237,11 @@ class CustomAPIRequestUtil(DefaultPagination, CacheUtil):
         return UserTypes.admin == getattr(self.auth_user, "user_type", None)
 
     def report_activity(self, activity_type, data, description=None):
+        from crm.services.activity import activity_log
+
         if not description:
             description = str(activity_type) + " records related to " + str(data)
-        print(self.auth_user, activity_type, data, description)
+        activity_log.enqueue(self.auth_user, activity_type, description)
 
     def make_error(self, error: str):
         return OperationError(self.request, message=error)
@@ -253,6 +261,11 @@ class CustomAPIRequestUtil(DefaultPagination, CacheUtil):
             self.request, message=error, status_code=status.HTTP_403_FORBIDDEN
         )
 
+    def make_409(self, error: str):
+        return OperationError(
+            self.request, message=error, status_code=status.HTTP_409_CONFLICT
+        )
+
     def make_500(self, exception):
         AppLogger.report(exception)
         return OperationError(
@@ -326,15 +339,44 @@ class CustomAPIRequestUtil(DefaultPagination, CacheUtil):
     def get_paginated_list_response(self, data, count_all):
         return self.__make_pages(self.__get_pagination_data(count_all, data))
 
+    def paginate_with_count(self, queryset):
+        """
+        The current page of `queryset` and its total, counted with
+        count_queryset instead of the COUNT(*) Django's Paginator runs on
+        every request. The strategy used is reported as `count_strategy`,
+        and `search_limit` is set when a keyword search cut matches off. The
+        page number comes from the request's `page` query parameter when
+        there is one, else from `current_page`.
+        """
+        try:
+            page_size = int(self.page_size)
+        except (TypeError, ValueError):
+            page_size = DefaultPagination.page_size
+        if page_size <= 0:
+            page_size = DefaultPagination.page_size
+        self.page_size = min(page_size, self.max_page_size)
+        query_params = getattr(self.request, "query_params", None)
+        page = query_params.get(self.page_query_param) if query_params else None
+        try:
+            page = int(page or self.current_page or 1)
+        except (TypeError, ValueError):
+            page = 1
+        self.current_page = max(page, 1)
+
+        total, self.count_strategy = count_queryset(queryset)
+        self.search_limit = getattr(queryset, "search_limit", None)
+        offset = (self.current_page - 1) * self.page_size
+        return queryset[offset:offset + self.page_size], total
+
     def fetch_list(self, filter_params):
         raise Exception("Not implemented")
 
     def fetch_paginated_list(self, filter_params):
         queryset = self.fetch_list(filter_params=filter_params)
-        page = self.paginate_queryset(queryset, request=self.request)
+        page, total = self.paginate_with_count(queryset)
         data = self.serializer_class(page, many=True).data
 
-        return self.get_paginated_list_response(data, queryset.count())
+        return self.get_paginated_list_response(data, total)
 
     def is_numeric(self, value):
         if value:
@@ -400,6 +442,8 @@ class CustomAPIRequestUtil(DefaultPagination, CacheUtil):
             else last_page,
             "last_page": last_page,
             "total": total,
+            "count_strategy": self.count_strategy,
+            "search_limit": self.search_limit,
             "next_page_url": next_page_url,
             "prev_page_url": prev_page_url,
             "data": data,
@@ -555,6 +599,162 @@ class CustomApiRequestProcessorBase(
         return self.response_with_json(response_data)
 
 
+class AsyncCustomApiRequestProcessorBase(
+    View, CustomAPIRequestUtil, CustomAPIResponseUtil
+):
+    """
+    Async counterpart of CustomApiRequestProcessorBase for views served over ASGI.
+
+    DRF's APIView dispatches synchronously, so these views are plain Django
+    class-based views with ``async def`` handlers. Authentication, permission
+    checks and serializer validation run through ``sync_to_async``; the target
+    function is awaited and its ``(data, error)`` tuple is turned into the same
+    response shape the sync views produce.
+    """
+
+    authentication_classes = None
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = None
+    context: Union[dict, None] = None
+
+    response_serializer = None
+    response_serializer_requires_many = False
+    wrap_response_in_data_object = False
+
+    current_page = 1
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated API, same as DRF's APIView.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    @property
+    def auth_user(self):
+        user = getattr(self.request, "user", None)
+        if isinstance(user, AnonymousUser):
+            return None
+        return user
+
+    def perform_authentication(self, request):
+        request.user, request.auth = AnonymousUser(), None
+        authentication_classes = self.authentication_classes
+        if authentication_classes is None:
+            authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+        for authentication_class in authentication_classes:
+            result = authentication_class().authenticate(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+
+    def check_permissions(self, request):
+        for permission_class in self.permission_classes:
+            if not permission_class().has_permission(request, self):
+                return False
+        return True
+
+    def get_request_data(self, request):
+        if request.method == "GET" or not request.body:
+            return {}
+
+        request_data = json.loads(request.body)
+        if settings.APP_ENC_ENABLED:
+            encryption_util = AESCipher(settings.APP_ENC_KEY, settings.APP_ENC_VEC)
+            request_data = encryption_util.decrypt_body(request_data)
+        return request_data
+
+    def finalize(self, response):
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {"request": self.request, "view": self}
+        return response
+
+    async def process_request(self, request, target_function, **extra_args):
+        try:
+            await sync_to_async(self.perform_authentication)(request)
+        except APIException as e:
+            return self.finalize(
+                self.response_with_message(str(e.detail), status_code=e.status_code)
+            )
+
+        if not await sync_to_async(self.check_permissions)(request):
+            return self.finalize(
+                self.response_with_message(
+                    "Authentication credentials were not provided.",
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                )
+            )
+
+        if not self.context:
+            self.context = dict()
+        self.context["request"] = request
+
+        try:
+            if self.serializer_class:
+                if request.method == "GET":
+                    request_data = request.GET.dict()
+                else:
+                    try:
+                        request_data = self.get_request_data(request)
+                    except ValueError:
+                        return self.finalize(
+                            self._handle_request_response(
+                                (None, self.make_400("Request body is not valid JSON"))
+                            )
+                        )
+
+                serializer = self.serializer_class(
+                    data=request_data or dict(), context=self.context
+                )
+                if not await sync_to_async(serializer.is_valid)():
+                    return self.finalize(self.validation_error(serializer.errors))
+
+                response_raw_data = await target_function(
+                    serializer.validated_data, **extra_args
+                )
+            else:
+                response_raw_data = await target_function(**extra_args)
+
+            return self.finalize(
+                await sync_to_async(self._handle_request_response)(response_raw_data)
+            )
+        except Exception as e:
+            AppLogger.report(e)
+
+            response_data = {"error": str(e), "message": "Server error"}
+            return self.finalize(
+                self.response_with_json(
+                    response_data, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            )
+
+    def _handle_request_response(self, response_raw_data):
+        response_data, error_detail = None, None
+        if isinstance(response_raw_data, tuple):
+            response_data, error_detail = response_raw_data
+        else:
+            response_data = response_raw_data
+
+        if error_detail:
+            status_code = None
+            if isinstance(error_detail, OperationError):
+                status_code = error_detail.get_status_code()
+                error_detail = error_detail.get_message()
+
+            return self.response_with_error(error_detail, status_code=status_code)
+
+        if self.response_serializer is not None:
+            response_data = self.response_serializer(
+                response_data, many=self.response_serializer_requires_many
+            ).data
+
+        if self.wrap_response_in_data_object:
+            response_data = {"data": response_data}
+
+        return self.response_with_json(response_data)
+
+
 def generate_password():
     letters = "".join(
         (random.choice(string.ascii_letters) for _ in range(random.randint(10, 15)))
@@ -0,0 +1,96 @@
+"""
+Per-endpoint request budgets for the view tests.
+
+A test case using RequestBudgetMixin lists a Budget for each URL name in
+`budgets` and wraps the request under test in assertWithinBudget. The
+request fails the test when it runs more SQL queries, makes more cache
+calls or takes longer than its budget, so an N+1 query or a new blocking
+call shows up in CI instead of in production.
+
+Budgets are for a warm process: load process-wide tables (speed table, zone
+and search indexes) in setUp so the budgeted request measures steady state.
+Wall time is only meaningful on the stub stack (in-memory cache, stubbed
+geocoding and mail), and TEST_BUDGET_TIME_SCALE stretches it on slow
+machines.
+"""
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# The public cache API. Calls made from inside another one (get_or_set
+# calling get and add, decr calling incr) are not counted again.
+CACHE_METHODS = (
+    "add", "get", "set", "touch", "delete", "get_many", "has_key", "incr", "decr",
+    "set_many", "delete_many", "clear", "get_or_set",
+)
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int
+    cache_calls: int
+    seconds: float = 0.25
+
+
+@contextmanager
+def count_cache_calls(alias="default"):
+    """Yields the list of cache methods called on `alias` while the block runs."""
+    calls = []
+    backend = type(caches[alias])
+    nesting = threading.local()
+
+    def counted(name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            depth = getattr(nesting, "depth", 0)
+            if not depth:
+                calls.append(name)
+            nesting.depth = depth + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                nesting.depth = depth
+
+        return wrapper
+
+    with ExitStack() as stack:
+        for name in CACHE_METHODS:
+            stack.enter_context(mock.patch.object(backend, name, counted(name, getattr(backend, name))))
+        yield calls
+
+
+class RequestBudgetMixin:
+    budgets = {}
+
+    def time_scale(self):
+        return float(os.getenv("TEST_BUDGET_TIME_SCALE", 1))
+
+    @contextmanager
+    def assertWithinBudget(self, name):
+        budget = self.budgets[name]
+        with CaptureQueriesContext(connection) as queries, count_cache_calls() as cache_calls:
+            started = time.perf_counter()
+            yield
+            elapsed = time.perf_counter() - started
+
+        self.assertLessEqual(
+            len(queries), budget.queries,
+            f"{name} ran {len(queries)} queries, budget {budget.queries}:\n"
+            + "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        self.assertLessEqual(
+            len(cache_calls), budget.cache_calls,
+            f"{name} made {len(cache_calls)} cache calls, budget {budget.cache_calls}: {cache_calls}",
+        )
+        seconds = budget.seconds * self.time_scale()
+        self.assertLessEqual(
+            elapsed, seconds, f"{name} took {elapsed * 1000:.0f} ms, budget {seconds * 1000:.0f} ms"
+        )
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from crm.constants import ActivityType
+from crm.models import Activity
+from crm.services.activity import ActivityLogBuffer
+from crm.tasks import persist_activity_log_queue
+
+User = get_user_model()
+
+
+class ActivityLogBufferTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="audituser", email="audituser@gmail.com", password="Password@1234"
+        )
+        # A long interval keeps the background flusher idle so the test drives flushes.
+        self.buffer = ActivityLogBuffer(batch_size=50, flush_interval_ms=60000, use_celery=False)
+
+    def tearDown(self):
+        self.buffer.stop()
+
+    def test_enqueue_does_not_write_until_flush(self):
+        self.buffer.enqueue(self.user, ActivityType.update, "updated profile")
+        self.buffer.enqueue(self.user, ActivityType.delete, "deleted driver")
+
+        self.assertEqual(self.buffer.pending(), 2)
+        self.assertEqual(Activity.objects.count(), 0)
+
+        with self.assertNumQueries(2):
+            saved = self.buffer.flush()
+
+        self.assertEqual(saved, 2)
+        self.assertEqual(self.buffer.pending(), 0)
+        self.assertEqual(
+            sorted(Activity.objects.values_list("activity_type", flat=True)),
+            ["delete", "update"],
+        )
+
+    def test_anonymous_and_deleted_users_are_skipped(self):
+        self.buffer.enqueue(None, ActivityType.create, "anonymous")
+        self.assertEqual(self.buffer.pending(), 0)
+
+        ghost = User.objects.create_user(
+            username="ghostuser", email="ghostuser@gmail.com", password="Password@1234"
+        )
+        self.buffer.enqueue(ghost, ActivityType.hard_delete, "ghost")
+        self.buffer.enqueue(self.user, ActivityType.create, "kept")
+        ghost.delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(Activity.objects.get().note, "kept")
+
+    def test_activities_keep_the_time_they_were_enqueued(self):
+        enqueued_at = datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc)
+        with patch("crm.services.activity.timezone.now", return_value=enqueued_at):
+            self.buffer.enqueue(self.user, ActivityType.update, "in process")
+        self.buffer.flush()
+
+        # The Celery path hands the events over as JSON.
+        celery_buffer = ActivityLogBuffer(batch_size=50, flush_interval_ms=60000, use_celery=True)
+        self.addCleanup(celery_buffer.stop)
+        with patch("crm.services.activity.timezone.now", return_value=enqueued_at):
+            celery_buffer.enqueue(self.user, ActivityType.update, "via celery")
+        with patch.object(
+            persist_activity_log_queue,
+            "delay",
+            side_effect=lambda events: persist_activity_log_queue(json.loads(json.dumps(events))),
+        ):
+            celery_buffer.flush()
+
+        self.assertEqual(
+            sorted(Activity.objects.values_list("note", "created_at")),
+            [("in process", enqueued_at), ("via celery", enqueued_at)],
+        )
@@ -5,6 +5,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from business.models import Driver, Trip
 
@@ -31,6 +32,21 @@ class TripViewsTestCase(APITestCase):
         from services.location import LocationService  
         self.original_calculate_distance = LocationService.calculate_distance
         LocationService.calculate_distance = lambda self, start, end: 10
+        self.original_resolve_route = LocationService.resolve_route
+        LocationService.resolve_route = lambda self, start, end: ((10, (6.5158, 3.3898), (6.5392, 3.3889)), None)
+
+        from services.location import AsyncLocationService
+        self.original_async_calculate_distance = AsyncLocationService.calculate_distance
+        self.original_async_resolve_route = AsyncLocationService.resolve_route
+
+        async def calculate_distance(self, start, end):
+            return 10
+
+        async def resolve_route(self, start, end):
+            return (10, (6.5158, 3.3898), (6.5392, 3.3889)), None
+
+        AsyncLocationService.calculate_distance = calculate_distance
+        AsyncLocationService.resolve_route = resolve_route
 
         import business.util
         self.original_get_random_pricing_multipliers = business.util.get_random_pricing_multipliers
@@ -46,12 +62,20 @@ class TripViewsTestCase(APITestCase):
     def tearDown(self):
         from services.location import LocationService  
         LocationService.calculate_distance = self.original_calculate_distance
+        LocationService.resolve_route = self.original_resolve_route
+        from services.location import AsyncLocationService
+        AsyncLocationService.calculate_distance = self.original_async_calculate_distance
+        AsyncLocationService.resolve_route = self.original_async_resolve_route
         import business.util
         business.util.get_random_pricing_multipliers = self.original_get_random_pricing_multipliers
 
     def get_random_string(self, prefix):
         return prefix + ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
 
+    def authenticate_with_jwt(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
     def get_random_email(self, prefix):
         random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
         return f"{prefix}{random_suffix}@gmail.com"
@@ -84,6 +108,12 @@ class TripViewsTestCase(APITestCase):
         except Exception:
             self.fail("Total fare is not a valid number.")
 
+        trip = Trip.objects.get(customer=self.customer)
+        self.assertEqual((trip.start_latitude, trip.start_longitude), (6.5158, 3.3898))
+        self.assertEqual((trip.end_latitude, trip.end_longitude), (6.5392, 3.3889))
+        self.assertEqual(list(Trip.within_bbox(6.5, 3.38, 6.52, 3.40)), [trip])
+        self.assertFalse(Trip.within_bbox(6.5, 3.38, 6.52, 3.40, end=True).exists())
+
     def test_list_driver_trips_view(self):
         """
         Test the ListDriverTripsAPIView endpoint by retrieving trips for a driver.
@@ -133,3 +163,106 @@ class TripViewsTestCase(APITestCase):
         data = response.data.get("data", response.data)
         self.assertIsInstance(data, list)
         self.assertGreaterEqual(len(data), 1)
+
+    def test_async_create_trip_view(self):
+        """
+        The ASGI trip endpoint prices and stores the trip in one insert.
+        """
+        self.authenticate_with_jwt(self.customer)
+        payload = {
+            "driver": str(self.driver.id),
+            "start_location": "University of Lagos",
+            "end_location": "Bariga",
+        }
+        response = self.client.post(reverse("create-trip-async"), payload, format="json")
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK,
+            f"Async create trip failed: {response.content}"
+        )
+        data = response.json()
+        self.assertIn("total", data)
+        self.assertIn("breakdown", data)
+
+        trip = Trip.objects.get(customer=self.customer)
+        self.assertEqual(trip.distance, 10)
+        self.assertEqual(trip.total_fare, Decimal(str(data["total"])))
+
+    def test_create_trip_ignores_client_status_and_timestamp(self):
+        payload = {
+            "driver": str(self.driver.id),
+            "start_location": "University of Lagos",
+            "end_location": "Bariga",
+            "status": "C",
+            "requested_at": "2020-01-01T00:00:00Z",
+        }
+        self.client.force_authenticate(user=self.customer)
+        self.client.post(reverse("create-trip"), payload, format="json")
+        self.client.force_authenticate(user=None)
+        self.authenticate_with_jwt(self.customer)
+        self.client.post(reverse("create-trip-async"), payload, format="json")
+
+        trips = Trip.objects.filter(customer=self.customer)
+        self.assertEqual(trips.count(), 2)
+        for trip in trips:
+            self.assertEqual(trip.status, Trip.STATUS_REQUESTED)
+            self.assertGreater(trip.requested_at.year, 2020)
+
+    def test_create_trip_rejects_unresolved_locations(self):
+        from services.location import LocationService, route_between
+
+        LocationService.resolve_route = lambda self, start, end: route_between(start, end, (6.5158, 3.3898), None)
+        self.client.force_authenticate(user=self.customer)
+        payload = {"driver": str(self.driver.id), "start_location": "University of Lagos", "end_location": "Nowhere"}
+        response = self.client.post(reverse("create-trip"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+        self.assertFalse(Trip.objects.exists())
+
+    def test_async_create_trip_requires_authentication(self):
+        response = self.client.post(reverse("create-trip-async"), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_list_trips_views(self):
+        Trip.objects.create(
+            driver=self.driver,
+            customer=self.customer,
+            start_location="University of Lagos",
+            end_location="Bariga",
+            distance=10,
+            status="R"
+        )
+
+        self.authenticate_with_jwt(self.customer)
+        response = self.client.get(reverse("list-user-trips-async"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(len(response.json()["data"]), 1)
+
+        self.authenticate_with_jwt(self.driver_user)
+        response = self.client.get(reverse("list-driver-trips-async"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(len(response.json()["data"]), 1)
+
+    def test_async_calculate_fare_view(self):
+        payload = {"distance": 10, "traffic_level": "moderate", "demand_level": "peak"}
+        response = self.client.post(reverse("calculate-fare-async"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(response.json()["total_fare"], round((2.5 + 10) * 1.2 * 1.8, 2))
+
+    def test_async_malformed_body_is_rejected(self):
+        response = self.client.post(
+            reverse("calculate-fare-async"), b'{"distance": 10,', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+
+    def test_search_places_view(self):
+        """
+        Test the SearchPlacesAPIView endpoint with a prefix served from the local index.
+        """
+        self.client.force_authenticate(user=self.customer)
+        response = self.client.get(reverse("search-places"), {"q": "yab", "limit": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        data = response.data.get("data", response.data)
+        self.assertEqual(data[0]["name"], "Yaba")
+
+        response = self.client.get(reverse("search-places"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
@@ -0,0 +1,54 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from business.models import Trip
+
+User = get_user_model()
+
+
+class CoordinateColumnsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="coorduser", email="coorduser@gmail.com", password="Password@1234"
+        )
+
+    def test_user_save_copies_address_coord(self):
+        self.user.address_coord = {"lat": "6.5095", "lng": "3.3711"}
+        self.user.save(update_fields=["address_coord"])
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.address_latitude, self.user.address_longitude), (6.5095, 3.3711))
+
+    def test_backfill_geocodes_each_name_once(self):
+        for _ in range(3):
+            Trip.objects.create(
+                customer=self.user, start_location="Yaba", end_location="Atlantis", distance=4
+            )
+
+        resolved = {"Yaba": (6.5095, 3.3711), "Atlantis": None}
+        with patch(
+            "services.location.LocationService.get_coordinates_paced", return_value=resolved
+        ) as get_coordinates_paced:
+            call_command("backfill_coordinates", "--skip-users", stdout=StringIO())
+
+        get_coordinates_paced.assert_called_once()
+        self.assertEqual(
+            set(Trip.objects.values_list("start_latitude", "start_longitude", "end_latitude")),
+            {(6.5095, 3.3711, None)},
+        )
+
+    def test_backfill_handles_one_sided_locations(self):
+        Trip.objects.create(customer=self.user, start_location="Yaba", end_location=None, distance=4)
+        Trip.objects.create(customer=self.user, start_location="", end_location="Atlantis", distance=4)
+
+        resolved = {"Yaba": (6.5095, 3.3711), "Atlantis": None}
+        out = StringIO()
+        with patch("services.location.LocationService.get_coordinates_paced", return_value=resolved):
+            call_command("backfill_coordinates", "--skip-users", stdout=out)
+
+        self.assertIn("Updated 1 trips, 1 trip locations could not be resolved.", out.getvalue())
+        self.assertTrue(Trip.objects.filter(start_latitude=6.5095, end_latitude__isnull=True).exists())
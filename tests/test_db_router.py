@@ -0,0 +1,70 @@
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.db_router import (
+    ReplicaRouter,
+    ReplicaStickinessMiddleware,
+    is_pinned_to_primary,
+    replica_reads,
+    use_read_replica,
+)
+from tests.utils import LOCMEM_CACHE
+
+
+def make_user(pk):
+    return Mock(pk=pk, is_authenticated=True)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, DATABASE_REPLICAS=["replica_1"], DB_REPLICA_STICKY_SECONDS=30)
+class ReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_the_replica_only_when_opted_in(self):
+        self.assertIsNone(self.router.db_for_read(None))
+        with replica_reads(make_user(1)):
+            self.assertEqual(self.router.db_for_read(None), "replica_1")
+        self.assertIsNone(self.router.db_for_read(None))
+
+    def test_a_write_sends_later_reads_to_the_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(None), "default")
+            self.assertIsNone(self.router.db_for_read(None))
+
+    def test_decorator_uses_the_service_user(self):
+        class Service:
+            auth_user = make_user(2)
+
+            @use_read_replica
+            def fetch_list(self):
+                return ReplicaRouter().db_for_read(None)
+
+        self.assertEqual(Service().fetch_list(), "replica_1")
+
+    def test_writing_request_pins_the_user_to_the_primary(self):
+        user = make_user(3)
+        request = Mock(user=user)
+
+        def view(request):
+            self.router.db_for_write(None)
+            return "response"
+
+        self.assertEqual(ReplicaStickinessMiddleware(view)(request), "response")
+
+        self.assertTrue(is_pinned_to_primary(user))
+        with replica_reads(user):
+            self.assertIsNone(self.router.db_for_read(None))
+        with replica_reads(make_user(4)):
+            self.assertEqual(self.router.db_for_read(None), "replica_1")
+
+    def test_reads_inside_a_transaction_stay_on_the_primary(self):
+        with patch("core.db_router.connections") as connections, replica_reads():
+            connections.__getitem__.return_value.in_atomic_block = True
+            self.assertIsNone(self.router.db_for_read(None))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with replica_reads(make_user(5)):
+            self.assertIsNone(self.router.db_for_read(None))
+        self.assertTrue(self.router.allow_migrate("default", "business"))
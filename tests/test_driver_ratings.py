@@ -0,0 +1,114 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from business.models import Driver, Trip, TripReview
+
+User = get_user_model()
+
+
+class DriverRatingTestCase(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="ratecust", email="ratecust@gmail.com", password="Password@1234"
+        )
+        driver_user = User.objects.create_user(
+            username="ratedrv", email="ratedrv@gmail.com", password="Password@1234", user_type="Driver"
+        )
+        self.driver = Driver.objects.create(user=driver_user, license_number="RATE-1")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.customer)
+
+    def create_trip(self, status=Trip.STATUS_COMPLETED, customer=None):
+        return Trip.objects.create(
+            customer=customer or self.customer, driver=self.driver, start_location="Yaba", end_location="Ikeja",
+            distance=9, status=status,
+        )
+
+    def review(self, rating, trip=None):
+        payload = {"trip": (trip or self.create_trip()).id, "rating": rating}
+        return self.client.post(reverse("create-trip-review"), payload, format="json")
+
+    def test_review_updates_driver_totals(self):
+        for rating in (5, 4, 4):
+            response = self.review(rating)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        self.driver.refresh_from_db()
+        self.assertEqual((self.driver.rating_sum, self.driver.rating_count), (13, 3))
+        self.assertEqual(self.driver.rating, Decimal("4.33"))
+
+    def test_reviewer_is_the_requesting_customer(self):
+        other = User.objects.create_user(username="rateother", email="rateother@gmail.com", password="Password@1234")
+        payload = {"trip": self.create_trip().id, "reviewer": other.id, "rating": 5}
+        response = self.client.post(reverse("create-trip-review"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(TripReview.objects.get().reviewer, self.customer)
+
+    def test_only_the_trips_customer_can_review_it(self):
+        other = User.objects.create_user(username="rateother", email="rateother@gmail.com", password="Password@1234")
+        response = self.review(1, trip=self.create_trip(customer=other))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.content)
+        self.assertFalse(TripReview.objects.exists())
+
+    def test_unfinished_trips_cannot_be_reviewed(self):
+        for trip_status in (Trip.STATUS_REQUESTED, Trip.STATUS_IN_PROGRESS, Trip.STATUS_CANCELED):
+            response = self.review(1, trip=self.create_trip(status=trip_status))
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT, response.content)
+
+        self.assertFalse(TripReview.objects.exists())
+
+    def test_a_trip_is_reviewed_once(self):
+        trip = self.create_trip()
+        self.assertEqual(self.review(5, trip=trip).status_code, status.HTTP_200_OK)
+        response = self.review(1, trip=trip)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT, response.content)
+        self.driver.refresh_from_db()
+        self.assertEqual((self.driver.rating_sum, self.driver.rating_count), (5, 1))
+
+    def test_rating_out_of_range_is_rejected(self):
+        response = self.review(6)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(TripReview.objects.exists())
+
+    def test_add_rating_is_a_single_update(self):
+        with self.assertNumQueries(1):
+            Driver.add_rating(self.driver.id, 3)
+
+        self.driver.refresh_from_db()
+        self.assertEqual(self.driver.rating, Decimal("3.00"))
+
+    def test_add_rating_rounds_like_reconcile(self):
+        for rating in (5, 4, 4, 4, 4, 4, 4, 4):
+            TripReview.objects.create(trip=self.create_trip(), reviewer=self.customer, rating=rating)
+            Driver.add_rating(self.driver.id, rating)
+
+        out = StringIO()
+        call_command("reconcile_driver_ratings", "--dry-run", stdout=out)
+
+        self.assertIn("Found 0 with drifted ratings", out.getvalue())
+        self.driver.refresh_from_db()
+        self.assertEqual(self.driver.rating, Decimal("4.13"))
+
+    def test_reconcile_recomputes_drifted_totals(self):
+        for rating in (2, 5):
+            TripReview.objects.create(trip=self.create_trip(), reviewer=self.customer, rating=rating)
+        idle = Driver.objects.create(user=self.customer, license_number="RATE-2", rating_sum=7, rating_count=1)
+
+        out = StringIO()
+        call_command("reconcile_driver_ratings", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Checked 2 drivers. Fixed 2", out.getvalue())
+        self.driver.refresh_from_db()
+        idle.refresh_from_db()
+        self.assertEqual((self.driver.rating_sum, self.driver.rating_count, self.driver.rating), (7, 2, Decimal("3.50")))
+        self.assertEqual((idle.rating_sum, idle.rating_count, idle.rating), (0, 0, Decimal(0)))
@@ -0,0 +1,276 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from email_validator import validate_email
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import RegisterLog
+from api.urls import auth as auth_urls, business as business_urls
+from business.eta import get_speed_table
+from business.models import Driver, Trip
+from services.place_index import get_place_index
+from tests.budgets import Budget, RequestBudgetMixin
+from tests.utils import LOCMEM_CACHE
+
+User = get_user_model()
+
+# PBKDF2 would be most of every auth request's time; the budgets are for our code.
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+PASSWORD = "Password@1234"
+
+# Queries and cache calls are what each request costs today; raise a budget
+# only for a change that needs the extra round trip. Wall time is the
+# Budget default unless noted.
+AUTH_BUDGETS = {
+    # User, roles and permissions for the token claims, then the device update.
+    "login": Budget(queries=6, cache_calls=4),
+    "signup": Budget(queries=4, cache_calls=4),
+    # Creating the profile also clears the user's cached lookups.
+    "customer_registration": Budget(queries=8, cache_calls=11),
+    "driver_registration": Budget(queries=9, cache_calls=11),
+    "register-otp": Budget(queries=0, cache_calls=2),
+    "verify-otp": Budget(queries=9, cache_calls=11),
+    "token-refresh": Budget(queries=1, cache_calls=0),
+    "forgot-password": Budget(queries=5, cache_calls=3),
+    "change-password": Budget(queries=3, cache_calls=2),
+    "change-password-in-app": Budget(queries=3, cache_calls=3),
+}
+
+BUSINESS_BUDGETS = {
+    "create-trip": Budget(queries=8, cache_calls=0),
+    "accept-trip": Budget(queries=5, cache_calls=0),
+    "start-trip": Budget(queries=5, cache_calls=0),
+    # Both daily rollups, each an UPDATE with an INSERT fallback in a savepoint.
+    "complete-trip": Budget(queries=13, cache_calls=0),
+    "cancel-trip": Budget(queries=6, cache_calls=0),
+    "create-trip-review": Budget(queries=7, cache_calls=0),
+    "list-driver-trips": Budget(queries=5, cache_calls=0),
+    "list-user-trips": Budget(queries=4, cache_calls=0),
+    "export-trips": Budget(queries=3, cache_calls=0),
+    "calculate-fare": Budget(queries=0, cache_calls=0),
+    "search-places": Budget(queries=1, cache_calls=0),
+    "pickup-eta": Budget(queries=1, cache_calls=0),
+    "driver-stats": Budget(queries=3, cache_calls=0),
+    "customer-stats": Budget(queries=2, cache_calls=0),
+    "create-trip-async": Budget(queries=3, cache_calls=0),
+    "list-driver-trips-async": Budget(queries=5, cache_calls=0),
+    "list-user-trips-async": Budget(queries=4, cache_calls=0),
+    "calculate-fare-async": Budget(queries=0, cache_calls=0),
+}
+
+
+class BudgetCoverageTestCase(SimpleTestCase):
+    def test_every_route_has_a_budget(self):
+        for urls, budgets in ((auth_urls, AUTH_BUDGETS), (business_urls, BUSINESS_BUDGETS)):
+            names = {pattern.name for pattern in urls.urlpatterns}
+            self.assertNotIn(None, names, f"{urls.__name__} has an unnamed route")
+            self.assertEqual(names, set(budgets))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PASSWORD_HASHERS=FAST_HASHERS)
+class AuthBudgetTestCase(RequestBudgetMixin, APITestCase):
+    budgets = AUTH_BUDGETS
+
+    def setUp(self):
+        cache.clear()
+        for target, kwargs in (
+            ("accounts.services.auth.send_activation_otp_email_queue.delay", {}),
+            ("accounts.services.auth.send_reset_password_otp_queue.delay", {}),
+            # Any OTP is accepted, as in the auth flow tests.
+            ("accounts.services.auth.compare_password", {"return_value": True}),
+            # Deliverability is a DNS lookup per signup.
+            ("accounts.serializers.auth.validate_email", {
+                "side_effect": lambda email, **options: validate_email(email, check_deliverability=False),
+            }),
+        ):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="budgetuser", email="budgetuser@gmail.com", password=PASSWORD, registration_complete=True
+        )
+
+    def post(self, name, payload):
+        with self.assertWithinBudget(name):
+            response = self.client.post(reverse(name), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response
+
+    def signup(self, email):
+        payload = {
+            "email": email, "full_name": "Budget Rider", "password": PASSWORD,
+            "device_id": "budget", "device_name": "budget",
+        }
+        return self.client.post(reverse("signup"), payload, format="json")
+
+    def verified_signup(self, email):
+        self.signup(email)
+        self.client.post(reverse("verify-otp"), {"email": email, "otp": "123456"}, format="json")
+
+    def registration(self, email, **extra):
+        return {
+            "email": email, "username": email.split("@")[0], "full_name": "Budget Rider", "password": PASSWORD,
+            "phone_number": "+2347012245678", "gender": "Female", "dob": "1992-05-17", **extra,
+        }
+
+    def test_login(self):
+        payload = {
+            "username": "budgetuser", "password": PASSWORD,
+            "fcm_token": "budget", "device_id": "budget", "device_name": "budget",
+        }
+        self.post("login", payload)
+
+    def test_signup(self):
+        self.post("signup", {
+            "email": "budgetsignup@gmail.com", "full_name": "Budget Rider", "password": PASSWORD,
+            "device_id": "budget", "device_name": "budget",
+        })
+
+    def test_resend_otp(self):
+        self.signup("budgetresend@gmail.com")
+        self.post("register-otp", {"email": "budgetresend@gmail.com"})
+
+    def test_verify_otp(self):
+        self.signup("budgetverify@gmail.com")
+        self.post("verify-otp", {"email": "budgetverify@gmail.com", "otp": "123456"})
+        self.assertTrue(RegisterLog.objects.get(email="budgetverify@gmail.com").is_verified)
+
+    def test_customer_registration(self):
+        self.verified_signup("budgetcust@gmail.com")
+        self.post("customer_registration", self.registration("budgetcust@gmail.com"))
+
+    def test_driver_registration(self):
+        self.verified_signup("budgetdrv@gmail.com")
+        self.post("driver_registration", self.registration("budgetdrv@gmail.com", license_number="LIC-BUDGET"))
+
+    def test_token_refresh(self):
+        self.post("token-refresh", {"refresh": str(RefreshToken.for_user(self.user))})
+
+    def test_forgot_password(self):
+        self.post("forgot-password", {"email": "budgetuser@gmail.com"})
+
+    def test_change_password(self):
+        self.client.post(reverse("forgot-password"), {"email": "budgetuser@gmail.com"}, format="json")
+        self.post("change-password", {"email": "budgetuser@gmail.com", "otp": "123456", "password": "Changed@1234"})
+
+    def test_change_password_in_app(self):
+        self.client.force_authenticate(user=self.user)
+        self.post("change-password-in-app", {
+            "email": "budgetuser@gmail.com", "current_password": PASSWORD, "new_password": "Changed@1234",
+        })
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PASSWORD_HASHERS=FAST_HASHERS)
+class BusinessBudgetTestCase(RequestBudgetMixin, APITestCase):
+    budgets = BUSINESS_BUDGETS
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch("crm.services.activity.activity_log.enqueue")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch(
+            "services.location.LocationService.resolve_route",
+            lambda self, start, end: ((10, (6.5158, 3.3898), (6.5392, 3.3889)), None),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        async def resolve_route(self, start, end):
+            return (10, (6.5158, 3.3898), (6.5392, 3.3889)), None
+
+        patcher = patch("services.location.AsyncLocationService.resolve_route", resolve_route)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_speed_table()
+        get_place_index()
+
+        self.customer = User.objects.create_user(
+            username="budgetcust", email="budgetcust@gmail.com", password=PASSWORD
+        )
+        driver_user = User.objects.create_user(
+            username="budgetdrv", email="budgetdrv@gmail.com", password=PASSWORD, user_type="Driver"
+        )
+        self.driver = Driver.objects.create(user=driver_user, license_number="BUDGET-1")
+        # A page of history, so list endpoints would show an N+1.
+        self.trips = [
+            Trip.objects.create(
+                customer=self.customer, driver=self.driver, start_location="Yaba", end_location="Ikeja", distance=5
+            )
+            for _ in range(10)
+        ]
+        self.client = APIClient()
+
+    def request(self, name, user=None, method="get", payload=None, **kwargs):
+        client = APIClient()
+        if user is not None:
+            # A JWT rather than force_authenticate, so authentication is measured too.
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        with self.assertWithinBudget(name):
+            response = getattr(client, method)(reverse(name, kwargs=kwargs or None), payload, format="json")
+            # Streamed rows are queried as they are sent.
+            content = b"".join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(response.status_code, status.HTTP_200_OK, content)
+        return response
+
+    def new_trip(self):
+        return Trip.objects.create(customer=self.customer, start_location="Yaba", end_location="Bariga", distance=4)
+
+    def trip_payload(self):
+        return {
+            "driver": str(self.driver.id), "start_location": "University of Lagos", "end_location": "Bariga",
+        }
+
+    def test_create_trip(self):
+        self.request("create-trip", self.customer, "post", self.trip_payload())
+
+    def test_create_trip_async(self):
+        self.request("create-trip-async", self.customer, "post", self.trip_payload())
+
+    def test_trip_transitions(self):
+        trip = self.new_trip()
+        for action in ("accept", "start", "complete"):
+            self.request(f"{action}-trip", self.driver.user, "post", trip_id=trip.id)
+        self.request("cancel-trip", self.customer, "post", trip_id=self.new_trip().id)
+
+    def test_create_trip_review(self):
+        Trip.objects.filter(id=self.trips[0].id).update(status=Trip.STATUS_COMPLETED)
+        self.request("create-trip-review", self.customer, "post", {"trip": self.trips[0].id, "rating": 5})
+
+    def test_list_trips(self):
+        self.request("list-user-trips", self.customer)
+        self.request("list-driver-trips", self.driver.user)
+        self.request("list-user-trips-async", self.customer)
+        self.request("list-driver-trips-async", self.driver.user)
+
+    def test_export_trips(self):
+        self.request("export-trips", self.driver.user)
+
+    def test_calculate_fare(self):
+        payload = {"distance": 10, "traffic_level": "moderate", "demand_level": "peak"}
+        self.request("calculate-fare", None, "post", payload)
+        self.request("calculate-fare-async", None, "post", payload)
+
+    def test_search_places(self):
+        self.request("search-places", self.customer, payload={"q": "yab", "limit": 5})
+
+    def test_pickup_eta(self):
+        payload = {
+            "pickup_latitude": 6.5158,
+            "pickup_longitude": 3.3898,
+            "drivers": [
+                {"driver": str(i), "latitude": 6.5158 + i * 0.001, "longitude": 3.39} for i in range(20)
+            ],
+        }
+        self.request("pickup-eta", self.customer, "post", payload)
+
+    def test_trip_stats(self):
+        self.request("driver-stats", self.driver.user)
+        self.request("customer-stats", self.customer)
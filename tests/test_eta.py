@@ -0,0 +1,97 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from business.eta import EtaService, SpeedTable, build_speed_profiles, refresh_speed_profiles
+from business.models import Trip, ZoneSpeedProfile
+from services.routing import RoutingService
+from tests.utils import LOCMEM_CACHE
+
+User = get_user_model()
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ETA_MIN_SAMPLES=2, ETA_DEFAULT_SPEED_KMH=20)
+class EtaServiceTestCase(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="etauser", email="etauser@gmail.com", password="Password@1234"
+        )
+        self.morning = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def create_trip(self, latitude, longitude, distance, minutes, status=Trip.STATUS_COMPLETED):
+        return Trip.objects.create(
+            customer=self.customer,
+            start_latitude=latitude,
+            start_longitude=longitude,
+            distance=distance,
+            status=status,
+            started_at=self.morning,
+            ended_at=self.morning + timedelta(minutes=minutes),
+        )
+
+    def test_profiles_use_total_distance_over_total_time(self):
+        self.create_trip(6.5158, 3.3898, 10, 60)
+        self.create_trip(6.5160, 3.3900, 20, 60)
+        self.create_trip(6.5160, 3.3900, 500, 1)  # implausible, skipped
+        self.create_trip(6.5160, 3.3900, 10, 10, status=Trip.STATUS_CANCELED)
+
+        profiles = {(profile.zone, profile.hour): profile for profile in build_speed_profiles()}
+
+        city = profiles[("", self.morning.hour)]
+        self.assertEqual((city.speed_kmh, city.samples), (15, 2))
+        self.assertEqual(len(profiles), 2)
+
+    def test_table_falls_back_to_city_hour_then_default(self):
+        self.create_trip(6.5158, 3.3898, 30, 60)
+        self.create_trip(6.5158, 3.3898, 30, 60)
+        self.create_trip(6.4281, 3.4219, 10, 60)
+        self.create_trip(6.4281, 3.4219, 10, 60)
+        refresh_speed_profiles()
+
+        table = SpeedTable.load()
+        hour = self.morning.hour
+        self.assertEqual(table.speed(6.5158, 3.3898, hour), 30)
+        self.assertEqual(table.speed(6.6018, 3.3515, hour), 20)  # unknown zone: city-wide hour
+        self.assertEqual(table.speed(6.5158, 3.3898, (hour + 1) % 24), 20)  # no data: default
+        self.assertEqual(ZoneSpeedProfile.objects.count(), 3)
+
+    def test_pickup_etas_for_many_drivers(self):
+        service = EtaService(routing=RoutingService())
+        pickup = (6.5158, 3.3898)
+        drivers = [(6.5158 + i * 0.001, 3.3898) for i in range(100)]
+
+        started = time.perf_counter()
+        etas = service.pickup_etas(pickup, drivers, at=self.morning)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(etas, sorted(etas))
+        self.assertEqual(etas[0], 0)
+        # About 1 km at the default 20 km/h, with the 1.3 detour factor.
+        self.assertAlmostEqual(etas[9], 1.0 * 1.3 / 20 * 60, delta=0.05)
+        self.assertAlmostEqual(
+            etas[50], service.eta_minutes(drivers[50], pickup, at=self.morning), delta=0.2
+        )
+        self.assertLess(elapsed, 0.005)
+
+    def test_pickup_eta_view(self):
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+        payload = {
+            "pickup_latitude": 6.5158,
+            "pickup_longitude": 3.3898,
+            "drivers": [
+                {"driver": "far", "latitude": 6.55, "longitude": 3.39},
+                {"driver": "near", "latitude": 6.516, "longitude": 3.39},
+            ],
+        }
+        response = client.post(reverse("pickup-eta"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        data = response.data.get("data", response.data)
+        self.assertEqual([row["driver"] for row in data], ["near", "far"])
@@ -0,0 +1,24 @@
+import json
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from services.util import DecimalEncoder
+
+
+class DecimalEncoderTestCase(SimpleTestCase):
+    def test_encodes_api_values(self):
+        payload = {
+            "id": uuid.UUID("6f1c2a44-0d9b-4c55-9a3e-2f7d35b0c1aa"),
+            "total_fare": Decimal("12.50"),
+            "requested_at": datetime(2026, 3, 2, 8, 30, tzinfo=dt_timezone.utc),
+            "dob": date(1992, 5, 17),
+        }
+        self.assertEqual(json.loads(json.dumps(payload, cls=DecimalEncoder)), {
+            "id": "6f1c2a44-0d9b-4c55-9a3e-2f7d35b0c1aa",
+            "total_fare": "12.50",
+            "requested_at": "2026-03-02T08:30:00+00:00",
+            "dob": "1992-05-17",
+        })
@@ -0,0 +1,270 @@
+import threading
+import time
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from geopy.exc import GeocoderUnavailable
+
+from services import geohash
+from services.geocoding_guard import (
+    CircuitBreaker,
+    CircuitState,
+    GeocoderCircuitOpen,
+    GeocoderMetrics,
+    ProviderGuard,
+    RateLimiter,
+)
+from services.location import LocationService
+from services.place_index import PlaceIndex
+from tests.utils import LOCMEM_CACHE
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConcurrentGeocodingTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = LocationService()
+        self.calls = []
+        self.lock = threading.Lock()
+        self.metrics = GeocoderMetrics()
+        self.guard = ProviderGuard(
+            "geocoder",
+            rate_limiter=RateLimiter(rate=1000, burst=1000),
+            breaker=CircuitBreaker("geocoder", failure_threshold=2, reset_timeout=60),
+            metrics=self.metrics,
+            retries=0,
+        )
+        patcher = patch("services.location.get_geocoding_guard", return_value=self.guard)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_geocode(self, delay):
+        def geocode(name, timeout=None, **kwargs):
+            with self.lock:
+                self.calls.append(name)
+            time.sleep(delay)
+            return SimpleNamespace(address=f"{name}, Lagos, Nigeria", latitude=6.5, longitude=3.4)
+
+        return geocode
+
+    def failing_geocode(self, name, timeout=None, **kwargs):
+        with self.lock:
+            self.calls.append(name)
+        raise GeocoderUnavailable("provider down")
+
+    def test_get_coordinates_many_dedups_names(self):
+        with patch.object(self.service.geolocator, "geocode", self.fake_geocode(0)):
+            result = self.service.get_coordinates_many(["Yaba", "Bariga", "Yaba"])
+
+        self.assertEqual(sorted(self.calls), ["Bariga", "Yaba"])
+        self.assertEqual(result, {"Yaba": (6.5, 3.4), "Bariga": (6.5, 3.4)})
+
+    def test_calculate_distance_resolves_both_ends_concurrently(self):
+        with patch.object(self.service.geolocator, "geocode", self.fake_geocode(0.3)):
+            started = time.monotonic()
+            distance = self.service.calculate_distance("University of Lagos", "Bariga")
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(distance, 0)
+        self.assertLess(elapsed, 0.55)
+
+    def test_timed_out_lookups_fall_back_to_gazetteer(self):
+        with patch.object(self.service.geolocator, "geocode", self.fake_geocode(0.5)):
+            result = self.service.get_coordinates_many(["Surulere", "Nowhere Street"], timeout=0.05)
+
+        self.assertEqual(result, {"Surulere": (6.4969, 3.3481), "Nowhere Street": None})
+
+    def test_provider_results_are_cached(self):
+        with patch.object(self.service.geolocator, "geocode", self.fake_geocode(0)):
+            self.service.get_coordinates("Yaba")
+            self.service.get_coordinates("Yaba")
+
+        self.assertEqual(self.calls, ["Yaba"])
+        self.assertEqual(self.metrics.snapshot()["provider_calls"], 1)
+
+    def test_breaker_opens_and_short_circuits_to_gazetteer(self):
+        with patch.object(self.service.geolocator, "geocode", self.failing_geocode):
+            results = [self.service.get_coordinates("Yaba") for _ in range(4)]
+
+        self.assertEqual(self.calls, ["Yaba", "Yaba"])
+        self.assertEqual(results, [(6.5095, 3.3711)] * 4)
+        self.assertEqual(self.guard.breaker.state, CircuitState.open)
+        self.assertEqual(self.metrics.snapshot()["short_circuited"], 2)
+
+    def test_paced_lookups_wait_for_tokens_instead_of_being_throttled(self):
+        self.guard.rate_limiter = RateLimiter(rate=40, burst=1)
+        self.guard.max_wait = 0
+        names = ["Nowhere 1", "Nowhere 2", "Nowhere 3", "Nowhere 4"]
+        with patch.object(self.service.geolocator, "geocode", self.fake_geocode(0)):
+            self.assertIn(None, self.service.get_coordinates_many(names).values())
+            result = self.service.get_coordinates_paced(names)
+
+        self.assertEqual(result, dict.fromkeys(names, (6.5, 3.4)))
+
+    def test_paced_lookups_retry_names_skipped_by_the_open_circuit(self):
+        self.guard.breaker = CircuitBreaker("geocoder", failure_threshold=1, reset_timeout=0.05)
+        responses = iter([
+            GeocoderUnavailable("provider down"),
+            SimpleNamespace(address="Nowhere Street, Lagos, Nigeria", latitude=6.5, longitude=3.4),
+        ])
+
+        def geocode(name, timeout=None, **kwargs):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with patch.object(self.service.geolocator, "geocode", geocode):
+            result = self.service.get_coordinates_paced(["Nowhere Street"])
+
+        self.assertEqual(result, {"Nowhere Street": (6.5, 3.4)})
+        self.assertEqual(self.guard.breaker.state, CircuitState.closed)
+
+    def test_resolved_lookups_raise_place_popularity(self):
+        index = PlaceIndex()
+        index.insert("Ikeja", 6.6018, 3.3515)
+        index.insert("Ikorodu", 6.6194, 3.5105)
+        with patch("services.location.get_place_index", return_value=index), \
+                patch.object(self.service.geolocator, "geocode", self.fake_geocode(0)):
+            self.service.get_coordinates("Ikorodu")
+            self.service.get_coordinates("Ikorodu")  # from the cache, still a hit
+
+        self.assertEqual([place["name"] for place in index.search("ik")], ["Ikorodu", "Ikeja"])
+        self.assertEqual(index._places["ikorodu"]["popularity"], 2)
+
+    def test_only_the_providers_address_is_indexed(self):
+        index = PlaceIndex()
+        location = SimpleNamespace(address="12 Herbert Macaulay Way, Yaba, Lagos", latitude=6.5, longitude=3.4)
+        with patch("services.location.get_place_index", return_value=index), \
+                patch.object(self.service.geolocator, "geocode", return_value=location):
+            self.service.get_coordinates("12 herbert macaulay wy")
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.search("wy"), [])
+        self.assertEqual(index.search("herbert")[0]["name"], "12 Herbert Macaulay Way, Yaba, Lagos")
+
+    def test_unresolved_locations_are_an_error(self):
+        with patch.object(self.service.geolocator, "geocode", return_value=None):
+            route, error = self.service.resolve_route("Nowhere Street", "Yaba")
+            distance = self.service.calculate_distance("Nowhere Street", "Yaba")
+
+        self.assertIsNone(route)
+        self.assertEqual(error.get_status_code(), 400)
+        self.assertEqual(error.get_message(), "Location could not be resolved: Nowhere Street")
+        self.assertIsNone(distance)
+
+    def fake_reverse(self, point, **kwargs):
+        with self.lock:
+            self.calls.append(point)
+        return SimpleNamespace(address=f"Cell at {point[0]:.4f}, {point[1]:.4f}")
+
+    def test_nearby_reverse_lookups_share_one_cell(self):
+        with patch.object(self.service.geolocator, "reverse", self.fake_reverse):
+            first = self.service.get_location_name(6.515801, 3.389812)
+            second = self.service.get_location_name(6.515834, 3.389790)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_warm_location_names_skips_cached_cells(self):
+        points = [(6.5158, 3.3898), (6.51581, 3.38981), (6.5392, 3.3889)]
+        with patch.object(self.service.geolocator, "reverse", self.fake_reverse):
+            self.service.get_location_name(6.5392, 3.3889)
+            summary = self.service.warm_location_names(points)
+
+        self.assertEqual(summary, {"cells": 2, "cached": 1, "resolved": 1, "failed": 0})
+        self.assertEqual(len(self.calls), 2)
+
+    @override_settings(REVERSE_GEOCODE_PRECISION=5)
+    def test_warm_command_fills_the_cells_lookups_read(self):
+        with patch.object(self.service.geolocator, "reverse", self.fake_reverse), \
+                patch("business.management.commands.warm_reverse_geocode.LocationService", return_value=self.service):
+            call_command("warm_reverse_geocode", "--skip-gazetteer", "--point", "6.5158,3.3898", stdout=StringIO())
+            self.service.get_location_name(6.5160, 3.3900)
+
+        self.assertEqual(len(self.calls), 1)
+
+
+class GeohashTestCase(SimpleTestCase):
+    def test_encode_known_value(self):
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_decoded_centre_is_inside_cell(self):
+        cell, (latitude, longitude) = geohash.snap(6.5158, 3.3898, 7)
+        self.assertEqual(geohash.encode(latitude, longitude, 7), cell)
+        self.assertAlmostEqual(latitude, 6.5158, places=3)
+        self.assertAlmostEqual(longitude, 3.3898, places=3)
+
+
+class PlaceIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = PlaceIndex()
+        self.index.insert("University of Lagos", 6.5158, 3.3898)
+        self.index.insert("Lagos Island", 6.4541, 3.3947)
+        self.index.insert("Lekki", 6.4474, 3.4723)
+
+    def test_prefix_matches_any_word(self):
+        names = [place["name"] for place in self.index.search("lag")]
+        self.assertEqual(names, ["Lagos Island", "University of Lagos"])
+
+    def test_popularity_reorders_matches(self):
+        self.index.insert("Lekki Phase 1", 6.4433, 3.4780)
+        names = [place["name"] for place in self.index.search("lek")]
+        self.assertEqual(names, ["Lekki", "Lekki Phase 1"])
+
+        self.index.record_hit("Lekki Phase 1", 2)
+        names = [place["name"] for place in self.index.search("lek")]
+        self.assertEqual(names, ["Lekki Phase 1", "Lekki"])
+
+    def test_popularity_does_not_outrank_a_better_match(self):
+        self.index.record_hit("University of Lagos", 5)
+        names = [place["name"] for place in self.index.search("lag")]
+        self.assertEqual(names, ["Lagos Island", "University of Lagos"])
+
+    def test_typos_fall_back_to_trigram_matches(self):
+        names = [place["name"] for place in self.index.search("lekky", limit=1)]
+        self.assertEqual(names, ["Lekki"])
+
+    def test_inserted_places_are_searchable(self):
+        self.index.insert("Ikeja City Mall", 6.6137, 3.3581)
+        self.assertEqual(self.index.search("ikeja ci")[0]["latitude"], 6.6137)
+
+    def test_least_recently_used_places_are_evicted(self):
+        index = PlaceIndex(max_places=2)
+        index.insert("Yaba", 6.5095, 3.3711, pinned=True)
+        index.insert("Ikeja City Mall", 6.6137, 3.3581)
+        index.insert("Ikoyi Club", 6.4474, 3.4350)
+        index.record_hit("Ikeja City Mall")
+        index.insert("Iganmu", 6.4790, 3.3650)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual([place["name"] for place in index.search("ik")], ["Ikeja City Mall"])
+        self.assertNotIn("ikoy", index._prefixes)
+        self.assertEqual([place["name"] for place in index.search("yaba")], ["Yaba"])
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def test_half_open_lets_one_probe_through(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.open)
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitState.half_open)
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.closed)
+        self.assertTrue(breaker.allow())
+
+    def test_guard_raises_while_circuit_is_open(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        guard = ProviderGuard("test", RateLimiter(rate=10, burst=10), breaker, GeocoderMetrics())
+
+        with self.assertRaises(GeocoderCircuitOpen):
+            guard.call(lambda: None)
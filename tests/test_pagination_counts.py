@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.request import Request
+
+from accounts.models import Permission, Role
+from accounts.search import reload_search_index
+from accounts.services.roles_permissions import PermissionService
+from services.counting import CountStrategy, count_queryset
+from tests.utils import LOCMEM_CACHE
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CountQuerysetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Role.objects.bulk_create(Role(name=f"role-{i}", description="ops" if i % 2 else "") for i in range(6))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_small_tables_are_counted_exactly(self):
+        self.assertEqual(count_queryset(Role.objects.all()), (6, CountStrategy.exact))
+        self.assertEqual(count_queryset(Role.objects.filter(description="ops")), (3, CountStrategy.exact))
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=2)
+    def test_large_unfiltered_lists_use_the_table_estimate(self):
+        with self.assertNumQueries(1):
+            total, strategy = count_queryset(Role.objects.all())
+        self.assertEqual(strategy, CountStrategy.estimate)
+        self.assertGreaterEqual(total, 6)
+
+        # The estimate itself is cached, so the next page runs no query.
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(Role.objects.order_by("name")), (total, CountStrategy.estimate))
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=2)
+    def test_large_filtered_lists_reuse_a_cached_count_per_filter(self):
+        self.assertEqual(count_queryset(Role.objects.filter(description="ops")), (3, CountStrategy.cached))
+        Role.objects.create(name="role-new", description="ops")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(Role.objects.filter(description="ops")), (3, CountStrategy.cached))
+        self.assertEqual(count_queryset(Role.objects.filter(description="")), (3, CountStrategy.cached))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaginatedListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Permission.objects.bulk_create(
+            Permission(name=f"{group}_{i}", group_name=group) for group in ("trip", "user") for i in range(5)
+        )
+
+    def setUp(self):
+        cache.clear()
+        reload_search_index(Permission)
+
+    def fetch(self, page, **filter_params):
+        service = PermissionService(Request(RequestFactory().get("/permissions/", {"page": page})))
+        return service.fetch_permissions({"page_size": 4, **filter_params})
+
+    def test_pages_report_total_and_count_strategy(self):
+        response = self.fetch(2)
+        self.assertEqual(len(response["data"]), 4)
+        self.assertEqual(response["total"], 10)
+        self.assertEqual(response["last_page"], 3)
+        self.assertEqual(response["count_strategy"], CountStrategy.exact)
+        self.assertIsNotNone(response["next_page_url"])
+        self.assertIsNotNone(response["prev_page_url"])
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=2)
+    def test_large_lists_report_estimated_or_cached_counts(self):
+        self.assertEqual(self.fetch(1)["count_strategy"], CountStrategy.estimate)
+
+        response = self.fetch(2, keyword="trip")
+        self.assertEqual(len(response["data"]), 1)
+        self.assertEqual(response["total"], 5)
+        self.assertEqual(response["count_strategy"], CountStrategy.cached)
+        self.assertIsNone(response["next_page_url"])
@@ -0,0 +1,81 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.functions import Upper
+from django.test import TestCase
+from django.utils import timezone
+
+from business.models import ArchivedTrip, CustomerDailyStats, Driver, DriverDailyStats, Trip
+
+User = get_user_model()
+
+# SQLite reports a full table read as "SCAN <table>"; index reads are
+# "SEARCH ... USING INDEX" or "SCAN ... USING [COVERING] INDEX".
+SQLITE_TABLE_SCAN = re.compile(r"\bSCAN (\w+)\s*$", re.MULTILINE)
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Fails when a hot query would read its whole table. On PostgreSQL sequential
+    scans are disabled for the check, so a plan that still contains one has no
+    index to use; tiny test tables would otherwise always be scanned.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="planuser", email="planuser@gmail.com", password="Password@1234", phone_number="08030000000"
+        )
+        cls.driver = Driver.objects.create(user=cls.user, license_number="PLAN-1")
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset):
+        plan = self.explain(queryset)
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan, f"{queryset.query}\n{plan}")
+        else:
+            self.assertIsNone(SQLITE_TABLE_SCAN.search(plan), f"{queryset.query}\n{plan}")
+
+    def test_trip_history_pages(self):
+        before = timezone.now() - timedelta(days=1)
+        for owner in ({"customer": self.user}, {"driver": self.driver}):
+            self.assertUsesIndex(Trip.objects.filter(**owner).order_by("-requested_at", "-id")[:101])
+            self.assertUsesIndex(
+                Trip.objects.filter(requested_at__lt=before, **owner).order_by("-requested_at", "-id")[:101]
+            )
+            self.assertUsesIndex(ArchivedTrip.objects.filter(**owner).order_by("-requested_at", "-id")[:101])
+
+    def test_driver_trips_by_status(self):
+        self.assertUsesIndex(Trip.objects.filter(driver=self.driver, status=Trip.STATUS_IN_PROGRESS))
+
+    def test_driver_by_user(self):
+        self.assertUsesIndex(Driver.objects.filter(user=self.user))
+
+    def test_driver_license_lookup(self):
+        self.assertUsesIndex(
+            Driver.objects.alias(license_key=Upper("license_number")).filter(license_key=Upper(Value("plan-1")))
+        )
+
+    def test_daily_stats_range(self):
+        today = timezone.localdate()
+        self.assertUsesIndex(DriverDailyStats.objects.filter(driver=self.driver, date__gte=today - timedelta(days=365)))
+        self.assertUsesIndex(CustomerDailyStats.objects.filter(customer=self.user, date__gte=today - timedelta(days=365)))
+
+    def test_available_users_newest_first(self):
+        self.assertUsesIndex(User.available_objects.order_by("-created_at")[:100])
+
+    def test_user_lookups_by_normalized_columns(self):
+        self.assertUsesIndex(User.objects.filter(email_normalized="planuser@gmail.com"))
+        self.assertUsesIndex(User.objects.filter(username_normalized="planuser"))
+        self.assertUsesIndex(User.objects.filter(phone_number_normalized="+2348030000000"))
+        self.assertUsesIndex(
+            User.objects.filter(Q(username_normalized="planuser") | Q(email_normalized="planuser@gmail.com"))
+        )
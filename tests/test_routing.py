@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from services.routing import RoadGraph, RoutingService, haversine_m
+
+OSM_EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="6.5000" lon="3.3800"/>
+  <node id="2" lat="6.5100" lon="3.3800"/>
+  <node id="3" lat="6.5100" lon="3.3900"/>
+  <node id="4" lat="6.5200" lon="3.3900"/>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="primary"/>
+    <tag k="maxspeed" v="60"/>
+  </way>
+  <way id="11">
+    <nd ref="3"/><nd ref="4"/>
+    <tag k="highway" v="residential"/>
+    <tag k="oneway" v="yes"/>
+  </way>
+  <way id="12">
+    <nd ref="1"/><nd ref="4"/>
+    <tag k="highway" v="footway"/>
+  </way>
+</osm>
+"""
+
+
+def lagoon_graph():
+    """
+    Two shores of a lagoon (A and B) with no direct road between them; the only
+    route goes around through C and D.
+    """
+    nodes = [(6.50, 3.38), (6.50, 3.40), (6.53, 3.38), (6.53, 3.40)]
+    edges = []
+    for first, second in [(0, 2), (2, 3), (3, 1)]:
+        length = haversine_m(*nodes[first], *nodes[second])
+        edges.append((first, second, length, length / 10))
+        edges.append((second, first, length, length / 10))
+    return RoadGraph.from_edges(nodes, edges)
+
+
+class RoadGraphTestCase(SimpleTestCase):
+    def setUp(self):
+        self.graph = lagoon_graph()
+
+    def test_route_goes_around_the_lagoon(self):
+        service = RoutingService(self.graph)
+        route = service.route((6.5001, 3.3801), (6.5001, 3.3999))
+        straight_km = haversine_m(6.50, 3.38, 6.50, 3.40) / 1000
+
+        self.assertTrue(route.on_road)
+        self.assertGreater(route.distance_km, 3 * straight_km)
+        self.assertAlmostEqual(route.duration_min, route.distance_km * 1000 / 10 / 60)
+
+    def test_routes_are_cached_per_node_pair(self):
+        service = RoutingService(self.graph)
+        service.route((6.5001, 3.3801), (6.5001, 3.3999))
+        service.route((6.5002, 3.3802), (6.5002, 3.3998))
+
+        self.assertEqual(service.cache_info().hits, 1)
+
+    def test_matrix_matches_single_routes(self):
+        service = RoutingService(self.graph)
+        origins = [(6.50, 3.38), (6.53, 3.40)]
+        destinations = [(6.50, 3.40), (6.53, 3.38), (7.5, 4.5)]
+        matrix = service.matrix(origins, destinations)
+
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations[:2]):
+                self.assertAlmostEqual(
+                    matrix[i][j].distance_km, service.route(origin, destination).distance_km
+                )
+        self.assertFalse(matrix[0][2].on_road)
+
+    def test_points_off_the_network_are_estimated(self):
+        route = RoutingService(self.graph).route((6.50, 3.38), (7.5, 4.5))
+        self.assertFalse(route.on_road)
+
+    def test_osm_extract_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            osm_path = os.path.join(directory, "extract.osm")
+            graph_path = os.path.join(directory, "graph.json.gz")
+            with open(osm_path, "w") as file:
+                file.write(OSM_EXTRACT)
+
+            RoadGraph.from_osm(osm_path).save(graph_path)
+            graph = RoadGraph.load(graph_path)
+
+        # Footways are dropped and the residential way is one-way.
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(graph.edge_count, 5)
+        self.assertIsNotNone(graph.shortest_path(0, 3))
+        self.assertIsNone(graph.shortest_path(3, 0))
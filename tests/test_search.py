@@ -0,0 +1,179 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.request import Request
+
+from accounts import search
+from accounts.models import Role, User, UserTypes
+from accounts.search import SearchIndex, get_search_index, reload_search_index, search_queryset
+from accounts.services.users import UserService
+from tests.utils import LOCMEM_CACHE
+
+
+class ImmediateThread:
+    def __init__(self, target, args, daemon):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class UsernameSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["username"]
+
+
+class SearchIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = SearchIndex({"username": 3, "full_name": 2})
+        self.index.add(1, ["adaeze", "Adaeze Obi"])
+        self.index.add(2, ["tunde", "Tunde Adams"])
+        self.index.add(3, ["ada", "Ada Eze"])
+
+    def test_short_and_long_queries_match_substrings(self):
+        self.assertCountEqual(self.index.search("da", 10), [1, 2, 3])
+        self.assertEqual(self.index.search("Obi", 10), [1])
+        self.assertEqual(self.index.search("unde ad", 10), [2])
+        self.assertEqual(self.index.search("zebra", 10), [])
+
+    def test_ranks_exact_then_prefix_then_substring(self):
+        self.assertEqual(self.index.search("ada", 10), [3, 1, 2])
+        self.assertEqual(self.index.search("ada", 2), [3, 1])
+
+    def test_update_and_remove(self):
+        self.index.add(2, ["babatunde", "Babatunde Lawal"])
+        self.assertEqual(self.index.search("adams", 10), [])
+        self.assertEqual(self.index.search("lawal", 10), [2])
+
+        self.index.remove(2)
+        self.assertEqual(self.index.search("tunde", 10), [])
+        self.assertNotIn("law", self.index._postings)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SearchQuerysetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="searchadmin", email="searchadmin@gmail.com", password="Password@1234", user_type=UserTypes.admin
+        )
+        cls.ada = User.objects.create_user(
+            username="ada", email="ada@gmail.com", password="Password@1234", full_name="Ada Lovelace"
+        )
+        cls.adaeze = User.objects.create_user(
+            username="adaeze", email="adaeze@gmail.com", password="Password@1234", full_name="Adaeze Okafor"
+        )
+        cls.grace = User.objects.create_user(
+            username="grace", email="grace@gmail.com", password="Password@1234", full_name="Grace Hopper",
+            phone_number="08031112222",
+        )
+
+    def setUp(self):
+        cache.clear()
+        reload_search_index(User)
+
+    def test_filters_and_ranks_matches(self):
+        self.assertEqual(list(search_queryset(User.objects.all(), "ADA")), [self.ada, self.adaeze])
+        self.assertEqual(list(search_queryset(User.objects.all(), "0803111")), [self.grace])
+        self.assertEqual(list(search_queryset(User.objects.all(), "nobody")), [])
+
+    def test_keeps_the_queryset_filters(self):
+        queryset = User.objects.exclude(pk=self.ada.pk)
+        self.assertEqual(list(search_queryset(queryset, "ada")), [self.adaeze])
+
+    def test_blank_keyword_returns_the_queryset(self):
+        queryset = User.objects.order_by("username")
+        self.assertIs(search_queryset(queryset, "  "), queryset)
+
+    def test_saved_and_deleted_rows_update_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            linus = User.objects.create_user(
+                username="linus", email="linus@gmail.com", password="Password@1234", full_name="Linus Torvalds"
+            )
+        self.assertEqual(get_search_index(User).search("torvalds", 10), [linus.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            linus.full_name = "Linus T"
+            linus.save()
+        self.assertEqual(get_search_index(User).search("torvalds", 10), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            linus.delete()
+        self.assertEqual(get_search_index(User).search("linus", 10), [])
+
+    def test_unrelated_updates_leave_the_index_alone(self):
+        version = search.get_search_index_version(User)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.ada.save(update_fields=["last_login"])
+        self.assertEqual(callbacks, [])
+        self.assertEqual(search.get_search_index_version(User), version)
+
+    def test_other_processes_changes_trigger_a_rebuild(self):
+        index = get_search_index(User)
+        User.objects.filter(pk=self.grace.pk).update(full_name="Grace Brewster")
+        search.bump_search_index_version(User)
+        index.checked_at = 0
+
+        with mock.patch("accounts.search.threading.Thread", ImmediateThread), \
+                mock.patch("accounts.search.close_old_connections"):
+            get_search_index(User)
+
+        self.assertIsNot(get_search_index(User), index)
+        self.assertEqual(get_search_index(User).search("brewster", 10), [self.grace.pk])
+
+    def test_user_list_searches_by_keyword(self):
+        request = Request(RequestFactory().get("/users/", {"keyword": "ada"}))
+        request.user = self.admin
+        with mock.patch("accounts.services.users.UserListSerializer", UsernameSerializer):
+            response = UserService(request).fetch_list({"keyword": "ada", "page_size": 10})
+
+        self.assertEqual([user["username"] for user in response["data"]], ["ada", "adaeze"])
+        self.assertEqual(response["total"], 2)
+
+    @override_settings(SEARCH_MAX_RESULTS=2)
+    def test_limit_applies_after_the_queryset_filters(self):
+        # Drivers that outrank every customer for "ada".
+        drivers = [
+            User.objects.create_user(
+                username=f"ada{i}", email=f"ada{i}@gmail.com", password="Password@1234", full_name="Ada",
+                user_type=UserTypes.driver,
+            )
+            for i in range(3)
+        ]
+        reload_search_index(User)
+
+        customers = search_queryset(User.objects.filter(user_type=UserTypes.customer), "ada")
+        self.assertEqual(list(customers), [self.ada, self.adaeze])
+        self.assertIsNone(customers.search_limit)
+
+        everyone = list(search_queryset(User.objects.all(), "ada"))
+        self.assertEqual(everyone[0], self.ada)
+        self.assertIn(everyone[1], drivers)
+        self.assertEqual(len(everyone), 2)
+        self.assertEqual(search_queryset(User.objects.all(), "ada").search_limit, 2)
+
+    @override_settings(SEARCH_MAX_RESULTS=1)
+    def test_user_list_reports_the_search_limit(self):
+        request = Request(RequestFactory().get("/users/", {"keyword": "ada"}))
+        request.user = self.admin
+        with mock.patch("accounts.services.users.UserListSerializer", UsernameSerializer):
+            response = UserService(request).fetch_list({"keyword": "ada", "page_size": 10})
+
+        self.assertEqual([user["username"] for user in response["data"]], ["ada"])
+        self.assertEqual(response["search_limit"], 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoleSearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        Role.objects.create(name="Dispatcher", description="Assigns drivers to trips")
+        Role.objects.create(name="Support", description="Handles trip disputes")
+        reload_search_index(Role)
+
+    def test_roles_match_name_before_description(self):
+        roles = search_queryset(Role.objects.all(), "dis")
+        self.assertEqual([role.name for role in roles], ["Dispatcher", "Support"])
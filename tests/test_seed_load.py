@@ -0,0 +1,74 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from accounts.models import User, UserTypes
+from business.models import Driver, DriverDailyStats, Trip, TripReview, Vehicle
+from business.seeding import SEED_PASSWORD, build_population, build_trip_chunk, trip_chunks
+
+NOW = datetime(2026, 3, 2, 12, tzinfo=dt_timezone.utc)
+
+
+class SeedGenerationTestCase(TestCase):
+    def test_same_seed_builds_the_same_rows(self):
+        users, _, drivers = build_population(5, 20, 0.25, 30, NOW)
+        again, _, _ = build_population(5, 20, 0.25, 30, NOW)
+        self.assertEqual([user.id for user in users], [user.id for user in again])
+        self.assertEqual(len({user.password for user in users}), 1)
+
+        customer_ids = [user.id for user in users if user.user_type == UserTypes.customer]
+        driver_ids = [driver.id for driver in drivers]
+        first = build_trip_chunk(5, 3, 50, customer_ids, driver_ids, 30, NOW)[0]
+        second = build_trip_chunk(5, 3, 50, customer_ids, driver_ids, 30, NOW)[0]
+        self.assertEqual([(t.id, t.requested_at, t.total_fare) for t in first],
+                         [(t.id, t.requested_at, t.total_fare) for t in second])
+        self.assertNotEqual(first[0].id, build_trip_chunk(5, 4, 1, customer_ids, driver_ids, 30, NOW)[0][0].id)
+
+    def test_trips_are_plausible(self):
+        users, _, drivers = build_population(9, 50, 0.2, 30, NOW)
+        customer_ids = [user.id for user in users if user.user_type == UserTypes.customer]
+        trips, reviews = build_trip_chunk(9, 0, 500, customer_ids, [driver.id for driver in drivers], 30, NOW)
+
+        for trip in trips:
+            self.assertTrue(6.3 < trip.start_latitude < 6.8 and 3.1 < trip.start_longitude < 3.7)
+            self.assertGreaterEqual(trip.distance, 0.5)
+            self.assertLessEqual(trip.requested_at, NOW)
+            self.assertGreater(trip.total_fare, 0)
+            if trip.status == Trip.STATUS_COMPLETED:
+                self.assertTrue(trip.requested_at < trip.started_at < trip.ended_at)
+        statuses = {trip.status for trip in trips}
+        self.assertTrue({Trip.STATUS_COMPLETED, Trip.STATUS_CANCELED} <= statuses)
+        self.assertTrue(all(review.rating in range(1, 6) for review in reviews))
+
+    def test_chunks_cover_every_trip(self):
+        self.assertEqual(trip_chunks(25, 10), [(0, 10), (1, 10), (2, 5)])
+
+
+class SeedLoadCommandTestCase(TestCase):
+    def test_seeds_every_table_and_rollups(self):
+        out = StringIO()
+        call_command("seed_load", users=40, trips=300, chunk_size=120, seed=3, workers=1, stdout=out)
+
+        self.assertEqual(User.objects.filter(username__startswith="load3_").count(), 40)
+        self.assertEqual(Driver.objects.count(), Vehicle.objects.count())
+        self.assertEqual(Trip.objects.count(), 300)
+        self.assertTrue(TripReview.objects.exists())
+
+        user = User.objects.get(username="load3_0")
+        self.assertTrue(user.check_password(SEED_PASSWORD))
+        self.assertEqual(user.email_normalized, "load3_0@loadtest.example")
+
+        reviews = TripReview.objects.aggregate(total=Sum("rating"), count=Count("id"))
+        drivers = Driver.objects.aggregate(total=Sum("rating_sum"), count=Sum("rating_count"))
+        self.assertEqual((drivers["total"], drivers["count"]), (reviews["total"], reviews["count"]))
+        self.assertTrue(DriverDailyStats.objects.exists())
+        self.assertIn("Seed 3 loaded", out.getvalue())
+
+    def test_refuses_to_load_a_seed_twice(self):
+        call_command("seed_load", users=5, trips=0, seed=4, skip_rollups=True, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("seed_load", users=5, trips=0, seed=4, stdout=StringIO())
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from business.archive import archive_trips, trip_history
+from business.models import (
+    ArchivedTrip,
+    ArchivedTripReview,
+    CustomerDailyStats,
+    Driver,
+    DriverDailyStats,
+    Trip,
+    TripReview,
+)
+
+User = get_user_model()
+
+
+@override_settings(TRIP_ARCHIVE_AFTER_DAYS=30)
+class TripArchiveTestCase(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="arccust", email="arccust@gmail.com", password="Password@1234"
+        )
+        driver_user = User.objects.create_user(
+            username="arcdrv", email="arcdrv@gmail.com", password="Password@1234", user_type="Driver"
+        )
+        self.driver = Driver.objects.create(user=driver_user, license_number="ARC-1")
+        self.now = timezone.now()
+
+    def create_trip(self, days_ago, status=Trip.STATUS_COMPLETED):
+        trip = Trip.objects.create(
+            customer=self.customer, driver=self.driver, start_location="Yaba", end_location="Ikeja",
+            distance=5, status=status,
+        )
+        requested_at = self.now - timedelta(days=days_ago)
+        ended_at = requested_at + timedelta(minutes=30) if status != Trip.STATUS_IN_PROGRESS else None
+        Trip.objects.filter(id=trip.id).update(requested_at=requested_at, ended_at=ended_at)
+        return trip
+
+    def test_archive_moves_old_finished_trips_in_batches(self):
+        old = [self.create_trip(40 + day) for day in range(5)]
+        TripReview.objects.create(trip=old[0], reviewer=self.customer, rating=4)
+        recent = self.create_trip(2)
+        stuck = self.create_trip(60, status=Trip.STATUS_IN_PROGRESS)
+
+        self.assertEqual(archive_trips(batch_size=2, max_batches=1), 2)
+        self.assertEqual(archive_trips(batch_size=2), 3)
+
+        self.assertEqual(set(Trip.objects.values_list("id", flat=True)), {recent.id, stuck.id})
+        archived = ArchivedTrip.objects.get(id=old[0].id)
+        self.assertEqual(archived.requested_at, self.now - timedelta(days=40))
+        self.assertEqual(ArchivedTripReview.objects.get().trip, archived)
+        self.assertFalse(TripReview.objects.exists())
+
+    def test_history_pages_across_hot_and_archived_trips(self):
+        trips = [self.create_trip(day * 10) for day in range(8)]
+        archive_trips()
+        self.assertEqual(ArchivedTrip.objects.count(), 4)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = trip_history(limit=3, cursor=cursor, customer=self.customer)
+            seen.extend(trip.id for trip in page)
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [trip.id for trip in trips])
+
+    def test_page_inside_the_hot_window_skips_the_archive(self):
+        for day in range(4):
+            self.create_trip(day)
+
+        with self.assertNumQueries(2):  # trips and their reviews
+            page, cursor = trip_history(limit=3, customer=self.customer)
+
+        self.assertEqual(len(page), 3)
+        self.assertIsNotNone(cursor)
+
+    def test_list_view_returns_archived_trips_and_cursor(self):
+        self.create_trip(1)
+        self.create_trip(50)
+        call_command("archive_trips", stdout=StringIO())
+
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+        response = client.get(reverse("list-user-trips"), {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(len(response.data["data"]), 1)
+
+        response = client.get(reverse("list-user-trips"), {"cursor": response.data["next_cursor"]})
+        self.assertEqual(response.data["data"][0]["id"], str(ArchivedTrip.objects.get().id))
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = client.get(reverse("list-user-trips"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def totals(self):
+        call_command("rebuild_trip_stats", stdout=StringIO())
+        call_command("reconcile_driver_ratings", stdout=StringIO())
+        export = StringIO()
+        call_command("export_trips", "--format", "ndjson", stdout=export)
+
+        fields = ("date", "completed_trips", "canceled_trips", "revenue", "distance")
+        return (
+            list(CustomerDailyStats.objects.order_by("date").values_list(*fields)),
+            list(DriverDailyStats.objects.order_by("date").values_list(*fields)),
+            Driver.objects.values_list("rating_sum", "rating_count", "rating").get(id=self.driver.id),
+            export.getvalue().splitlines(),
+        )
+
+    def test_rebuilds_and_export_include_archived_trips(self):
+        trips = [self.create_trip(40), self.create_trip(40), self.create_trip(45), self.create_trip(2)]
+        self.create_trip(50, status=Trip.STATUS_CANCELED)
+        for fare, trip in zip((10, 5, 8, 7), trips):
+            Trip.objects.filter(id=trip.id).update(total_fare=fare)
+        for rating, trip in zip((5, 4, 3), (trips[0], trips[1], trips[3])):
+            TripReview.objects.create(trip=trip, reviewer=self.customer, rating=rating)
+        before = self.totals()
+
+        # Leaves one of the two trips that ended 40 days ago live, so that day's
+        # rollup has to add up rows from both tables.
+        self.assertEqual(archive_trips(batch_size=3, max_batches=1), 3)
+        after = self.totals()
+
+        self.assertEqual(after, before)
+        self.assertEqual(len(after[0]), 4)
+        self.assertEqual(after[2][:2], (12, 3))
+        self.assertEqual(len(after[3]), 5)
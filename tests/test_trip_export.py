@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from business.export import EXPORT_FIELDS
+from business.models import Driver, Trip
+
+User = get_user_model()
+
+
+class TripExportTestCase(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="expcust", email="expcust@gmail.com", password="Password@1234"
+        )
+        driver_user = User.objects.create_user(
+            username="expdrv", email="expdrv@gmail.com", password="Password@1234", user_type="Driver"
+        )
+        self.driver = Driver.objects.create(user=driver_user, license_number="EXP-1")
+        self.admin = User.objects.create_user(
+            username="expadmin", email="expadmin@gmail.com", password="Password@1234", user_type="Admin"
+        )
+
+        now = timezone.now()
+        self.trips = []
+        for days_ago, driver in ((0, self.driver), (3, None), (10, self.driver)):
+            trip = Trip.objects.create(
+                customer=self.customer, driver=driver, start_location="Yaba", end_location="Ikeja", distance=5
+            )
+            Trip.objects.filter(id=trip.id).update(requested_at=now - timedelta(days=days_ago))
+            self.trips.append(trip)
+
+    def export(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(reverse("export-trips"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_for_admin(self):
+        rows = list(csv.reader(io.StringIO(self.export(self.admin))))
+
+        self.assertEqual(tuple(rows[0]), EXPORT_FIELDS)
+        # Oldest first.
+        self.assertEqual([row[0] for row in rows[1:]], [str(trip.id) for trip in reversed(self.trips)])
+
+    def test_staff_without_admin_type_only_gets_own_trips(self):
+        staff = User.objects.create_user(
+            username="expstaff", email="expstaff@gmail.com", password="Password@1234", is_staff=True
+        )
+        Trip.objects.create(customer=staff, start_location="Yaba", end_location="Ikeja", distance=5)
+
+        records = [json.loads(line) for line in self.export(staff, export_format="ndjson").splitlines()]
+        self.assertEqual([record["customer_id"] for record in records], [str(staff.id)])
+
+    def test_ndjson_export_is_scoped_to_the_driver(self):
+        lines = self.export(self.driver.user, export_format="ndjson").splitlines()
+
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 2)
+        self.assertTrue(all(record["driver_id"] == str(self.driver.id) for record in records))
+
+    def test_date_range_filters_requested_at(self):
+        today = timezone.localdate()
+        lines = self.export(
+            self.customer,
+            export_format="ndjson",
+            start_date=(today - timedelta(days=5)).isoformat(),
+            end_date=today.isoformat(),
+        ).splitlines()
+
+        self.assertEqual({json.loads(line)["id"] for line in lines}, {str(trip.id) for trip in self.trips[:2]})
+
+    def test_export_command_streams_to_stdout(self):
+        out = StringIO()
+        call_command("export_trips", "--format", "ndjson", "--chunk-size", "1", stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from business.models import Driver, Trip
+
+User = get_user_model()
+
+
+class TripLifecycleTestCase(APITestCase):
+    def setUp(self):
+        # Keep the background audit flusher out of the test transaction.
+        patcher = patch("crm.services.activity.activity_log.enqueue")
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.customer = User.objects.create_user(
+            username="lifecust", email="lifecust@gmail.com", password="Password@1234"
+        )
+        self.drivers = []
+        for name in ("lifedrva", "lifedrvb"):
+            user = User.objects.create_user(
+                username=name, email=f"{name}@gmail.com", password="Password@1234", user_type="Driver"
+            )
+            self.drivers.append(Driver.objects.create(user=user, license_number=name))
+
+        self.trip = Trip.objects.create(
+            customer=self.customer, start_location="Yaba", end_location="Bariga", distance=4
+        )
+
+    def act(self, user, action, trip=None):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.post(reverse(f"{action}-trip", kwargs={"trip_id": (trip or self.trip).id}))
+
+    def test_full_lifecycle_stamps_times(self):
+        driver = self.drivers[0]
+        for action, expected in (("accept", "A"), ("start", "IP"), ("complete", "C")):
+            response = self.act(driver.user, action)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+            self.assertEqual(response.data["status"], expected)
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.driver, driver)
+        self.assertEqual(self.enqueue.call_count, 3)
+        self.assertIsNotNone(self.trip.started_at)
+        self.assertGreaterEqual(self.trip.ended_at, self.trip.started_at)
+
+    def test_second_driver_cannot_accept_taken_trip(self):
+        first, second = self.drivers
+
+        self.assertEqual(self.act(first.user, "accept").status_code, status.HTTP_200_OK)
+        response = self.act(second.user, "accept")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT, response.content)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.driver, first)
+
+    def test_accept_is_a_single_conditional_update(self):
+        from business.service import TripService
+
+        request = type("Request", (), {"user": self.drivers[0].user})()
+        # Driver lookup, the conditional UPDATE and reading the trip back.
+        with self.assertNumQueries(3):
+            trip, error = TripService(request).transition(self.trip.id, "accept")
+
+        self.assertIsNone(error)
+        self.assertEqual(trip.status, Trip.STATUS_ACCEPTED)
+
+    def test_canceled_trip_cannot_start(self):
+        driver = self.drivers[0]
+        self.act(driver.user, "accept")
+        self.assertEqual(self.act(self.customer, "cancel").status_code, status.HTTP_200_OK)
+
+        response = self.act(driver.user, "start")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT, response.content)
+
+    def test_only_assigned_driver_or_customer_may_act(self):
+        first, second = self.drivers
+        self.act(first.user, "accept")
+
+        self.assertEqual(self.act(second.user, "start").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.act(second.user, "cancel").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.act(self.customer, "accept").status_code, status.HTTP_403_FORBIDDEN)
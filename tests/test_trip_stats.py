@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from business.models import CustomerDailyStats, Driver, DriverDailyStats, Trip
+
+User = get_user_model()
+
+
+class TripStatsTestCase(APITestCase):
+    def setUp(self):
+        patcher = patch("crm.services.activity.activity_log.enqueue")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.customer = User.objects.create_user(
+            username="statcust", email="statcust@gmail.com", password="Password@1234"
+        )
+        driver_user = User.objects.create_user(
+            username="statdrv", email="statdrv@gmail.com", password="Password@1234", user_type="Driver"
+        )
+        self.driver = Driver.objects.create(user=driver_user, license_number="STAT-1")
+
+    def act(self, user, action, trip):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(reverse(f"{action}-trip", kwargs={"trip_id": trip.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+    def finish(self, total_fare, distance, cancel=False):
+        trip = Trip.objects.create(
+            customer=self.customer, start_location="Yaba", end_location="Ikeja",
+            distance=distance, total_fare=total_fare,
+        )
+        self.act(self.driver.user, "accept", trip)
+        if cancel:
+            self.act(self.customer, "cancel", trip)
+        else:
+            self.act(self.driver.user, "start", trip)
+            self.act(self.driver.user, "complete", trip)
+        return trip
+
+    def stats(self, role, user, **params):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(reverse(f"{role}-stats"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data
+
+    def test_transitions_update_rollups(self):
+        self.finish(Decimal("12.50"), 8)
+        self.finish(Decimal("7.50"), 4)
+        self.finish(Decimal("9.00"), 6, cancel=True)
+
+        row = DriverDailyStats.objects.get(driver=self.driver)
+        self.assertEqual((row.completed_trips, row.canceled_trips), (2, 1))
+        self.assertEqual((row.revenue, row.distance), (Decimal("20.00"), 12))
+
+        stats = self.stats("driver", self.driver.user)
+        self.assertEqual(stats["trips"], 3)
+        self.assertEqual(stats["completion_rate"], 0.6667)
+        self.assertEqual(stats["average_distance"], 6)
+        self.assertEqual(len(stats["days"]), 1)
+        self.assertEqual(self.stats("customer", self.customer)["revenue"], Decimal("20.00"))
+
+    def test_year_of_stats_reads_one_row_per_day(self):
+        today = timezone.localdate()
+        CustomerDailyStats.objects.bulk_create(
+            CustomerDailyStats(customer=self.customer, date=today - timedelta(days=day), completed_trips=2)
+            for day in range(400)
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse("customer-stats"))
+
+        self.assertEqual(response.data["completed_trips"], 2 * 366)
+        self.assertEqual(len(response.data["days"]), 366)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.finish(Decimal("10.00"), 5)
+        self.finish(Decimal("3.00"), 2, cancel=True)
+        incremental = list(CustomerDailyStats.objects.values("date", "completed_trips", "canceled_trips", "revenue"))
+
+        CustomerDailyStats.objects.update(completed_trips=99)
+        out = StringIO()
+        call_command("rebuild_trip_stats", stdout=out)
+
+        self.assertIn("Rebuilt 1 DriverDailyStats rows.", out.getvalue())
+        rebuilt = list(CustomerDailyStats.objects.values("date", "completed_trips", "canceled_trips", "revenue"))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_range_is_limited_to_a_year(self):
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+        response = client.get(reverse("customer-stats"), {"start_date": "2024-01-01", "end_date": "2025-06-01"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,38 @@
+from django.contrib.auth import authenticate
+from django.test import TestCase
+
+from accounts.models import User
+from accounts.services.users import UserService
+
+
+class NormalizedUserLookupTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="LookupUser",
+            email="Lookup.User@Gmail.com",
+            password="Password@1234",
+            phone_number="08031234567",
+        )
+
+    def test_save_fills_normalized_columns(self):
+        self.assertEqual(self.user.email_normalized, "lookup.user@gmail.com")
+        self.assertEqual(self.user.username_normalized, "lookupuser")
+        self.assertEqual(self.user.phone_number_normalized, "+2348031234567")
+
+        self.user.email = "Renamed@Gmail.com"
+        self.user.save(update_fields=["email"])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_normalized, "renamed@gmail.com")
+
+    def test_lookups_ignore_case_and_phone_format(self):
+        self.assertEqual(UserService.find_user_by_phone_number("+234 803 123 4567")[0], self.user)
+        self.assertTrue(UserService.user_exists_by_username_or_email(username="LOOKUPUSER"))
+        self.assertTrue(UserService.user_exists_by_username_or_email(email="lookup.user@GMAIL.com"))
+        self.assertFalse(UserService.user_exists_by_username_or_email(email="someone@gmail.com"))
+
+    def test_login_is_a_single_lookup(self):
+        with self.assertNumQueries(1):
+            user = authenticate(username="LOOKUP.USER@gmail.com", password="Password@1234")
+        self.assertEqual(user, self.user)
+
+        self.assertEqual(authenticate(username="lookupUSER", password="Password@1234"), self.user)
@@ -0,0 +1,96 @@
+import random
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from business import zones
+from business.models import Zone
+from business.zones import IndexedZone, STRTree, ZoneIndex
+from tests.utils import LOCMEM_CACHE
+
+# Rough outlines around the airport and the University of Lagos, inside a
+# larger service area.
+SERVICE_AREA = [[6.40, 3.25], [6.70, 3.25], [6.70, 3.60], [6.40, 3.60]]
+AIRPORT = [[6.56, 3.30], [6.60, 3.30], [6.60, 3.34], [6.56, 3.34], [6.56, 3.30]]
+UNILAG = [[6.50, 3.38], [6.53, 3.38], [6.515, 3.41]]
+
+
+def make_zone(name, kind, polygon, priority=0):
+    return IndexedZone(name, name, kind, priority, polygon)
+
+
+class ZoneIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = ZoneIndex([
+            make_zone("lagos", Zone.KIND_SERVICE_AREA, SERVICE_AREA),
+            make_zone("airport", Zone.KIND_AIRPORT, AIRPORT, priority=10),
+            make_zone("unilag", Zone.KIND_SURGE, UNILAG, priority=5),
+        ])
+
+    def test_zone_for_prefers_priority(self):
+        self.assertEqual(self.index.zone_for(6.5774, 3.3212).name, "airport")
+        self.assertEqual(self.index.zone_for(6.5158, 3.3898).name, "unilag")
+        self.assertEqual(self.index.zone_for(6.45, 3.50).name, "lagos")
+        self.assertIsNone(self.index.zone_for(7.0, 3.5))
+
+    def test_zone_for_by_kind(self):
+        zone = self.index.zone_for(6.5774, 3.3212, kind=Zone.KIND_SERVICE_AREA)
+        self.assertEqual(zone.name, "lagos")
+
+    def test_triangle_edges(self):
+        # Inside the bounding box of the triangle but outside the triangle itself.
+        self.assertEqual(self.index.zone_for(6.501, 3.409).name, "lagos")
+
+    def test_zones_for_matches_zone_for(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(6.35, 6.75), rng.uniform(3.2, 3.65)) for _ in range(2000)]
+
+        batch = self.index.zones_for(points)
+
+        self.assertEqual(batch, [self.index.zone_for(lat, lon) for lat, lon in points])
+        self.assertTrue(any(zone is None for zone in batch))
+
+    def test_str_tree_query_matches_linear_scan(self):
+        rng = random.Random(3)
+        boxes = []
+        for _ in range(500):
+            lat, lon = rng.uniform(6.3, 6.7), rng.uniform(3.2, 3.6)
+            boxes.append((lat, lon, lat + rng.uniform(0, 0.05), lon + rng.uniform(0, 0.05)))
+        tree = STRTree(boxes, node_capacity=4)
+
+        for _ in range(200):
+            lat, lon = rng.uniform(6.3, 6.75), rng.uniform(3.2, 3.65)
+            expected = [
+                i for i, (a, b, c, d) in enumerate(boxes) if a <= lat <= c and b <= lon <= d
+            ]
+            self.assertEqual(sorted(tree.query(lat, lon)), expected)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ZONE_INDEX_CHECK_SECONDS=0)
+class ZoneReloadTestCase(TestCase):
+    def setUp(self):
+        zones.reload_zone_index()
+
+    def test_saving_a_zone_rebuilds_the_index(self):
+        self.assertIsNone(zones.zone_for(6.5774, 3.3212))
+
+        class InlineThread:
+            def __init__(self, target, args, **kwargs):
+                self.target, self.args = target, args
+
+            def start(self):
+                self.target(*self.args)
+
+        with self.captureOnCommitCallbacks(execute=True), patch("business.zones.close_old_connections"):
+            Zone.objects.create(name="Airport", kind=Zone.KIND_AIRPORT, polygon=AIRPORT)
+
+        with patch("business.zones.threading.Thread", InlineThread), \
+                patch("business.zones.close_old_connections"):
+            zones.get_zone_index()
+
+        self.assertEqual(zones.zone_for(6.5774, 3.3212).name, "Airport")
+
+    def test_polygon_validation(self):
+        with self.assertRaises(ValidationError):
+            Zone(name="Broken", polygon=[[6.5, 3.3], [6.6, 3.3]]).full_clean()
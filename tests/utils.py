@@ -0,0 +1,3 @@
+# Tests that exercise cache-backed code swap in a per-process cache, so they
+# neither need Redis nor share state with another test run.
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}